@@ -0,0 +1,62 @@
+# coding: utf-8
+
+"""
+Benchmark of DatetimeField conversion against plain strptime.
+
+Usage::
+
+    PYTHONPATH=. python benchmarks/datetime_bench.py [-n 1000000]
+"""
+
+from __future__ import print_function
+
+import time
+import random
+import argparse
+import datetime
+from params import DatetimeField
+
+
+FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%d',
+]
+
+
+def make_values(n, format):
+    start = datetime.datetime(2000, 1, 1)
+    random.seed(0)
+    return [
+        (start + datetime.timedelta(seconds=random.randint(0, 10 ** 9))).strftime(format)
+        for _ in range(n)]
+
+
+def timeit(func, values):
+    start = time.time()
+    for v in values:
+        func(v)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', type=int, default=1000000, help='number of timestamps')
+    args = parser.parse_args()
+
+    print('{:<24} {:>10} {:>10} {:>8}'.format('format', 'strptime', 'field', 'speedup'))
+    for format in FORMATS:
+        values = make_values(args.n, format)
+        f = DatetimeField(format=format)
+        baseline = timeit(lambda v: datetime.datetime.strptime(v, format), values)
+        elapsed = timeit(lambda v: f.validate(v, convert=True), values)
+        print('{:<24} {:>9.2f}s {:>9.2f}s {:>7.1f}x'.format(format, baseline, elapsed, baseline / elapsed))
+
+    values = [str(int(time.time()) - i) for i in range(args.n)]
+    f = DatetimeField(format='epoch')
+    elapsed = timeit(lambda v: f.validate(v, convert=True), values)
+    print('{:<24} {:>10} {:>9.2f}s'.format('epoch', '-', elapsed))
+
+
+if __name__ == '__main__':
+    main()
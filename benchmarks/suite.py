@@ -0,0 +1,428 @@
+# coding: utf-8
+
+"""
+Microbenchmarks of params, with JSON baselines to catch regressions.
+
+Usage::
+
+    PYTHONPATH=. python benchmarks/suite.py [-k NAME]
+    PYTHONPATH=. python benchmarks/suite.py --save benchmarks/baseline.json
+    PYTHONPATH=. python benchmarks/suite.py --compare benchmarks/baseline.json [--threshold 0.25]
+
+Each benchmark is timed as the best of `--repeat` runs, in microseconds per
+call. With `--compare`, the exit status is 1 if any benchmark is slower than
+the baseline by more than `--threshold` (a ratio, 0.25 means 25%).
+
+Benchmarks named `compare/...` time django.forms against equivalent
+ParamSet classes, they are run if Django is installed and never counted as
+regressions. The Django and Tornado adapters are timed with stub requests,
+no server is started.
+"""
+
+from __future__ import print_function
+
+import sys
+import json
+import time
+import uuid
+import argparse
+import platform
+from params import (
+    ParamSet, StringField, RegexField, WordField, EmailField, URLField,
+    IntegerField, FloatField, ListField, NestedField, DictField,
+    UUIDStringField, DatetimeField, BooleanField,
+)
+from params.utils import unicode_copy
+
+# [(name, setup)], setup returns the function to be timed
+BENCHMARKS = []
+
+
+def bench(name):
+    def decorator(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return decorator
+
+
+###############################################################################
+# Schemas                                                                     #
+###############################################################################
+
+class SmallParams(ParamSet):
+    name = StringField(length=(1, 20), required=True)
+    age = IntegerField(min=0, max=150)
+    email = EmailField()
+
+
+class SmallCompiledParams(SmallParams):
+    compiled = True
+
+
+WIDE_SIZE = 50
+
+
+def _make_wide_params():
+    attrs = {}
+    for i in range(WIDE_SIZE):
+        if i % 3 == 0:
+            attrs['f%d' % i] = StringField(length=(0, 32))
+        elif i % 3 == 1:
+            attrs['f%d' % i] = IntegerField(min=0)
+        else:
+            attrs['f%d' % i] = FloatField(max=1e9)
+    return type('WideParams', (ParamSet, ), attrs)
+
+
+WideParams = _make_wide_params()
+
+
+class AddressParams(ParamSet):
+    zip = StringField(length=5, required=True)
+    city = StringField()
+
+
+class NestedParams(ParamSet):
+    user = NestedField(SmallParams, required=True)
+    addresses = ListField(item_class=AddressParams, item_instances=True)
+    tags = DictField(StringField(), IntegerField())
+
+
+SMALL_VALID = {'name': 'someone', 'age': 30, 'email': 'someone@example.com'}
+SMALL_INVALID = {'name': '', 'age': -1, 'email': 'someone@'}
+WIDE_VALID = dict(
+    ('f%d' % i, [u'value', 1, 1.5][i % 3]) for i in range(WIDE_SIZE))
+NESTED_VALID = {
+    'user': SMALL_VALID,
+    'addresses': [{'zip': '%05d' % i, 'city': 'city'} for i in range(10)],
+    'tags': dict(('tag%d' % i, i) for i in range(10)),
+}
+NESTED_INVALID = {
+    'user': SMALL_INVALID,
+    'addresses': [{'zip': '%d' % i} for i in range(10)],
+    'tags': {'a': 'b'},
+}
+
+
+###############################################################################
+# ParamSet                                                                    #
+###############################################################################
+
+def _construct(params_cls, raw, **kwargs):
+    def run():
+        params_cls(raw, raise_if_invalid=False, **kwargs)
+    return run
+
+
+for _name, _cls, _raw in [
+        ('small/valid', SmallParams, SMALL_VALID),
+        ('small/invalid', SmallParams, SMALL_INVALID),
+        ('small/compiled/valid', SmallCompiledParams, SMALL_VALID),
+        ('small/compiled/invalid', SmallCompiledParams, SMALL_INVALID),
+        ('wide/valid', WideParams, WIDE_VALID),
+        ('nested/valid', NestedParams, NESTED_VALID),
+        ('nested/invalid', NestedParams, NESTED_INVALID)]:
+    bench('paramset/' + _name)(lambda cls=_cls, raw=_raw: _construct(cls, raw))
+
+
+@bench('paramset/small/invalid/try_validate')
+def _():
+    return lambda: SmallParams.try_validate(SMALL_INVALID)
+
+
+@bench('paramset/small/valid/no_copy')
+def _():
+    return _construct(SmallParams, SMALL_VALID, copy_raw=False)
+
+
+###############################################################################
+# Fields                                                                      #
+###############################################################################
+
+# (name, field, valid value, invalid value, convert)
+FIELD_CASES = [
+    ('string', StringField(length=(1, 10)), u'hello', u'hello world!', False),
+    ('regex', RegexField(pattern=r'^[a-z]+$'), u'hello', u'Hello', False),
+    ('word', WordField(), u'hello_1', u'hello world', False),
+    ('email', EmailField(), u'someone@example.com', u'someone@', False),
+    ('url', URLField(), u'https://example.com/path?a=1', u'example', False),
+    ('integer', IntegerField(min=0, max=100), '42', '420', True),
+    ('float', FloatField(min=0.0), '4.2', '-4.2', True),
+    ('list', ListField(item_field=IntegerField()), ['1', '2', '3'], ['1', 'x'], True),
+    ('nested', NestedField(AddressParams), {'zip': '12345'}, {'zip': '1'}, False),
+    ('dict', DictField(StringField(), IntegerField()), {'a': 1, 'b': 2}, {'a': 'b'}, False),
+    ('uuid', UUIDStringField(), str(uuid.UUID(int=1)), 'x', False),
+    ('datetime', DatetimeField(format='%Y-%m-%d %H:%M:%S'),
+     '2020-01-02 03:04:05', '2020-13-02 03:04:05', True),
+    ('boolean', BooleanField(), 'true', 'yes', True),
+]
+
+
+def _validate_field(field, value, convert, valid):
+    try:
+        field.validate(value, convert=convert)
+    except (TypeError, ValueError):
+        if valid:
+            raise
+    else:
+        if not valid:
+            raise AssertionError('{!r} should be invalid for {}'.format(value, field))
+
+    if valid:
+        return lambda: field.validate(value, convert=convert)
+
+    def run():
+        try:
+            field.validate(value, convert=convert)
+        except (TypeError, ValueError):
+            pass
+    return run
+
+
+for _name, _field, _valid, _invalid, _convert in FIELD_CASES:
+    bench('field/{}/valid'.format(_name))(
+        lambda f=_field, v=_valid, c=_convert: _validate_field(f, v, c, True))
+    bench('field/{}/invalid'.format(_name))(
+        lambda f=_field, v=_invalid, c=_convert: _validate_field(f, v, c, False))
+    bench('field/{}/invalid/check'.format(_name))(
+        lambda f=_field, v=_invalid, c=_convert: lambda: f.check(v, convert=c))
+
+
+###############################################################################
+# Utilities                                                                   #
+###############################################################################
+
+@bench('unicode_copy/nested')
+def _():
+    return lambda: unicode_copy(NESTED_VALID)
+
+
+@bench('to_dict/wide')
+def _():
+    params = WideParams(WIDE_VALID)
+    return lambda: params.to_dict()
+
+
+@bench('to_dict/nested')
+def _():
+    params = NestedParams(NESTED_VALID)
+    return lambda: params.to_dict()
+
+
+###############################################################################
+# Framework adapters                                                          #
+###############################################################################
+
+class _QueryDict(dict):
+    """Stub of django QueryDict, values are lists"""
+    def lists(self):
+        return list(self.items())
+
+
+class _DjangoRequest(object):
+    def __init__(self, method, form=None, body=b''):
+        self.method = method
+        self.GET = _QueryDict(form or {}) if method == 'GET' else _QueryDict()
+        self.POST = _QueryDict(form or {}) if method == 'POST' else _QueryDict()
+        self.body = body
+
+
+class _TornadoRequest(object):
+    def __init__(self, arguments=None, body=b''):
+        self.arguments = arguments or {}
+        self.body = body
+
+
+class _TornadoHandler(object):
+    def __init__(self, request):
+        self.request = request
+
+
+FORM_DATA = dict(('f%d' % i, ['value%d' % i]) for i in range(20))
+FORM_DATA['multi'] = ['a', 'b', 'c']
+JSON_BODY = json.dumps(NESTED_VALID).encode('utf8')
+
+
+@bench('django/get_raw/form')
+def _():
+    from params.contrib.django import get_raw
+    request = _DjangoRequest('POST', FORM_DATA)
+    return lambda: get_raw(request)
+
+
+@bench('django/get_raw/json')
+def _():
+    from params.contrib.django import get_raw
+    request = _DjangoRequest('POST', body=JSON_BODY)
+    return lambda: get_raw(request, is_json=True)
+
+
+@bench('tornado/get_raw/form')
+def _():
+    from params.contrib.tornado import get_raw
+    hdr = _TornadoHandler(_TornadoRequest(dict(
+        (k, [i.encode('utf8') for i in v]) for k, v in FORM_DATA.items())))
+    return lambda: get_raw(hdr, 'POST', False)
+
+
+@bench('tornado/get_raw/json')
+def _():
+    from params.contrib.tornado import get_raw
+    hdr = _TornadoHandler(_TornadoRequest(body=JSON_BODY))
+    return lambda: get_raw(hdr, 'POST', True)
+
+
+###############################################################################
+# Comparison against django.forms                                             #
+###############################################################################
+
+def _setup_django():
+    import django
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(USE_I18N=False)
+        django.setup()
+    from django import forms
+    return forms
+
+
+def _small_form():
+    forms = _setup_django()
+
+    class SmallForm(forms.Form):
+        name = forms.CharField(min_length=1, max_length=20)
+        age = forms.IntegerField(min_value=0, max_value=150, required=False)
+        email = forms.EmailField(required=False)
+
+    return SmallForm
+
+
+def _wide_form():
+    forms = _setup_django()
+    attrs = {}
+    for i in range(WIDE_SIZE):
+        if i % 3 == 0:
+            attrs['f%d' % i] = forms.CharField(max_length=32, required=False)
+        elif i % 3 == 1:
+            attrs['f%d' % i] = forms.IntegerField(min_value=0, required=False)
+        else:
+            attrs['f%d' % i] = forms.FloatField(max_value=1e9, required=False)
+    return type('WideForm', (forms.Form, ), attrs)
+
+
+# form data is all strings, ParamSet converts them like django.forms
+SMALL_FORM_VALID = dict((k, str(v)) for k, v in SMALL_VALID.items())
+SMALL_FORM_INVALID = {'name': '', 'age': '-1', 'email': 'someone@'}
+WIDE_FORM_VALID = dict((k, str(v)) for k, v in WIDE_VALID.items())
+
+
+def _form_valid(form_cls, data, valid):
+    assert form_cls(data).is_valid() is valid
+    return lambda: form_cls(data).is_valid()
+
+
+for _name, _form, _cls, _data, _valid in [
+        ('small/valid', _small_form, SmallParams, SMALL_FORM_VALID, True),
+        ('small/invalid', _small_form, SmallParams, SMALL_FORM_INVALID, False),
+        ('wide/valid', _wide_form, WideParams, WIDE_FORM_VALID, True)]:
+    bench('compare/django_forms/' + _name)(
+        lambda form=_form, data=_data, valid=_valid: _form_valid(form(), data, valid))
+    bench('compare/params/' + _name)(
+        lambda cls=_cls, data=_data: _construct(cls, data, convert_fields=True))
+
+
+###############################################################################
+# Runner                                                                      #
+###############################################################################
+
+def measure(func, repeat=3, min_time=0.1):
+    """Return the best time of `repeat` runs in microseconds per call"""
+    number = 1
+    while True:
+        start = time.time()
+        for _ in range(number):
+            func()
+        elapsed = time.time() - start
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.time()
+        for _ in range(number):
+            func()
+        best = min(best, time.time() - start)
+    return best / number * 1e6
+
+
+def run(pattern=None, repeat=3, min_time=0.1):
+    results = {}
+    for name, setup in BENCHMARKS:
+        if pattern and pattern not in name:
+            continue
+        try:
+            func = setup()
+        except ImportError as e:
+            print('{:<44} skipped: {}'.format(name, e))
+            continue
+        results[name] = measure(func, repeat=repeat, min_time=min_time)
+        print('{:<44} {:>10.2f} us'.format(name, results[name]))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the changes against the baseline, return the names of
+    regressions.
+    """
+    regressions = []
+    print()
+    print('{:<44} {:>10} {:>10} {:>8}'.format('benchmark', 'baseline', 'current', 'change'))
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        old, new = baseline[name], results[name]
+        change = new / old - 1
+        mark = ''
+        if change > threshold and not name.startswith('compare/'):
+            regressions.append(name)
+            mark = ' !'
+        print('{:<44} {:>10.2f} {:>10.2f} {:>+7.0%}{}'.format(name, old, new, change, mark))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-k', dest='pattern', help='only run benchmarks whose names contain it')
+    parser.add_argument('--save', metavar='FILE', help='save results as a baseline')
+    parser.add_argument('--compare', metavar='FILE', help='compare results with a baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='max ratio of slowdown allowed by --compare, default 0.25')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each benchmark, default 3')
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help='min seconds of each run, default 0.1')
+    args = parser.parse_args()
+
+    results = run(args.pattern, repeat=args.repeat, min_time=args.min_time)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('\n{} regression(s) over {:.0%}: {}'.format(
+                len(regressions), args.threshold, ', '.join(regressions)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
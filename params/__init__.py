@@ -6,5 +6,6 @@ from .core import *  # NOQA
 from .core import __all__ as __core_all
 from .fields import *  # NOQA
 from .fields import __all__ as __fields_all
+from .choices import ChoiceSet  # NOQA
 
-__all__ = __core_all + __fields_all
+__all__ = __core_all + __fields_all + ['ChoiceSet']
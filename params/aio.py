@@ -0,0 +1,110 @@
+# coding: utf-8
+
+"""
+Asyncio support, requires Python 3.5+.
+
+`validate_*` methods of a ParamSet could be coroutine functions, which are
+awaited by `ParamSet.avalidate`. Fields are validated the same way as
+`ParamSet.validate`, then `validate_<field>` methods are run one by one,
+and cross-field `validate_*` methods are run concurrently. Errors are
+collected in the same order as `ParamSet.validate`.
+
+A method could be limited in time by the `timeout` decorator, or by the
+`hook_timeout` attribute of the ParamSet class for all methods, a method
+that times out is reported as an error of the field.
+"""
+
+import asyncio
+import inspect
+from functools import wraps
+from .core import FieldErrorInfo, InvalidParams, _ErrorLimitReached
+
+__all__ = [
+    'timeout',
+    'avalidate',
+    'avalidate_list',
+]
+
+
+def timeout(seconds):
+    """Set the timeout of a `validate_*` method"""
+    def decorator(func):
+        func._params_timeout = seconds
+        return func
+    return decorator
+
+
+async def _call_hook(params, hook, *args):
+    hook = hook.__get__(params, params.__class__)
+    result = hook(*args)
+    if not inspect.isawaitable(result):
+        return result
+    seconds = getattr(hook, '_params_timeout', None)
+    if seconds is None:
+        seconds = params._hook_timeout
+    if seconds is None:
+        return await result
+    try:
+        return await asyncio.wait_for(result, seconds)
+    except asyncio.TimeoutError:
+        raise ValueError('validation timed out after {} seconds'.format(seconds))
+
+
+async def _capture(params, hook):
+    """Run a cross-field hook, return the ValueError raised or None"""
+    try:
+        await _call_hook(params, hook)
+    except ValueError as e:
+        return e
+    return None
+
+
+async def avalidate(params_cls, raw_data, raise_if_invalid=True, **kwargs):
+    """Create a ParamSet instance and validate it, see `ParamSet.avalidate`"""
+    params = params_cls.__new__(params_cls)
+    params._prepare(raw_data, **kwargs)
+    plan = params._plan
+    limit = params._error_limit()
+
+    try:
+        params._validate_fields(limit)
+
+        for key, field, hook in plan.field_hooks:
+            if key in params.data:
+                try:
+                    value = await _call_hook(params, hook, params.data[key])
+                except ValueError as e:
+                    params._add_error(FieldErrorInfo(key, e), limit)
+                else:
+                    params._set_hook_value(key, field, value)
+
+        errors = await asyncio.gather(*[_capture(params, hook) for hook in plan.cross_hooks])
+        for e in errors:
+            if e is not None:
+                params._add_error(FieldErrorInfo(None, e), limit)
+    except _ErrorLimitReached:
+        pass
+
+    if raise_if_invalid:
+        if params.errors:
+            raise InvalidParams(params.errors)
+    return params
+
+
+async def avalidate_list(params_cls, items, **kwargs):
+    """Validate each item of a list, return the list of ParamSet instances"""
+    return [await avalidate(params_cls, item, **kwargs) for item in items]
+
+
+def wrap_view(view, get_params, set_params):
+    """Wrap a coroutine view for the contrib decorators.
+
+    `get_params(*args, **kwargs)` returns an awaitable of the params,
+    `set_params(args, params)` puts them where the view expects.
+    """
+    @wraps(view)
+    async def func(*args, **kwargs):
+        set_params(args, await get_params(*args, **kwargs))
+        return await view(*args, **kwargs)
+
+    return func
@@ -0,0 +1,228 @@
+# coding: utf-8
+
+"""
+Indexed choices for `Field(choices=...)`.
+
+`ChoiceSet` holds the choices in a frozenset, so that membership test
+takes constant time instead of scanning a list, a sorted copy is built
+when range queries are needed.
+
+`ChoiceSet.from_file` maps a file of sorted lines into memory, values are
+looked up by binary search in the mapped file, which is shared by all the
+processes that map it. The file is written by `ChoiceSet.write_file`, and
+could be replaced at any time, it's mapped again when `reload` is called,
+or on lookups after `check_interval` seconds.
+"""
+
+import os
+import mmap
+import time
+import bisect
+import tempfile
+import itertools
+import six
+
+__all__ = [
+    'ChoiceSet',
+]
+
+
+class ChoiceSet(object):
+    """A set of choices for fast membership test, values must be hashable"""
+    # number of values shown in repr
+    repr_limit = 5
+
+    def __init__(self, values=()):
+        self._values = frozenset(values)
+        self._sorted = None
+
+    def __contains__(self, value):
+        try:
+            return value in self._values
+        except TypeError:
+            # unhashable value
+            return False
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __bool__(self):
+        return bool(self._values)
+
+    __nonzero__ = __bool__
+
+    def range(self, start=None, stop=None):
+        """Return the sorted values that `start <= value < stop`"""
+        if self._sorted is None:
+            self._sorted = sorted(self._values)
+        values = self._sorted
+        lo = 0 if start is None else bisect.bisect_left(values, start)
+        hi = len(values) if stop is None else bisect.bisect_left(values, stop)
+        return values[lo:hi]
+
+    def _sample(self):
+        try:
+            return self.range()[:self.repr_limit]
+        except TypeError:
+            # values of mixed types could not be sorted
+            return list(itertools.islice(self._values, self.repr_limit))
+
+    def __repr__(self):
+        # never print the whole set, it's used in error messages
+        sample = ', '.join(repr(i) for i in self._sample())
+        if len(self) > self.repr_limit:
+            sample += ', ...'
+        return '<{}: {} values: {}>'.format(self.__class__.__name__, len(self), sample)
+
+    @classmethod
+    def from_file(cls, path, check_interval=None):
+        """Create a ChoiceSet of the file written by `write_file`"""
+        return FileChoiceSet(path, check_interval=check_interval)
+
+    @staticmethod
+    def write_file(path, values):
+        """Write values (strings without newline) to `path` as sorted UTF-8
+        lines, the file is replaced atomically so that it could be reloaded
+        by other processes at any time.
+        """
+        lines = set()
+        for value in values:
+            if isinstance(value, six.text_type):
+                value = value.encode('utf8')
+            if b'\n' in value:
+                raise ValueError('value should not contain newline: {!r}'.format(value))
+            lines.add(value)
+
+        dirname = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix='.choices-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # UTF-8 bytes are in the same order as code points
+                for line in sorted(lines):
+                    f.write(line + b'\n')
+            # rename is atomic on POSIX
+            getattr(os, 'replace', os.rename)(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+
+def _map_file(path):
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            # empty file could not be mapped
+            data = b''
+        else:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return data, (st.st_ino, st.st_size, st.st_mtime)
+
+
+def _line_at(data, pos):
+    start = data.rfind(b'\n', 0, pos) + 1
+    return start, data.find(b'\n', start)
+
+
+def _bisect(data, key, lo=0):
+    """Return the offset of the first line >= key"""
+    hi = len(data)
+    while lo < hi:
+        start, end = _line_at(data, (lo + hi) // 2)
+        if data[start:end] < key:
+            lo = end + 1
+        else:
+            hi = start
+    return lo
+
+
+def _encode(value):
+    if isinstance(value, six.text_type):
+        return value.encode('utf8')
+    if six.PY2 and isinstance(value, str):
+        return value
+    return None
+
+
+class FileChoiceSet(ChoiceSet):
+    """ChoiceSet of the lines of a memory-mapped file, see `ChoiceSet.from_file`"""
+
+    def __init__(self, path, check_interval=None):
+        self.path = path
+        self.check_interval = check_interval
+        self._next_check = None
+        self._load()
+
+    def _load(self):
+        data, stat = _map_file(self.path)
+        # replace them at once, lookups use either the old or the new one
+        self._state = (data, stat, [None])
+        if self.check_interval is not None:
+            self._next_check = time.time() + self.check_interval
+
+    def reload(self):
+        """Map the file again if it has changed, return True if so"""
+        st = os.stat(self.path)
+        if (st.st_ino, st.st_size, st.st_mtime) == self._state[1]:
+            return False
+        self._load()
+        return True
+
+    def _get_data(self):
+        if self._next_check is not None and time.time() >= self._next_check:
+            self._next_check = time.time() + self.check_interval
+            self.reload()
+        return self._state[0]
+
+    def __contains__(self, value):
+        key = _encode(value)
+        if key is None or b'\n' in key:
+            return False
+        data = self._get_data()
+        pos = _bisect(data, key)
+        return data[pos:pos + len(key) + 1] == key + b'\n'
+
+    def _iter_lines(self, data, start=0, stop=None):
+        while start < len(data):
+            end = data.find(b'\n', start)
+            line = data[start:end]
+            if stop is not None and line >= stop:
+                return
+            yield line.decode('utf8')
+            start = end + 1
+
+    def __iter__(self):
+        return self._iter_lines(self._get_data())
+
+    def __len__(self):
+        # the count is cached with the data it's counted from
+        data, _, length = self._state
+        if length[0] is None:
+            step = 1 << 20
+            length[0] = sum(data[i:i + step].count(b'\n') for i in range(0, len(data), step))
+        return length[0]
+
+    def __bool__(self):
+        return len(self._get_data()) > 0
+
+    __nonzero__ = __bool__
+
+    def range(self, start=None, stop=None):
+        data = self._get_data()
+        lo = 0 if start is None else _bisect(data, _encode(start))
+        stop = None if stop is None else _encode(stop)
+        return list(self._iter_lines(data, lo, stop))
+
+    def _sample(self):
+        lines = []
+        for line in self:
+            if len(lines) == self.repr_limit:
+                break
+            lines.append(line)
+        return lines
+
+    def __reduce__(self):
+        # mapped again in other processes
+        return (self.__class__, (self.path, self.check_interval))
@@ -0,0 +1,315 @@
+# coding: utf-8
+
+"""
+Generate specialized validate functions for ParamSet classes.
+
+The generated code inlines the field loop of `ParamSet.validate` and the
+null/convert/type/choices/extra steps of `Field.validate`, with field
+attributes and bound methods resolved once when the validator is built.
+Only the cheap checks are inlined, when one of them fails the field's own
+method is called to raise the error, so that error messages are exactly
+the same as the interpreted path.
+
+Fields whose classes override the steps in a way that is not known here,
+or fields with a cache, fall back to calling `field.validate`.
+"""
+
+import hashlib
+import warnings
+import six
+from .core import Field, FieldErrorInfo, InvalidParams, field_errors, not_dict_error, additional_key_error
+from .fields import StringField, RegexField, BaseNumberField
+
+__all__ = [
+    'generate_source',
+    'source_hash',
+    'build_validator',
+    'compile_paramset',
+    'install',
+]
+
+
+def _method(cls, name):
+    return six.get_unbound_function(getattr(cls, name))
+
+
+class _Writer(object):
+    def __init__(self):
+        self.lines = []
+        self.level = 0
+
+    def __call__(self, line):
+        if line:
+            line = '    ' * self.level + line
+        self.lines.append(line)
+
+    def indent(self):
+        self.level += 1
+
+    def dedent(self):
+        self.level -= 1
+
+    def getvalue(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def _is_inlinable(field):
+    ftype = type(field)
+    return (
+        field.cache is None and
+        _method(ftype, 'validate') is _method(Field, 'validate') and
+        _method(ftype, '_validate_value') is _method(Field, '_validate_value') and
+        _method(ftype, 'is_null') is _method(Field, 'is_null')
+    )
+
+
+def _emit_type_check(w, i, field):
+    ftype = type(field)
+    validate_type = _method(ftype, '_validate_type')
+
+    known = (
+        _method(Field, '_validate_type'),
+        _method(StringField, '_validate_type'),
+        _method(RegexField, '_validate_type'),
+    )
+    if validate_type not in known:
+        w('f_{0}._validate_type(value)'.format(i))
+        return
+    if validate_type is not known[0] and \
+            _method(ftype, '_validate_length') is not _method(StringField, '_validate_length'):
+        w('f_{0}._validate_type(value)'.format(i))
+        return
+
+    if field.value_type is not None:
+        w('if not isinstance(value, vtype_{0}):'.format(i))
+        w('    f_{0}._validate_type(value)'.format(i))
+
+    if validate_type is known[0]:
+        return
+
+    length = field.length
+    if length is not None:
+        if isinstance(length, int):
+            w('if len(value) != {0!r}:'.format(length))
+        else:
+            w('if not {0!r} <= len(value) <= {1!r}:'.format(length[0], length[1]))
+        w('    f_{0}._validate_length(value)'.format(i))
+
+    if validate_type is known[2]:
+        if field.max_length is not None:
+            w('if len(value) > {0!r}:'.format(field.max_length))
+            w('    f_{0}._validate_type(value)'.format(i))
+        w('if not match_{0}(value):'.format(i))
+        w('    f_{0}._validate_type(value)'.format(i))
+
+
+def _emit_extras(w, i, field):
+    for method_name in field.extra_validation_methods:
+        method = _method(type(field), method_name)
+        if method is _method(BaseNumberField, '_validate_min_max'):
+            conds = []
+            if field.min is not None:
+                conds.append('value < min_{0}'.format(i))
+            if field.max is not None:
+                conds.append('value > max_{0}'.format(i))
+            if conds:
+                w('if {}:'.format(' or '.join(conds)))
+                w('    f_{0}._validate_min_max(value)'.format(i))
+        else:
+            w('getattr(f_{0}, {1!r})(value)'.format(i, method_name))
+
+
+def _emit_field_body(w, i, field):
+    """Inlined `Field.validate`, `value` is converted in place"""
+    if field.null_values:
+        w('if value in null_values_{0}:'.format(i))
+        w.indent()
+        if field.null:
+            w('value = None')
+        else:
+            # raises the "empty value" error
+            w('f_{0}.validate(value)'.format(i))
+        w.dedent()
+        w('else:')
+        w.indent()
+
+    if field.force_convert:
+        w('value = convert_{0}(value)'.format(i))
+    else:
+        w('if convert:')
+        w('    value = convert_{0}(value)'.format(i))
+
+    _emit_type_check(w, i, field)
+
+    if field.choices:
+        if _method(type(field), '_validate_choices') is _method(Field, '_validate_choices'):
+            w('if value not in choices_{0}:'.format(i))
+            w('    f_{0}._validate_choices(value)'.format(i))
+        else:
+            w('f_{0}._validate_choices(value)'.format(i))
+
+    _emit_extras(w, i, field)
+
+    if field.null_values:
+        w.dedent()
+
+
+def generate_source(cls, name='build_validator'):
+    """Generate the source of `build_validator(cls)` for a ParamSet class.
+
+    The returned code defines a function that takes the class and returns
+    a function to be used in place of `ParamSet.validate`.
+    """
+    plan = cls._plan
+    w = _Writer()
+
+    w('def {}(cls):'.format(name))
+    w.indent()
+    w('plan = cls._plan')
+    for i, (key, field) in enumerate(plan.fields):
+        w('key_{0}, f_{0} = plan.fields[{0}]'.format(i))
+        if not _is_inlinable(field):
+            continue
+        w('null_values_{0} = f_{0}.null_values'.format(i))
+        w('convert_{0} = f_{0}._convert_type'.format(i))
+        if field.value_type is not None:
+            w('vtype_{0} = f_{0}.value_type'.format(i))
+        if field.choices:
+            w('choices_{0} = f_{0}.choices'.format(i))
+        if isinstance(field, BaseNumberField):
+            w('min_{0}, max_{0} = f_{0}.min, f_{0}.max'.format(i))
+        if isinstance(field, RegexField):
+            w('match_{0} = f_{0}._match'.format(i))
+    for j in range(len(plan.field_hooks)):
+        w('hkey_{0}, hfield_{0}, fhook_{0} = plan.field_hooks[{0}]'.format(j))
+    for j in range(len(plan.cross_hooks)):
+        w('chook_{0} = plan.cross_hooks[{0}]'.format(j))
+    if cls.no_additional_keys:
+        w('key_set = plan.key_set')
+    w('')
+
+    w('def validate(self, raise_if_invalid=True):')
+    w.indent()
+    w('raw_data = self._raw_data')
+    w('if not isinstance(raw_data, dict):')
+    w('    raise not_dict_error()')
+    w('data = self.data')
+    w('errors = self.errors')
+    w('convert = self.convert_fields')
+
+    for i, (key, field) in enumerate(plan.fields):
+        w('')
+        w('# {} ({})'.format(field.name, type(field).__name__))
+        w('if key_{0} in raw_data:'.format(i))
+        w.indent()
+        w('value = raw_data[key_{0}]'.format(i))
+        w('try:')
+        w.indent()
+        inlinable = _is_inlinable(field)
+        if inlinable:
+            _emit_field_body(w, i, field)
+        else:
+            w('value = f_{0}.validate(value, convert=convert)'.format(i))
+        w.dedent()
+        w('except (TypeError, ValueError) as e:')
+        if inlinable:
+            w('    errors.append(FieldErrorInfo(key_{0}, e))'.format(i))
+        else:
+            # errors of nested values have paths
+            w('    errors.extend(field_errors(key_{0}, e))'.format(i))
+        w('else:')
+        w('    data[key_{0}] = value'.format(i))
+        w.dedent()
+        if field.required:
+            w('else:')
+            w('    errors.append(FieldErrorInfo(key_{0}, f_{0}._required_message(key_{0})))'.format(i))
+
+    if cls.no_additional_keys:
+        w('')
+        w('for k in raw_data:')
+        w('    if k not in key_set:')
+        w('        errors.append(additional_key_error(k))')
+
+    for j, (key, field, hook) in enumerate(plan.field_hooks):
+        w('')
+        w('if hkey_{0} in data:'.format(j))
+        w.indent()
+        w('try:')
+        w('    value = fhook_{0}.__get__(self, cls)(data[hkey_{0}])'.format(j))
+        w('except ValueError as e:')
+        w('    errors.append(FieldErrorInfo(hkey_{0}, e))'.format(j))
+        w('else:')
+        w.indent()
+        if field.null is not True:
+            w('assert value is not None, (')
+            w("    'Forget to return value after validation?'")
+            w("    'Or this is caused by your explicitly returns'")
+            w("    'None, which is not allowed in the mechanism.')")
+        w('data[hkey_{0}] = value'.format(j))
+        w.dedent()
+        w.dedent()
+
+    for j in range(len(plan.cross_hooks)):
+        w('')
+        w('try:')
+        w('    chook_{0}.__get__(self, cls)()'.format(j))
+        w('except ValueError as e:')
+        w('    errors.append(FieldErrorInfo(None, e))')
+
+    w('')
+    w('if raise_if_invalid:')
+    w('    if errors:')
+    w('        raise InvalidParams(errors)')
+    w.dedent()
+
+    w('')
+    w('return validate')
+    return w.getvalue()
+
+
+def source_hash(cls):
+    """Hash of the generated source of `cls`.
+
+    Field attributes are read when the validator is built, everything else
+    the generated code depends on is in the source, so a validator
+    generated earlier is still valid as long as the hash is the same.
+    """
+    source = generate_source(cls)
+    return hashlib.sha1(source.encode('utf8')).hexdigest()
+
+
+def build_validator(cls, source=None):
+    """Compile the generated source and build the validate function of `cls`"""
+    if source is None:
+        source = generate_source(cls)
+    namespace = {
+        'FieldErrorInfo': FieldErrorInfo,
+        'InvalidParams': InvalidParams,
+        'field_errors': field_errors,
+        'not_dict_error': not_dict_error,
+        'additional_key_error': additional_key_error,
+    }
+    code = compile(source, '<params validator {}>'.format(cls.__name__), 'exec')
+    exec(code, namespace)
+    return namespace['build_validator'](cls)
+
+
+def compile_paramset(cls):
+    """Switch a ParamSet class to the generated validate function"""
+    cls._validator = build_validator(cls)
+    return cls
+
+
+def install(cls, expected_hash, builder):
+    """Install a validator generated ahead of time by `params.compile`.
+
+    If the schema of `cls` has changed since the validator was generated,
+    nothing is installed and `cls` keeps using `ParamSet.validate`.
+    """
+    if source_hash(cls) != expected_hash:
+        warnings.warn(
+            'schema of {}.{} has changed since its validator was generated, '
+            'fall back to ParamSet.validate'.format(cls.__module__, cls.__name__))
+        return False
+    cls._validator = builder(cls)
+    return True
@@ -0,0 +1,119 @@
+# coding: utf-8
+
+"""
+Compile the ParamSet classes of modules into validator modules.
+
+Usage::
+
+    python -m params.compile mypkg.schemas [mypkg.other_schemas ...]
+
+For each module, a plain python module (`mypkg/schemas_validators.py` by
+default) is written. Importing it installs the generated validators on the
+ParamSet classes of the schema module, without any `exec` at runtime.
+A class whose schema has changed since the module was generated keeps
+using `ParamSet.validate`.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import argparse
+import importlib
+from .core import ParamSet
+from .codegen import generate_source, source_hash
+
+__all__ = [
+    'find_paramsets',
+    'generate_module',
+    'compile_module',
+]
+
+
+HEADER = '''\
+# coding: utf-8
+# Generated by `python -m params.compile {module}`, DO NOT EDIT.
+# Run the command again after the ParamSet classes are changed.
+
+from params.core import (  # NOQA
+    FieldErrorInfo, InvalidParams, field_errors, not_dict_error, additional_key_error)
+from params.codegen import install
+import {module} as schemas
+'''
+
+
+def find_paramsets(module):
+    """Return (name, cls) of ParamSet classes in the module, including the
+    ones created by `define_params`. A class is named by its `__name__`,
+    aliases are ignored, classes of `define_params` are named by the first
+    attribute name in alphabetical order.
+    """
+    attrs = vars(module)
+    names = {}
+    for name, obj in sorted(attrs.items()):
+        if not isinstance(obj, type) or not issubclass(obj, ParamSet):
+            continue
+        if obj is ParamSet or obj in names:
+            continue
+        # classes imported from other modules are not compiled here,
+        # except those created by define_params
+        if obj.__module__ not in (module.__name__, ParamSet.__module__):
+            continue
+        if attrs.get(obj.__name__) is obj:
+            name = obj.__name__
+        names[obj] = name
+    return sorted(((name, obj) for obj, name in names.items()), key=lambda x: x[0])
+
+
+def generate_module(module):
+    """Generate the source of the validator module of `module`"""
+    chunks = [HEADER.format(module=module.__name__)]
+    for name, cls in find_paramsets(module):
+        builder_name = 'build_{}'.format(name)
+        chunks.append('')
+        chunks.append(generate_source(cls, name=builder_name))
+        chunks.append('install(schemas.{}, {!r}, {})\n'.format(
+            name, source_hash(cls), builder_name))
+    return '\n'.join(chunks)
+
+
+def default_output_path(module):
+    base, _ = os.path.splitext(module.__file__)
+    if os.path.basename(base) == '__init__':
+        base = os.path.dirname(base)
+    return base + '_validators.py'
+
+
+def compile_module(module_name, output=None):
+    """Write the validator module of `module_name`, return its path"""
+    module = importlib.import_module(module_name)
+    if output is None:
+        output = default_output_path(module)
+    source = generate_module(module)
+    with open(output, 'w') as f:
+        f.write(source)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m params.compile',
+        description='Generate validator modules for ParamSet classes')
+    parser.add_argument('modules', metavar='MODULE', nargs='+', help='module to compile')
+    parser.add_argument('-o', '--output', help='output file, only for a single module')
+    args = parser.parse_args(argv)
+
+    if args.output and len(args.modules) > 1:
+        parser.error('--output could only be used with a single module')
+
+    # make modules in the current directory importable, as `python -m` does
+    if '' not in sys.path and os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    for module_name in args.modules:
+        path = compile_module(module_name, output=args.output)
+        print('{} -> {}'.format(module_name, path))
+
+
+if __name__ == '__main__':
+    main()
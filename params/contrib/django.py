@@ -6,11 +6,29 @@ from __future__ import absolute_import
 import six
 import json
 from functools import wraps
+from .. import metrics
 from ..core import InvalidParams
+from ..utils import JSONArrayReader, is_coroutine_function
 from .base import get_params_cls, check_method
 
 
-def use_params(df, class_view=False, is_json=False, raise_if_invalid=True, is_list=False):
+def use_params(df, class_view=False, is_json=False, raise_if_invalid=True, is_list=False,
+               copy_raw=False, fail_fast=None, max_errors=None, stream=False, max_invalid=None):
+    """
+    stream, max_invalid, work on is_list: with `stream=True` the request body
+    is parsed incrementally and `request.params` is an iterator, each item is
+    validated when it's iterated, `max_invalid` stops the iteration after the
+    number of invalid items when `raise_if_invalid` is False.
+
+    When `params.metrics` is enabled, validations are labeled by the
+    qualified name of the view, items of `stream` are validated outside of
+    the view label.
+
+    copy_raw: raw data is built for each request (lists of QueryDict are
+    copied), so it's not copied again by default, values in
+    `request.params.data` may be the ones of raw data then, `validate_*`
+    methods must not change them in place.
+    """
     if is_json:
         convert_fields = False
     else:
@@ -19,36 +37,84 @@ def use_params(df, class_view=False, is_json=False, raise_if_invalid=True, is_li
     params_cls = get_params_cls(df)
     if is_list and not is_json:
         raise ValueError('is_json must be True when is_list is True')
+    if stream and not is_list:
+        raise ValueError('is_list must be True when stream is True')
+
+    # raw data is created by get_raw for each request, no need to copy it
+    params_kwargs = dict(convert_fields=convert_fields, raise_if_invalid=raise_if_invalid,
+                         copy_raw=copy_raw, fail_fast=fail_fast, max_errors=max_errors)
+
+    def check_list(raw):
+        if not isinstance(raw, list):
+            raise InvalidParams('request body must be of type list, got: {}'.format(type(raw)))
+        return raw
+
+    def build_params(raw):
+        if is_list:
+            return [params_cls(x, **params_kwargs) for x in check_list(raw)]
+        return params_cls(raw, **params_kwargs)
+
+    def iter_params(items):
+        invalid_num = 0
+        for x in items:
+            params = params_cls(x, **params_kwargs)
+            if params.errors:
+                invalid_num += 1
+                if max_invalid is not None and invalid_num >= max_invalid:
+                    raise InvalidParams('too many invalid items in request body: {}'.format(invalid_num))
+            yield params
+
+    def get_params(request):
+        if stream:
+            return iter_params(get_raw_stream(request))
+        return build_params(get_raw(request, is_json))
+
+    def aget_params(request):
+        from ..aio import avalidate_list
+        raw = get_raw(request, is_json)
+        if is_list:
+            return avalidate_list(params_cls, check_list(raw), **params_kwargs)
+        return params_cls.avalidate(raw, **params_kwargs)
+
+    def metrics_label(view):
+        return '{}.{}'.format(view.__module__, getattr(view, '__qualname__', view.__name__))
+
+    def wrap_coroutine_view(view, request_index):
+        # validate_* methods could be coroutine functions for coroutine views
+        from ..aio import wrap_view
+        if stream:
+            raise ValueError('stream could not be used with coroutine views')
+        return wrap_view(
+            view,
+            lambda *args, **kwargs: aget_params(args[request_index]),
+            lambda args, params: setattr(args[request_index], 'params', params))
 
     if class_view:
         def decorator(view_method):
             # For class view, we can check http method before view method is called
             check_method(view_method.__name__.upper(), is_json)
 
+            if is_coroutine_function(view_method):
+                return wrap_coroutine_view(view_method, 1)
+
+            label = metrics_label(view_method)
+
             @wraps(view_method)
             def func(self, request, *args, **kwargs):
-                raw = get_raw(request, is_json)
-                if is_list:
-                    if not isinstance(raw, list):
-                        raise InvalidParams('request body must be of type list, got: {}'.format(type(raw)))
-                    request.params = [params_cls(x, convert_fields=convert_fields, raise_if_invalid=raise_if_invalid) for x in raw]
-                else:
-                    request.params = params_cls(raw, convert_fields=convert_fields, raise_if_invalid=raise_if_invalid)
+                request.params = metrics.call_labeled(label, get_params, request)
                 return view_method(self, request, *args, **kwargs)
 
             return func
     else:
         def decorator(view_func):
+            if is_coroutine_function(view_func):
+                return wrap_coroutine_view(view_func, 0)
+
+            label = metrics_label(view_func)
 
             @wraps(view_func)
             def func(request, *args, **kwargs):
-                raw = get_raw(request, is_json)
-                if is_list:
-                    if not isinstance(raw, list):
-                        raise InvalidParams('request body must be of type list, got: {}'.format(type(raw)))
-                    request.params = [params_cls(x, convert_fields=convert_fields, raise_if_invalid=raise_if_invalid) for x in raw]
-                else:
-                    request.params = params_cls(raw, convert_fields=convert_fields, raise_if_invalid=raise_if_invalid)
+                request.params = metrics.call_labeled(label, get_params, request)
                 return view_func(request, *args, **kwargs)
 
             return func
@@ -56,8 +122,11 @@ def use_params(df, class_view=False, is_json=False, raise_if_invalid=True, is_li
     return decorator
 
 
-def use_params_class_view(df, is_json=False, raise_if_invalid=True, is_list=False):
-    return use_params(df, class_view=True, is_json=is_json, raise_if_invalid=raise_if_invalid, is_list=is_list)
+def use_params_class_view(df, is_json=False, raise_if_invalid=True, is_list=False, copy_raw=False,
+                          fail_fast=None, max_errors=None, stream=False, max_invalid=None):
+    return use_params(df, class_view=True, is_json=is_json, raise_if_invalid=raise_if_invalid, is_list=is_list,
+                      copy_raw=copy_raw, fail_fast=fail_fast, max_errors=max_errors, stream=stream,
+                      max_invalid=max_invalid)
 
 
 def get_raw(request, is_json=False):
@@ -86,7 +155,8 @@ def get_raw(request, is_json=False):
             if len(v) == 1:
                 raw[k] = v[0]
             else:
-                raw[k] = v
+                # the lists of QueryDict are its internal ones
+                raw[k] = list(v)
     return raw
 
 
@@ -96,3 +166,27 @@ def _get_json(request):
     except Exception as e:
         raise InvalidParams('Could not parse body as json: {}'.format(e))
     return raw
+
+
+def get_raw_stream(request):
+    """Return an iterator of the items of the JSON array in request body,
+    which is read from the request stream incrementally.
+    """
+    check_method(request.method, True)
+    try:
+        reader = JSONArrayReader(request)
+    except ValueError as e:
+        raise InvalidParams('Could not parse body as json: {}'.format(e))
+    return _iter_reader(reader)
+
+
+def _iter_reader(reader):
+    items = iter(reader)
+    while True:
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        except ValueError as e:
+            raise InvalidParams('Could not parse body as json: {}'.format(e))
+        yield item
@@ -4,14 +4,35 @@
 from __future__ import absolute_import
 
 from functools import wraps
-from ..utils import json_decode, to_unicode
+import tornado
+from tornado import gen
+from tornado.ioloop import IOLoop
+from tornado.concurrent import is_future
+from ..utils import json_decode, to_unicode, is_coroutine_function
+from .. import metrics
 from ..core import InvalidParams
 from .base import get_params_cls, check_method
 
 
-def use_params(df, is_json=False, raise_if_invalid=True):
+def use_params(df, is_json=False, raise_if_invalid=True, copy_raw=False, fail_fast=None, max_errors=None,
+               executor=None, offload_size=64 * 1024):
+    """
+    executor, offload_size: if `executor` (a `concurrent.futures` executor)
+    is given, requests whose body is at least `offload_size` bytes are
+    validated in the executor, JSON body is decoded there as well, so that
+    the IOLoop is not blocked, smaller requests are validated inline. The view
+    method is turned into a coroutine. For a ProcessPoolExecutor, the ParamSet
+    class must be defined at module level so that it could be pickled, only
+    validated data and errors are sent back, raw data of the ParamSet is
+    released. `executor` requires Tornado 5.0 or later.
+
+    When `params.metrics` is enabled, validations are labeled by the
+    qualified name of the handler method, validations in the executor or
+    of coroutine methods are not recorded.
+    """
     # if it's json, do not convert, for json is type specified.
     # if not json, which means it's urlencode, then convert is needed.
+    # raw data is created by get_raw for each request, no need to copy it
     if is_json:
         convert_fields = False
     else:
@@ -19,13 +40,67 @@ def use_params(df, is_json=False, raise_if_invalid=True):
 
     params_cls = get_params_cls(df)
 
+    params_kwargs = dict(convert_fields=convert_fields, raise_if_invalid=raise_if_invalid,
+                         copy_raw=copy_raw, fail_fast=fail_fast, max_errors=max_errors)
+
+    if executor is not None and params_cls._plan.has_async_hooks:
+        raise ValueError('executor could not be used with async validate_* methods')
+    if executor is not None and tornado.version_info < (5, 0):
+        raise ValueError('executor requires tornado>=5.0, got {}'.format(tornado.version))
+    worker = _validate_raw
+    if executor is not None:
+        from concurrent.futures import ProcessPoolExecutor
+        if isinstance(executor, ProcessPoolExecutor):
+            worker = _validate_raw_data
+
+    def should_offload(hdr):
+        return executor is not None and len(hdr.request.body) >= offload_size
+
+    @gen.coroutine
+    def offload(hdr, http_method):
+        # tornado has parsed the arguments already, only json is decoded in executor
+        raw = hdr.request.body if is_json else get_raw(hdr, http_method, False)
+        params = yield IOLoop.current().run_in_executor(
+            executor, worker, params_cls, raw, is_json, params_kwargs)
+        if isinstance(params, tuple):
+            params = _rebuild_params(params_cls, *params)
+        raise gen.Return(params)
+
     def decorator(view_method):
         http_method = check_method(view_method.__name__.upper(), is_json)
+        label = '{}.{}'.format(view_method.__module__, getattr(view_method, '__qualname__', view_method.__name__))
+
+        if is_coroutine_function(view_method):
+            # validate_* methods could be coroutine functions for coroutine views
+            from ..aio import wrap_view
+
+            def get_params(hdr, *args, **kwargs):
+                if should_offload(hdr):
+                    return offload(hdr, http_method)
+                return params_cls.avalidate(get_raw(hdr, http_method, is_json), **params_kwargs)
+
+            return wrap_view(view_method, get_params, lambda args, params: setattr(args[0], 'params', params))
+
+        if executor is not None:
+            @gen.coroutine
+            @wraps(view_method)
+            def coroutine_func(self, *args, **kwargs):
+                if should_offload(self):
+                    self.params = yield offload(self, http_method)
+                else:
+                    self.params = metrics.call_labeled(
+                        label, params_cls, get_raw(self, http_method, is_json), **params_kwargs)
+                result = view_method(self, *args, **kwargs)
+                if is_future(result):
+                    result = yield result
+                raise gen.Return(result)
+
+            return coroutine_func
 
         @wraps(view_method)
         def func(self, *args, **kwargs):
             raw = get_raw(self, http_method, is_json)
-            self.params = params_cls(raw, convert_fields=convert_fields, raise_if_invalid=raise_if_invalid)
+            self.params = metrics.call_labeled(label, params_cls, raw, **params_kwargs)
             return view_method(self, *args, **kwargs)
 
         return func
@@ -48,12 +123,40 @@ def use_raw(is_json=False):
     return decorator
 
 
+def _decode_body(body):
+    try:
+        return json_decode(body)
+    except Exception as e:
+        raise InvalidParams('JSON decode failed: %s' % e)
+
+
+def _validate_raw(params_cls, raw, is_json, params_kwargs):
+    """Run in executor, `raw` is the request body if `is_json`"""
+    if is_json:
+        raw = _decode_body(raw)
+    return params_cls(raw, **params_kwargs)
+
+
+def _validate_raw_data(params_cls, raw, is_json, params_kwargs):
+    """Run in process pool, return `(data, errors, convert_fields)` instead
+    of the ParamSet, which would be pickled with its raw data.
+    """
+    params = _validate_raw(params_cls, raw, is_json, params_kwargs)
+    return params.data, params.errors, params.convert_fields
+
+
+def _rebuild_params(params_cls, data, errors, convert_fields):
+    params = params_cls.__new__(params_cls)
+    params._prepare({}, convert_fields=convert_fields, copy_raw=False, lazy=False)
+    params.data = data
+    params.errors = errors
+    params.release_raw()
+    return params
+
+
 def get_raw(hdr, http_method, is_json):
     if is_json:
-        try:
-            raw = json_decode(hdr.request.body)
-        except Exception as e:
-            raise InvalidParams('JSON decode failed: %s' % e)
+        raw = _decode_body(hdr.request.body)
     else:
         raw = {}
         # format arguments
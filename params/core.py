@@ -1,14 +1,23 @@
 # coding: utf-8
 
 import copy
+import time
+import itertools
+from collections import namedtuple
+import six
 from six import with_metaclass
-from .utils import unicode_copy, to_unicode, basestring_type
+from .utils import unicode_copy, to_unicode, basestring_type, iter_json_lines, is_coroutine_function, LRUCache
 from .compat import PY2, unicode_ as u_
 
 __all__ = [
     'InvalidParams',
+    'NestedErrors',
+    'ErrorMessage',
+    'Result',
     'Field',
     'ParamSet',
+    'ParamRecord',
+    'BatchResult',
     'define_params',
 ]
 
@@ -16,13 +25,157 @@ __all__ = [
 default_null_values = ('', u_(''), None, )
 
 
+class _Truncated(object):
+    """A long container in a message, only the first items are rendered"""
+    __slots__ = ('value', 'max_items')
+
+    _brackets = {list: '[]', tuple: '()'}
+
+    def __init__(self, value, max_items):
+        self.value = value
+        self.max_items = max_items
+
+    def __repr__(self):
+        value = self.value
+        if isinstance(value, dict):
+            items = ['{!r}: {!r}'.format(k, v) for k, v in itertools.islice(six.iteritems(value), self.max_items)]
+        else:
+            items = [repr(i) for i in itertools.islice(value, self.max_items)]
+        brackets = self._brackets.get(type(value), '{}')
+        return '{}{}, ...{}'.format(brackets[0], ', '.join(items), brackets[1])
+
+    __str__ = __repr__
+
+
+def _truncate(value, max_length, max_items):
+    if isinstance(value, six.text_type):
+        if len(value) > max_length:
+            return value[:max_length] + u_('...')
+    elif isinstance(value, bytes):
+        if len(value) > max_length:
+            return value[:max_length] + b'...'
+    elif isinstance(value, (list, tuple, set, frozenset, dict)):
+        if len(value) > max_items:
+            return _Truncated(value, max_items)
+    return value
+
+
+_json_types = six.integer_types + (float, bool, type(None))
+
+
+class ErrorMessage(object):
+    """Message of a validation error, `code` is a machine readable name like
+    'required' or 'max', `params` are the values referenced by `template`.
+
+    The message is only rendered when it's needed, e.g. by str(InvalidParams),
+    long strings and containers in params are truncated when rendered.
+    """
+    __slots__ = ('code', 'template', 'params')
+
+    # max length of strings and max number of items of containers in messages
+    max_length = 200
+    max_items = 20
+
+    def __init__(self, code, template, **params):
+        self.code = code
+        self.template = template
+        self.params = params
+
+    def render(self):
+        max_length, max_items = self.max_length, self.max_items
+        params = dict((k, _truncate(v, max_length, max_items)) for k, v in self.params.items())
+        return self.template.format(**params)
+
+    def with_text(self, text):
+        """Return a copy which is rendered as `text`, e.g. the description
+        of a field, the code and params are kept.
+        """
+        template = text.replace('{', '{{').replace('}', '}}')
+        return self.__class__(self.code, template, **self.params)
+
+    def json_params(self):
+        """Params that could be serialized to JSON, other values are rendered
+        as (truncated) strings.
+        """
+        d = {}
+        for k, v in self.params.items():
+            if isinstance(v, ErrorMessage):
+                v = {'code': v.code, 'params': v.json_params()}
+            elif not isinstance(v, _json_types):
+                v = u_('{}').format(_truncate(v, self.max_length, self.max_items))
+                if len(v) > self.max_length:
+                    v = v[:self.max_length] + u_('...')
+            d[k] = v
+        return d
+
+    def __unicode__(self):
+        return u_(self.render())
+
+    if PY2:
+        def __str__(self):
+            return self.__unicode__().encode('utf8')
+    else:
+        def __str__(self):
+            return self.render()
+
+    def __repr__(self):
+        return 'ErrorMessage(code={!r} template={!r})'.format(self.code, self.template)
+
+
+def error_message(error):
+    """Return the message of an exception raised in validation, which is kept
+    as is if it's an ErrorMessage, so that it's rendered only when needed.
+    """
+    args = error.args
+    if len(args) == 1 and isinstance(args[0], ErrorMessage):
+        return args[0]
+    return str(error)
+
+
 class FieldErrorInfo(object):
-    key = None
-    message = None
+    __slots__ = ('key', '_message')
 
     def __init__(self, key, message):
+        """message is a string, an ErrorMessage, or an exception raised in
+        validation, of which the message is taken.
+        """
         self.key = key
-        self.message = message
+        if isinstance(message, Exception):
+            # same as error_message(message), inlined for it's called for each error
+            args = message.args
+            if len(args) == 1 and isinstance(args[0], ErrorMessage):
+                message = args[0]
+            else:
+                message = str(message)
+        self._message = message
+
+    @property
+    def message(self):
+        message = self._message
+        if isinstance(message, ErrorMessage):
+            return message.render()
+        return message
+
+    @property
+    def code(self):
+        message = self._message
+        if isinstance(message, ErrorMessage):
+            return message.code
+        return None
+
+    def to_payload(self, messages=False):
+        """Return a dict of the error that could be serialized to JSON, with
+        key, code and params, messages are only included if `messages` is
+        True or the error has no code.
+        """
+        message = self._message
+        if isinstance(message, ErrorMessage):
+            d = {'key': self.key, 'code': message.code, 'params': message.json_params()}
+            if messages:
+                d['message'] = message.render()
+        else:
+            d = {'key': self.key, 'code': None, 'params': {}, 'message': message}
+        return d
 
     def __unicode__(self):
         if self.key:
@@ -64,6 +217,38 @@ class InvalidParams(Exception):
         else:
             return u_('\n').join(e.__unicode__() for e in self.errors)
 
+    def __reduce__(self):
+        # make it picklable, for it could be raised in other processes
+        return (self.__class__, (self.errors, ))
+
+    def to_payload(self, messages=False):
+        """Return the errors as a list of dicts that could be serialized to
+        JSON, see `FieldErrorInfo.to_payload`.
+        """
+        return [e.to_payload(messages) for e in self.errors]
+
+    if PY2:
+        def __str__(self):
+            return self.__unicode__().encode('utf8')
+    else:
+        def __str__(self):
+            return self.__unicode__()
+
+
+class NestedErrors(ValueError):
+    """Raised by fields of nested values, `errors` is a list of FieldErrorInfo
+    whose keys are paths relative to the field, like `[3].zip` or `name`.
+    """
+    def __init__(self, errors):
+        super(NestedErrors, self).__init__(errors)
+        self.errors = errors
+
+    def __unicode__(self):
+        return u_('\n').join(e.__unicode__() for e in self.errors)
+
+    def __reduce__(self):
+        return (self.__class__, (self.errors, ))
+
     if PY2:
         def __str__(self):
             return self.__unicode__().encode('utf8')
@@ -72,6 +257,86 @@ class InvalidParams(Exception):
             return self.__unicode__()
 
 
+def join_path(key, path):
+    """Join the key of a field and a path in its value, `path` may start
+    with an index like `[3]`.
+    """
+    if path is None:
+        return key
+    if key is None or path.startswith('['):
+        return u_('{}{}').format(key or '', path)
+    return u_('{}.{}').format(key, path)
+
+
+def field_errors(key, error):
+    """Return the list of FieldErrorInfo of an error raised by a field"""
+    if isinstance(error, NestedErrors):
+        return [FieldErrorInfo(join_path(key, i.key), i._message) for i in error.errors]
+    return [FieldErrorInfo(key, error)]
+
+
+def not_dict_error():
+    return InvalidParams([FieldErrorInfo(None, ErrorMessage('not_dict', 'params data is not a dict'))])
+
+
+def additional_key_error(key):
+    return FieldErrorInfo(key, ErrorMessage('additional_key', 'additional key {key} is not allowed', key=key))
+
+
+def _owner(cls, name):
+    """Return the class in the MRO of `cls` which defines `name`"""
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return klass
+    return None
+
+
+def _build_check_plan(cls):
+    """Return the `_check_*` names of the extra validation methods of a
+    Field subclass, or None if any `_validate_*` method (or `validate`) is
+    not defined by the same class as its `_check_*` counterpart.
+    """
+    if _owner(cls, 'validate') is not _owner(cls, 'check'):
+        return None
+    for name in dir(cls):
+        if name.startswith('_validate_'):
+            if _owner(cls, name) is not _owner(cls, '_check_' + name[len('_validate_'):]):
+                return None
+
+    extras = []
+    for name in cls.extra_validation_methods:
+        if not name.startswith('_validate_'):
+            return None
+        extras.append('_check_' + name[len('_validate_'):])
+    return tuple(extras)
+
+
+class Result(namedtuple('Result', ['ok', 'params', 'errors'])):
+    """Result of `ParamSet.try_validate`, true if the data is valid"""
+    __slots__ = ()
+
+    def __bool__(self):
+        return self.ok
+
+    __nonzero__ = __bool__
+
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+# containers of values in which 1, 1.0 and True are not distinguished
+_uncacheable_types = (tuple, frozenset, list, dict, set)
+
+_missing = object()
+
+
+class _CachedError(object):
+    """Error of a value in Field.cache"""
+    __slots__ = ('error', )
+
+    def __init__(self, error):
+        self.error = error
+
+
 class Field(object):
     name = None
     value_type = None
@@ -81,11 +346,16 @@ class Field(object):
             self, description=None,
             null=True, choices=None,
             key=None, required=False, default=None, force_convert=False,
-            null_values=default_null_values,
+            null_values=default_null_values, cache=None,
     ):
         """
-        null, choices, work on Field.validate
+        null, choices, cache, work on Field.validate
         key, required, default, work on ParamSet.validate
+
+        cache memoizes the results of Field.validate by hashable value:
+        True for an LRUCache of default size, an int for the max size, or a
+        callable that returns an object with `get` and `set` like LRUCache.
+        Only use it when the validated values are immutable.
         """
         self.description = description  # default message
         self.null = null
@@ -101,26 +371,69 @@ class Field(object):
                 raise TypeError('default value should be of type {}'.format(self.value_type))
         self.default = default
         self.force_convert = force_convert
+        self.cache_option = cache
+        self.cache = self._make_cache(cache)
+
+    @staticmethod
+    def _make_cache(cache):
+        if cache is None or cache is False:
+            return None
+        if cache is True:
+            return LRUCache()
+        if isinstance(cache, int):
+            return LRUCache(cache)
+        if callable(cache):
+            return cache()
+        raise TypeError('cache must be bool, int or callable, got {!r}'.format(cache))
 
     # @property
     # def name(self):
     #     raise NotImplementedError
 
     def format_exc(self, error_message=None, error_class=ValueError):
+        """error_message could be an ErrorMessage, the description of the
+        field replaces its text, the code is kept.
+        """
+        if isinstance(error_message, ErrorMessage):
+            return error_class(self._describe(error_message))
         return error_class(self.description or error_message)
 
-    def _validate_choices(self, value):
+    def _describe(self, message):
+        if self.description:
+            return message.with_text(self.description)
+        return message
+
+    def _required_message(self, key):
+        return self._describe(ErrorMessage('required', '{key} is required', key=key))
+
+    def _check_choices(self, value):
         if value not in self.choices:
-            raise self.format_exc(
-                'value "%s" is not one of %s' % (value, self.choices))
+            return self.format_exc(ErrorMessage(
+                'choices', 'value "{value}" is not one of {choices}', value=value, choices=self.choices))
+        return None
+
+    def _validate_choices(self, value):
+        error = self._check_choices(value)
+        if error is not None:
+            raise error
+
+    def _type_error(self, value):
+        return TypeError(ErrorMessage('type', '{value} is not of type {type}', value=value, type=self.value_type))
+
+    def _check_type(self, value):
+        if self.value_type is not None and not isinstance(value, self.value_type):
+            return self._type_error(value)
+        return None
 
     def _validate_type(self, value):
-        """Override this method to implement type specified validation"""
+        """Override this method to implement type specified validation,
+        and `_check_type` as well to keep `check` free of exceptions.
+        """
         if self.value_type is None:
             return
 
         if not isinstance(value, self.value_type):
-            raise TypeError('{} is not of type {}'.format(value, self.value_type))
+            raise self._type_error(value)
 
     def _convert_type(self, value):
         """Override this method to implement type specified conversion"""
@@ -147,18 +460,145 @@ class Field(object):
         if success:
             return conv_value
         else:
-            raise TypeError('could not convert {} to type {}: {}'.format(value, self.value_type, error))
+            raise TypeError(ErrorMessage(
+                'convert', 'could not convert {value} to type {type}: {error}',
+                value=value, type=self.value_type, error=error))
 
     def is_null(self, value):
         return value in self.null_values
 
     def validate(self, value, convert=False):
+        cache = self.cache
+        if cache is None or isinstance(value, _uncacheable_types):
+            return self._validate_value(value, convert)
+
+        # type is in the key so that 1, 1.0 and True are not mixed up
+        cache_key = (type(value), value, bool(convert))
+        try:
+            result = cache.get(cache_key, _missing)
+        except TypeError:
+            # unhashable value
+            return self._validate_value(value, convert)
+
+        if result is _missing:
+            try:
+                result = self._validate_value(value, convert)
+            except (TypeError, ValueError) as e:
+                cache.set(cache_key, _CachedError(e))
+                raise
+            cache.set(cache_key, result)
+        elif isinstance(result, _CachedError):
+            # raise a copy, the traceback of a raised exception grows
+            raise copy.copy(result.error)
+        return result
+
+    def check(self, value, convert=False):
+        """Validate without raising, return `(True, value)` or `(False, error)`,
+        error is an ErrorMessage, a string, or NestedErrors of nested values.
+
+        Built-in fields return the errors of their `_check_*` methods instead
+        of raising them. Each `_validate_*` method has a `_check_*`
+        counterpart, which returns the error (an exception instance) or None,
+        a class that overrides a `_validate_*` method without its counterpart
+        (or `validate`) falls back to calling `validate`, and so does a field
+        with cache. Type conversion may still raise internally.
+        """
+        cls = type(self)
+        # looked up in __dict__, subclasses have their own plans
+        extras = cls.__dict__.get('_check_plan', _missing)
+        if extras is _missing:
+            extras = _build_check_plan(cls)
+            cls._check_plan = extras
+
+        if extras is not None and self.cache is None:
+            return self._check_value(value, convert, extras)
+
+        try:
+            return True, self.validate(value, convert=convert)
+        except NestedErrors as e:
+            return False, e
+        except (TypeError, ValueError) as e:
+            return False, error_message(e)
+
+    def _check_value(self, value, convert, extras):
+        """Same as `_validate_value` without raising, see `check`,
+        `extras` are the `_check_*` names of extra validation methods.
+        """
+        if self.is_null(value):
+            if self.null:
+                return True, None
+            return False, self._null_message(value)
+
+        if convert or self.force_convert:
+            try:
+                value = self._convert_type(value)
+            except (TypeError, ValueError) as e:
+                return False, error_message(e)
+
+        error = self._check_type(value)
+        if error is None and self.choices:
+            error = self._check_choices(value)
+        if error is None:
+            for name in extras:
+                error = getattr(self, name)(value)
+                if error is not None:
+                    break
+        if error is not None:
+            return False, error_message(error)
+        return True, value
+
+    def _traced_validate(self, value, convert, on_step):
+        """Same as `validate`, `on_step((step, elapsed))` is called after
+        each step: null, convert, type, choices and the name of each extra
+        validation method without `_validate_`. A class that overrides
+        validation (see `check`) or a field with cache has a single
+        'validate' step.
+        """
+        cls = type(self)
+        extras = cls.__dict__.get('_check_plan', _missing)
+        if extras is _missing:
+            extras = _build_check_plan(cls)
+            cls._check_plan = extras
+
+        if extras is None or self.cache is not None:
+            return self._timed_step(on_step, 'validate', self.validate, value, convert)
+
+        start = _timer()
+        try:
+            if self.is_null(value):
+                if self.null:
+                    return None
+                raise ValueError(self._null_message(value))
+        finally:
+            on_step(('null', _timer() - start))
+
+        if convert or self.force_convert:
+            value = self._timed_step(on_step, 'convert', self._convert_type, value)
+        self._timed_step(on_step, 'type', self._validate_type, value)
+        if self.choices:
+            self._timed_step(on_step, 'choices', self._validate_choices, value)
+        for method_name in self.extra_validation_methods:
+            self._timed_step(on_step, method_name[len('_validate_'):], getattr(self, method_name), value)
+        return value
+
+    @staticmethod
+    def _timed_step(on_step, name, func, *args):
+        start = _timer()
+        try:
+            return func(*args)
+        finally:
+            on_step((name, _timer() - start))
+
+    def _null_message(self, value):
+        return self._describe(ErrorMessage('null', 'empty value {value!r} is not allowed', value=value))
+
+    def _validate_value(self, value, convert=False):
         if self.is_null(value):
             # If null is allowed, skip other validates
             if self.null:
                 return None
             else:
-                raise self.format_exc('empty value {!r} is not allowed'.format(value))
+                raise ValueError(self._null_message(value))
 
         if convert or self.force_convert:
             value = self._convert_type(value)
@@ -175,6 +615,9 @@ class Field(object):
         return value
 
     def __get__(self, owner, cls):
+        pending = owner._pending
+        if pending and self.key in pending:
+            return owner._resolve(self.key)
         return owner.data.get(self.key, self.default)
 
     def __set__(self, owner, value):
@@ -184,12 +627,102 @@ class Field(object):
         new = copy.copy(self)
         # set key to None and init key by each field
         new.key = None
+        cache_option = kwargs.pop('cache', self.cache_option)
         new.__dict__.update(kwargs)
+        # options may have been changed, so the cache is never shared
+        new.cache_option = cache_option
+        new.cache = new._make_cache(cache_option)
         # for k, v in kwargs.iteritems():
         #     setattr(new, k, v)
         return new
 
 
+ParamSetPlan = namedtuple('ParamSetPlan', [
+    # ((key, field), ...) in field definition order
+    'fields',
+    # (key, ...) in field definition order
+    'keys',
+    # frozenset of keys, for fast membership test
+    'key_set',
+    # ((key, field, hook), ...), `validate_<field name>` methods, hooks are
+    # the attributes found in the MRO (functions, staticmethods or
+    # classmethods), bound to the instance by `hook.__get__` for each call
+    'field_hooks',
+    # (hook, ...), other `validate_*` methods
+    'cross_hooks',
+    # True if any hook is a coroutine function, see `ParamSet.avalidate`
+    'has_async_hooks',
+])
+
+
+def build_plan(cls):
+    """Build the validation plan of a ParamSet class, all reflection
+    (field keys, `validate_*` methods lookup) is done here so that
+    ParamSet.validate only needs to run the plan.
+    """
+    fields = tuple((f.key, f) for f in cls._fields.values())
+    keys = tuple(key for key, _ in fields)
+
+    field_hooks = []
+    cross_hooks = []
+    # dir() is sorted, hooks run in the same order as they used to
+    for attr_name in dir(cls):
+        if not attr_name.startswith('validate_'):
+            continue
+        hook = _class_attr(cls, attr_name)
+        field_name = attr_name[len('validate_'):]
+        if field_name in cls._fields:
+            field = cls._fields[field_name]
+            field_hooks.append((field.key, field, hook))
+        else:
+            cross_hooks.append(hook)
+
+    hooks = [hook for _, _, hook in field_hooks] + cross_hooks
+    return ParamSetPlan(
+        fields=fields,
+        keys=keys,
+        key_set=frozenset(keys),
+        field_hooks=tuple(field_hooks),
+        cross_hooks=tuple(cross_hooks),
+        has_async_hooks=any(is_coroutine_function(hook.__get__(None, cls)) for hook in hooks),
+    )
+
+
+def _class_attr(cls, name):
+    """Return the attribute `name` of `cls` from the MRO without binding it"""
+    for base in cls.__mro__:
+        if name in base.__dict__:
+            return base.__dict__[name]
+    raise AttributeError(name)
+
+
+class _ErrorLimitReached(Exception):
+    """Raised to stop validation when `fail_fast` or `max_errors` is reached"""
+
+
+# Replaces `ParamSet.validate` when metrics are enabled, see `params.metrics`
+_metrics_hook = None
+
+# Class options of ParamSet, which could be used as field names as well,
+# the value of each option is kept in the `_<option>` attribute
+_class_options = ('compiled', 'copy_raw', 'lazy', 'fail_fast', 'max_errors', 'hook_timeout')
+
+# Attributes of ParamSet which could not be used as field names, set
+# once ParamSet is defined
+_reserved_names = frozenset()
+
+
+def _class_option(cls, name):
+    """Return the class option `name` from the MRO, skipping fields of
+    the same name.
+    """
+    for base in cls.__mro__:
+        value = base.__dict__.get(name)
+        if name in base.__dict__ and not isinstance(value, Field):
+            return value
+    return None
+
+
 class ParamSetMeta(type):
     def __new__(cls, name, bases, attrs):
         fields = {}
@@ -200,95 +733,443 @@ class ParamSetMeta(type):
                 fields.update(base._fields)
 
         for k, v in attrs.items():
-            # TODO Assert not reserved attribute name
             if isinstance(v, Field):
+                if k in _reserved_names:
+                    raise TypeError('{!r} is reserved by ParamSet, could not be used as a field name'.format(k))
                 v.name = k
                 if not v.key:
                     v.key = k
                 fields[k] = v
         attrs['_fields'] = fields
-        return type.__new__(cls, name, bases, attrs)
+        new_cls = type.__new__(cls, name, bases, attrs)
+        # Built for every class, subclasses get their own plan
+        # with inherited fields and hooks
+        new_cls._plan = build_plan(new_cls)
+        for option in _class_options:
+            setattr(new_cls, '_' + option, _class_option(new_cls, option))
+
+        # Never inherit the generated validator, it's specialized for
+        # the fields of exactly one class
+        new_cls._validator = None
+        new_cls._record_class = None
+        if new_cls._compiled:
+            from .codegen import compile_paramset
+            compile_paramset(new_cls)
+        return new_cls
 
 
 class ParamSet(with_metaclass(ParamSetMeta, object)):
     convert_fields = False
     no_additional_keys = False
+    # Use a generated validate function specialized for this class,
+    # see `params.codegen`
+    compiled = False
+    # Deep copy raw data before validation. Fields never change raw data,
+    # set to False to use the caller's structure as-is if it's not shared
+    # with other code, `validate_*` methods must not change values in place
+    # then. On Python 2 raw data is always copied to convert str to unicode.
+    copy_raw = True
+    # Only check required and additional keys in validate, each field is
+    # validated when it's accessed for the first time, see `finalize`
+    lazy = False
+    # Stop validation at the first error
+    fail_fast = False
+    # Stop validation after the number of errors is reached
+    max_errors = None
+    # Timeout in seconds of coroutine `validate_*` methods, see `avalidate`
+    hook_timeout = None
+
+    # {key: field} of fields not validated yet in lazy mode, invalid
+    # fields stay in it, so that they raise on every access
+    _pending = None
+    # {key: errors} of invalid fields in lazy mode
+    _failed = None
 
     @classmethod
     def keys(cls):
-        return [i.key for i in cls._fields.values()]
+        return list(cls._plan.keys)
 
-    def __init__(self, raw_data, raise_if_invalid=True, convert_fields=False):
-        self._raw_data = unicode_copy(raw_data)
+    def __init__(self, raw_data, raise_if_invalid=True, convert_fields=False, copy_raw=None, lazy=None,
+                 fail_fast=None, max_errors=None):
+        self._prepare(raw_data, convert_fields=convert_fields, copy_raw=copy_raw, lazy=lazy,
+                      fail_fast=fail_fast, max_errors=max_errors)
+        self.validate(raise_if_invalid=raise_if_invalid)
+
+    def _prepare(self, raw_data, convert_fields=False, copy_raw=None, lazy=None, fail_fast=None, max_errors=None):
+        if copy_raw is None:
+            copy_raw = self._copy_raw
+        if copy_raw or PY2:
+            raw_data = unicode_copy(raw_data)
+        self._raw_data = raw_data
         self.data = {}
         self.errors = []
         self.convert_fields = convert_fields
-
-        self.validate(raise_if_invalid=raise_if_invalid)
+        if lazy is not None:
+            self._lazy = lazy
+        if fail_fast is not None:
+            self._fail_fast = fail_fast
+        if max_errors is not None:
+            self._max_errors = max_errors
 
     def validate(self, raise_if_invalid=True):
-        if not isinstance(self._raw_data, dict):
-            raise InvalidParams('params data is not a dict')
+        if self._plan.has_async_hooks:
+            raise TypeError('{} has async validate_* methods, use avalidate instead'.format(
+                self.__class__.__name__))
+
+        if self._lazy:
+            return self._validate_keys(raise_if_invalid)
+
+        if _metrics_hook is not None:
+            return _metrics_hook(self, raise_if_invalid)
+        return self._validate_plan(raise_if_invalid)
+
+    def _validate_plan(self, raise_if_invalid=True, tracer=None):
+        """Run the plan, or the generated validator if there is one, which
+        is not used with a `tracer` (see `params.metrics`) since fields and
+        hooks are called through the tracer.
+        """
+        limit = self._error_limit()
+        if self._validator is not None and limit is None and tracer is None:
+            return self._validator(raise_if_invalid)
+
+        try:
+            self._validate_fields(limit, tracer)
+            self._run_hooks(limit, tracer)
+        except _ErrorLimitReached:
+            pass
+
+        if raise_if_invalid:
+            if self.errors:
+                raise InvalidParams(self.errors)
+
+    def _run_hooks(self, limit=None, tracer=None):
+        cls = self.__class__
+        # first loop, validate each field independently
+        for key, field, hook in self._plan.field_hooks:
+            if key in self.data:
+                try:
+                    if tracer is None:
+                        value = hook.__get__(self, cls)(self.data[key])
+                    else:
+                        value = tracer.run_hook(hook.__get__(self, cls), self.data[key])
+                except ValueError as e:
+                    self._add_error(FieldErrorInfo(key, e), limit)
+                else:
+                    self._set_hook_value(key, field, value)
+
+        # second loop, validate logic functions
+        for hook in self._plan.cross_hooks:
+            try:
+                if tracer is None:
+                    hook.__get__(self, cls)()
+                else:
+                    tracer.run_hook(hook.__get__(self, cls))
+            except ValueError as e:
+                self._add_error(FieldErrorInfo(None, e), limit)
+
+    @classmethod
+    def try_validate(cls, raw_data, convert_fields=False, copy_raw=None, fail_fast=None, max_errors=None):
+        """Validate raw data without raising InvalidParams, return a Result
+        of `(ok, params, errors)`, `params` is the ParamSet instance even if
+        the data is invalid.
+
+        Fields are validated by `Field.check`, so that invalid values of
+        built-in fields don't raise exceptions, `validate_*` methods still
+        signal errors by raising ValueError.
+        """
+        if cls._plan.has_async_hooks:
+            raise TypeError('{} has async validate_* methods, use avalidate instead'.format(cls.__name__))
+
+        params = cls.__new__(cls)
+        params._prepare(raw_data, convert_fields=convert_fields, copy_raw=copy_raw, lazy=False,
+                        fail_fast=fail_fast, max_errors=max_errors)
+        limit = params._error_limit()
+        try:
+            if params._check_fields(limit):
+                params._run_hooks(limit)
+        except _ErrorLimitReached:
+            pass
+        return Result(not params.errors, params, params.errors)
+
+    def _check_fields(self, limit=None):
+        """Same as `_validate_fields` with `Field.check`, return False if
+        raw data is not a dict.
+        """
+        raw_data = self._raw_data
+        if not isinstance(raw_data, dict):
+            self.errors.extend(not_dict_error().errors)
+            return False
+
+        data = self.data
+        convert = self.convert_fields
+        check_additional_keys = self.no_additional_keys
 
-        field_keys = []
-        for name, field in self.__class__._fields.items():
-            key = field.key
-            field_keys.append(key)
-            if key in self._raw_data:
+        if limit is not None and check_additional_keys:
+            check_additional_keys = False
+            self._validate_additional_keys(limit)
 
-                value = self._raw_data[key]
+        for key, field in self._plan.fields:
+            if key in raw_data:
+                ok, value = field.check(raw_data[key], convert=convert)
+                if ok:
+                    data[key] = value
+                elif isinstance(value, NestedErrors):
+                    for error in field_errors(key, value):
+                        self._add_error(error, limit)
+                else:
+                    self._add_error(FieldErrorInfo(key, value), limit)
+            elif field.required:
+                self._add_error(FieldErrorInfo(key, field._required_message(key)), limit)
+
+        if check_additional_keys:
+            self._validate_additional_keys(limit)
+        return True
+
+    @classmethod
+    def avalidate(cls, raw_data, raise_if_invalid=True, **kwargs):
+        """Coroutine version of validation, `validate_*` methods could be
+        coroutine functions, return the ParamSet instance.
 
+        Usage: `params = await UserParams.avalidate(raw_data)`,
+        see `params.aio` for more details.
+        """
+        from .aio import avalidate
+        return avalidate(cls, raw_data, raise_if_invalid=raise_if_invalid, **kwargs)
+
+    def _error_limit(self):
+        return 1 if self._fail_fast else self._max_errors
+
+    def _validate_fields(self, limit=None, tracer=None):
+        """Validate each field and the keys of raw data, without hooks,
+        fields are validated by `tracer.validate_field` if a tracer is given.
+        """
+        raw_data = self._raw_data
+        if not isinstance(raw_data, dict):
+            raise not_dict_error()
+
+        data = self.data
+        convert = self.convert_fields
+        check_additional_keys = self.no_additional_keys
+
+        if limit is not None and check_additional_keys:
+            # reject unknown keys before any field conversion
+            check_additional_keys = False
+            self._validate_additional_keys(limit)
+
+        for key, field in self._plan.fields:
+            if key in raw_data:
                 try:
-                    value = field.validate(value, convert=self.convert_fields)
+                    if tracer is None:
+                        value = field.validate(raw_data[key], convert=convert)
+                    else:
+                        value = tracer.validate_field(key, field, raw_data[key], convert)
+                except NestedErrors as e:
+                    for error in field_errors(key, e):
+                        self._add_error(error, limit)
                 except (TypeError, ValueError) as e:
-                    self.errors.append(FieldErrorInfo(key, str(e)))
+                    self._add_error(FieldErrorInfo(key, e), limit)
                 else:
-                    self.data[key] = value
+                    data[key] = value
             else:
                 if field.required:
-                    self.errors.append(FieldErrorInfo(key, field.format_exc('%s is required' % key)))
+                    if tracer is not None:
+                        tracer.missing_field(key)
+                    self._add_error(FieldErrorInfo(key, field._required_message(key)), limit)
                 # elif field.default is not None:
                 #     self.data[key] = field.default
 
-        for k in self._raw_data:
-            if self.no_additional_keys and k not in field_keys:
-                self.errors.append(FieldErrorInfo(k, 'additional key {} is not allowed'.format(k)))
+        if check_additional_keys:
+            self._validate_additional_keys(limit)
 
-        # first loop, validate each field independently
-        non_field_validate_funcs = []
-        for attr_name in dir(self):
-            if attr_name.startswith('validate_'):
-                field_name = attr_name[len('validate_'):]
-
-                if field_name in self._fields:
-                    field = self._fields[field_name]
-                    key = field.key
-                    if key in self.data:
-                        try:
-                            value = getattr(self, attr_name)(self.data[key])
-                        except ValueError as e:
-                            self.errors.append(FieldErrorInfo(key, str(e)))
-                        if field.null is not True:
-                            assert value is not None, (
-                                'Forget to return value after validation?'
-                                'Or this is caused by your explicitly returns'
-                                'None, which is not allowed in the mechanism.')
-                        self.data[key] = value
+    def _set_hook_value(self, key, field, value):
+        if field.null is not True:
+            assert value is not None, (
+                'Forget to return value after validation?'
+                'Or this is caused by your explicitly returns'
+                'None, which is not allowed in the mechanism.')
+        self.data[key] = value
+
+    @classmethod
+    def batch_validate(cls, items, convert_fields=False, copy_raw=None, as_records=False, fail_fast=None,
+                       max_errors=None):
+        """Validate a sequence of raw data, invalid items don't stop the
+        validation, their errors are collected by index in the result.
+
+        Raw data is copied once for the whole sequence if `copy_raw`, then
+        the plan of the class is run on each item by `Field.check`, without
+        raising InvalidParams for invalid items.
+        """
+        if cls._plan.has_async_hooks:
+            raise TypeError('{} has async validate_* methods, use avalidate instead'.format(cls.__name__))
+
+        if copy_raw is None:
+            copy_raw = cls._copy_raw
+        if copy_raw or PY2:
+            items = unicode_copy(list(items))
+
+        result = BatchResult(cls, as_records=as_records)
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                result.add_errors(index, not_dict_error().errors)
+                continue
+            params = cls.__new__(cls)
+            params._prepare(item, convert_fields=convert_fields, copy_raw=False, lazy=False,
+                            fail_fast=fail_fast, max_errors=max_errors)
+            limit = params._error_limit()
+            try:
+                params._check_fields(limit)
+                params._run_hooks(limit)
+            except _ErrorLimitReached:
+                pass
+            if params.errors:
+                result.add_errors(index, params.errors)
+            else:
+                result.add_row(index, params)
+        return result
+
+    @classmethod
+    def iter_validate(cls, source, convert_fields=False, copy_raw=None, **kwargs):
+        """Lazily validate a stream of raw data, yield `(index, params, errors)`
+        for each item, `params` is None if the item is invalid.
+
+        `source` could be an iterable of dicts, or a file-like object of
+        NDJSON lines, in which blank lines are skipped. Other keyword
+        arguments are passed to each ParamSet.
+        """
+        if hasattr(source, 'read'):
+            items = iter_json_lines(source)
+            # decoded from each line, no need to copy
+            copy_raw = False
+        else:
+            items = ((i, None) for i in source)
+
+        for index, (item, error) in enumerate(items):
+            if error is not None:
+                yield index, None, [FieldErrorInfo(None, error)]
+                continue
+            try:
+                params = cls(item, raise_if_invalid=False, convert_fields=convert_fields, copy_raw=copy_raw,
+                             **kwargs)
+            except InvalidParams as e:
+                yield index, None, e.errors
+            else:
+                if params.errors:
+                    yield index, None, params.errors
                 else:
-                    non_field_validate_funcs.append(getattr(self, attr_name))
+                    yield index, params, []
 
-        # second loop, validate logic functions
-        for func in non_field_validate_funcs:
+    def _add_error(self, error, limit=None):
+        self.errors.append(error)
+        if limit is not None and len(self.errors) >= limit:
+            raise _ErrorLimitReached()
+
+    def _validate_additional_keys(self, limit=None):
+        key_set = self._plan.key_set
+        for k in self._raw_data:
+            if k not in key_set:
+                self._add_error(additional_key_error(k), limit)
+
+    def _validate_keys(self, raise_if_invalid=True):
+        """Validation of lazy mode, fields present in raw data are left
+        in `_pending` to be validated on access.
+        """
+        raw_data = self._raw_data
+        if not isinstance(raw_data, dict):
+            raise not_dict_error()
+
+        plan = self._plan
+        errors = self.errors
+        pending = {}
+        for key, field in plan.fields:
+            if key in raw_data:
+                pending[key] = field
+            elif field.required:
+                errors.append(FieldErrorInfo(key, field._required_message(key)))
+
+        if self.no_additional_keys:
+            self._validate_additional_keys()
+
+        self._pending = pending
+        self._failed = None
+
+        if raise_if_invalid:
+            if errors:
+                raise InvalidParams(errors)
+
+    def _resolve(self, key, raise_if_invalid=True):
+        """Validate a pending field of lazy mode, the result is kept in
+        `data` so it's only done once, the errors of an invalid field are
+        raised again on each access.
+        """
+        failed = self._failed
+        if failed is not None and key in failed:
+            if raise_if_invalid:
+                raise InvalidParams(failed[key])
+            return dict(self._plan.fields)[key].default
+
+        field = self._pending[key]
+        errors = None
+        try:
+            value = field.validate(self._raw_data[key], convert=self.convert_fields)
+        except (TypeError, ValueError) as e:
+            errors = field_errors(key, e)
+        else:
+            for hook_key, hook_field, hook in self._plan.field_hooks:
+                if hook_key != key:
+                    continue
+                try:
+                    value = hook.__get__(self, self.__class__)(value)
+                except ValueError as e:
+                    errors = [FieldErrorInfo(key, e)]
+                    break
+                if hook_field.null is not True:
+                    assert value is not None, (
+                        'Forget to return value after validation?'
+                        'Or this is caused by your explicitly returns'
+                        'None, which is not allowed in the mechanism.')
+
+        if errors is not None:
+            self.errors.extend(errors)
+            if failed is None:
+                failed = self._failed = {}
+            failed[key] = errors
+            if raise_if_invalid:
+                raise InvalidParams(errors)
+            return field.default
+
+        del self._pending[key]
+        self.data[key] = value
+        return value
+
+    def finalize(self, raise_if_invalid=True):
+        """Validate all the pending fields of lazy mode, then run the
+        cross-field `validate_*` methods, which are deferred in lazy mode.
+        """
+        pending = self._pending
+        # only invalid fields are left after finalize
+        if pending is None or pending is self._failed:
+            return self
+
+        for key, _ in self._plan.fields:
+            if key in pending:
+                self._resolve(key, raise_if_invalid=False)
+        self._pending = self._failed
+
+        for hook in self._plan.cross_hooks:
             try:
-                func()
+                hook.__get__(self, self.__class__)()
             except ValueError as e:
-                self.errors.append(FieldErrorInfo(None, str(e)))
+                self.errors.append(FieldErrorInfo(None, e))
 
         if raise_if_invalid:
             if self.errors:
                 raise InvalidParams(self.errors)
+        return self
 
     def has(self, name):
+        pending = self._pending
+        if pending and name in pending:
+            self._resolve(name)
         return name in self.data
 
     def to_dict(self, include_none=False):
@@ -299,14 +1180,38 @@ class ParamSet(with_metaclass(ParamSetMeta, object)):
         for f in self.__class__._fields.values():
             value = getattr(self, f.name)
             if value is not None or (value is None and include_none):
-                d[f.key] = value
+                d[f.key] = _to_plain(value, include_none)
         return d
 
     def get_raw(self, key, default=NotImplemented):
+        if self._raw_data is None:
+            raise ValueError('raw data has been released')
         if default is NotImplemented:
             return self._raw_data[key]
         return self._raw_data.get(key, default)
 
+    def release_raw(self):
+        """Drop the reference to raw data after validation is done,
+        `get_raw` could not be used anymore.
+        """
+        self._raw_data = None
+
+    @classmethod
+    def record_class(cls):
+        """Return the ParamRecord subclass generated for this class"""
+        # look up in __dict__, record classes are not inherited
+        record_cls = cls.__dict__.get('_record_class')
+        if record_cls is None:
+            record_cls = make_record_class(cls)
+            cls._record_class = record_cls
+        return record_cls
+
+    def to_record(self):
+        """Convert the validated data to a compact record, which has
+        all the fields as attributes with defaults filled in.
+        """
+        return self.record_class().from_data(self.data)
+
     def __unicode__(self):
         return u_('<%s: %s; errors=%s>') % (
             self.__class__.__name__,
@@ -321,6 +1226,154 @@ class ParamSet(with_metaclass(ParamSetMeta, object)):
             return self.__unicode__()
 
 
+# attributes of instances are reserved as well
+_reserved_names = frozenset(
+    name for name in dir(ParamSet) if name not in _class_options) | frozenset(['data', 'errors', '_raw_data'])
+
+
+def _to_plain(value, include_none=False):
+    """Convert nested ParamSet instances in a value to dicts"""
+    if isinstance(value, ParamSet):
+        return value.to_dict(include_none)
+    if isinstance(value, list):
+        return [_to_plain(i, include_none) for i in value]
+    if isinstance(value, dict):
+        return dict((k, _to_plain(v, include_none)) for k, v in value.items())
+    return value
+
+
+class ParamRecord(object):
+    """Base class of the record classes generated by `ParamSet.record_class`.
+
+    A record stores the values of fields in `__slots__`, in the order of
+    field definition, it's much smaller than a ParamSet instance and its
+    attributes are read directly without going through `Field.__get__`.
+    """
+    __slots__ = ()
+    # ((name, key, default), ...)
+    _record_fields = ()
+    # the ParamSet class of the record class
+    _params_class = None
+
+    def __init__(self, *values):
+        if len(values) != len(self._record_fields):
+            raise TypeError('{} takes exactly {} values ({} given)'.format(
+                self.__class__.__name__, len(self._record_fields), len(values)))
+        for (name, _, _), value in zip(self._record_fields, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(*[data.get(key, default) for _, key, default in cls._record_fields])
+
+    def values(self):
+        return tuple(getattr(self, name) for name, _, _ in self._record_fields)
+
+    def to_dict(self, include_none=False):
+        """Same as `ParamSet.to_dict`"""
+        d = {}
+        for name, key, _ in self._record_fields:
+            value = getattr(self, name)
+            if value is not None or include_none:
+                d[key] = value
+        return d
+
+    def __eq__(self, other):
+        return self.__class__ is other.__class__ and self.values() == other.values()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # record classes are generated, they are found by the ParamSet class
+        return (_rebuild_record, (self._params_class, self.values()))
+
+    def __repr__(self):
+        return '{}({})'.format(
+            self.__class__.__name__,
+            ', '.join('{}={!r}'.format(name, getattr(self, name)) for name, _, _ in self._record_fields))
+
+
+def _rebuild_record(params_cls, values):
+    return params_cls.record_class()(*values)
+
+
+def make_record_class(params_cls):
+    record_fields = tuple(
+        (name, field.key, field.default) for name, field in params_cls._fields.items())
+    for name, _, _ in record_fields:
+        if hasattr(ParamRecord, name):
+            raise TypeError('field name {!r} of {} is reserved by records'.format(name, params_cls.__name__))
+    attrs = {
+        '__slots__': tuple(name for name, _, _ in record_fields),
+        '__module__': params_cls.__module__,
+        '_record_fields': record_fields,
+        '_params_class': params_cls,
+    }
+    return type(str(params_cls.__name__ + 'Record'), (ParamRecord, ), attrs)
+
+
+class BatchResult(object):
+    """Result of `ParamSet.batch_validate`.
+
+    `rows` are the valid items as ParamSet instances, or records if
+    `as_records` is True, `indexes` are their indexes in the input sequence,
+    `errors` is a dict of index to the errors of each invalid item.
+    """
+    def __init__(self, params_cls, as_records=False):
+        self.params_cls = params_cls
+        self.as_records = as_records
+        self.rows = []
+        self.indexes = []
+        self.errors = {}
+
+    def add_row(self, index, params):
+        if self.as_records:
+            params = params.to_record()
+        self.rows.append(params)
+        self.indexes.append(index)
+
+    def add_errors(self, index, errors):
+        self.errors[index] = errors
+
+    @property
+    def valid_count(self):
+        return len(self.rows)
+
+    @property
+    def invalid_count(self):
+        return len(self.errors)
+
+    @property
+    def total(self):
+        return len(self.rows) + len(self.errors)
+
+    def columns(self):
+        """Return the valid rows as columns, a dict of field key to the
+        list of values, with defaults filled in.
+        """
+        fields = self.params_cls._plan.fields
+        if self.as_records:
+            return dict(
+                (key, [getattr(row, f.name) for row in self.rows])
+                for key, f in fields)
+        return dict(
+            (key, [row.data.get(key, f.default) for row in self.rows])
+            for key, f in fields)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return '<BatchResult of {}: valid={} invalid={}>'.format(
+            self.params_cls.__name__, self.valid_count, self.invalid_count)
+
+
 def define_params(kwargs, datatype='form'):
     param_class = type('AutoCreatedParams', (ParamSet, ), kwargs)
     return param_class
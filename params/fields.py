@@ -4,10 +4,26 @@ import six
 import re
 import uuid
 import datetime
+import operator
 
-from .core import Field, ParamSet, InvalidParams
+from .core import (
+    Field, ParamSet, InvalidParams, NestedErrors, ErrorMessage, error_message, field_errors, _uncacheable_types)
 from .utils import basestring_type
-from .compat import decode_, encode_
+from .compat import decode_, encode_, unicode_ as u_
+from .validators import is_email, is_url, find_unsafe_repeat
+
+try:
+    import regex as regex_module
+except ImportError:
+    regex_module = None
+
+# results of these types could be shared by repeated list items
+_immutable_types = six.integer_types + (
+    six.text_type, bytes, float, complex, bool, type(None), uuid.UUID,
+    datetime.date, datetime.time, datetime.timedelta)
+
+# raised by the regex module when matching times out
+_TimeoutError = getattr(six.moves.builtins, 'TimeoutError', RuntimeError)
 
 __all__ = [
     'StringField',
@@ -18,6 +34,8 @@ __all__ = [
     'IntegerField',
     'FloatField',
     'ListField',
+    'NestedField',
+    'DictField',
     'UUIDStringField',
     'DatetimeField',
     'BooleanField',
@@ -69,34 +87,63 @@ class StringField(Field):
         if self.length is not None:
             self._validate_length(value)
 
+    def _check_type(self, value):
+        error = super(StringField, self)._check_type(value)
+        if error is None and self.length is not None:
+            error = self._check_length(value)
+        return error
+
     def _convert_type(self, value):
         # because basestring could not be used to convert value, this method is overrided
         if isinstance(value, str):
             try:
                 return decode_(value, 'utf8')
             except UnicodeDecodeError:
-                raise ValueError('could not convert {} to unicode'.format(repr(value)))
+                raise ValueError(ErrorMessage('convert', 'could not convert {value!r} to unicode', value=value))
         else:
             return six.text_type(value)
 
     def _validate_length(self, value):
+        error = self._check_length(value)
+        if error is not None:
+            raise error
+        return value
+
+    def _check_length(self, value):
         length = self.length
         value_len = len(value)
 
         if isinstance(length, int):
             if value_len != length:
-                raise self.format_exc(
-                    'Length of value should be {}, but got {}'.format(length, value_len))
+                return self.format_exc(ErrorMessage(
+                    'length', 'Length of value should be {length}, but got {value_length}',
+                    length=length, value_length=value_len))
         else:
             min, max = length
             if value_len < min or value_len > max:
-                raise self.format_exc(
-                    'Length should be >= {} and <= {}, but {}'.format(min, max, value_len))
-        return value
+                return self.format_exc(ErrorMessage(
+                    'length', 'Length should be >= {min} and <= {max}, but {value_length}',
+                    min=min, max=max, value_length=value_len))
+        return None
 
 
 class RegexField(StringField):
+    # values longer than this are rejected before matching
+    max_length = None
+    # seconds, the pattern is matched with the `regex` module if it's set
+    timeout = None
+
     def __init__(self, *args, **kwgs):
+        """
+        :params pattern: str
+        :params max_length: int, values longer than it are rejected before
+            matching, to bound the time of matching
+        :params check_pattern: bool, raise ValueError if the pattern has
+            quantifiers that may cause catastrophic backtracking, see
+            `params.validators.find_unsafe_repeat`
+        :params timeout: float, seconds, time limit of matching, which
+            requires the `regex` module, `pip install params[regex]`
+        """
         # assume pattern is a raw string like r'\n'
         if 'pattern' in kwgs:
             pattern = kwgs.pop('pattern')
@@ -106,15 +153,59 @@ class RegexField(StringField):
         assert isinstance(self.regex, _pattern_class),\
             'regex should be a compiled pattern'
 
+        if 'max_length' in kwgs:
+            self.max_length = kwgs.pop('max_length')
+        if kwgs.pop('check_pattern', False):
+            reason = find_unsafe_repeat(self.regex)
+            if reason:
+                raise ValueError('unsafe regex pattern {!r}: {}'.format(self.regex.pattern, reason))
+        if 'timeout' in kwgs:
+            self.timeout = kwgs.pop('timeout')
+        if self.timeout is not None:
+            if regex_module is None:
+                raise ImportError('regex is required by timeout of RegexField, '
+                                  'install it by `pip install params[regex]`')
+            self._timeout_regex = regex_module.compile(self.regex.pattern, self.regex.flags)
+
         super(RegexField, self).__init__(*args, **kwgs)
 
+    def _match(self, value):
+        if self.timeout is None:
+            return self.regex.search(value)
+        try:
+            return self._timeout_regex.search(value, timeout=self.timeout)
+        except _TimeoutError:
+            raise self.format_exc(ErrorMessage(
+                'timeout', 'regex matching timed out after {timeout} seconds', timeout=self.timeout))
+
     def _validate_type(self, value):
         super(RegexField, self)._validate_type(value)
 
-        if not self.regex.search(value):
-            raise self.format_exc(
-                'regex pattern (%s, %s) is not match with value "%s"' %
-                (self.regex.pattern, self.regex.flags, value))
+        error = self._check_match(value)
+        if error is not None:
+            raise error
+
+    def _check_type(self, value):
+        error = super(RegexField, self)._check_type(value)
+        if error is None:
+            error = self._check_match(value)
+        return error
+
+    def _check_match(self, value):
+        if self.max_length is not None and len(value) > self.max_length:
+            return self.format_exc(ErrorMessage(
+                'length', 'Length should be <= {max}, but {value_length}',
+                max=self.max_length, value_length=len(value)))
+        try:
+            matched = self._match(value)
+        except ValueError as e:
+            # timed out
+            return e
+        if not matched:
+            return self.format_exc(ErrorMessage(
+                'pattern', 'regex pattern ({pattern}, {flags}) is not match with value "{value}"',
+                pattern=self.regex.pattern, flags=self.regex.flags, value=value))
+        return None
 
 
 class WordField(RegexField):
@@ -142,6 +233,12 @@ EMAIL_REGEX = re.compile(
 class EmailField(RegexField):
     regex = EMAIL_REGEX
 
+    def _match(self, value):
+        # same as the regex in linear time, unless the pattern is changed
+        if self.regex is EMAIL_REGEX and self.timeout is None:
+            return is_email(value)
+        return super(EmailField, self)._match(value)
+
 
 URL_REGEX = re.compile(
     r'^(?:http|ftp)s?://'  # http:// or https://
@@ -156,6 +253,11 @@ URL_REGEX = re.compile(
 class URLField(RegexField):
     regex = URL_REGEX
 
+    def _match(self, value):
+        if self.regex is URL_REGEX and self.timeout is None:
+            return is_url(value)
+        return super(URLField, self)._match(value)
+
 
 ###############################################################################
 # Number fields                                                               #
@@ -181,14 +283,21 @@ class BaseNumberField(Field):
         super(BaseNumberField, self).__init__(*args, **kwargs)
 
     def _validate_min_max(self, value):
+        error = self._check_min_max(value)
+        if error is not None:
+            raise error
+        return value
+
+    def _check_min_max(self, value):
         if self.min is not None:
             if value < self.min:
-                raise self.format_exc('value {} is too small, min {}'.format(value, self.min))
+                return self.format_exc(ErrorMessage(
+                    'min', 'value {value} is too small, min {min}', value=value, min=self.min))
         if self.max is not None:
             if value > self.max:
-                raise self.format_exc('vaule {} is too big, max {}'.format(value, self.max))
-
-        return value
+                return self.format_exc(ErrorMessage(
+                    'max', 'vaule {value} is too big, max {max}', value=value, max=self.max))
+        return None
 
 
 class IntegerField(BaseNumberField):
@@ -207,6 +316,12 @@ class ListField(Field):
     value_type = list
 
     def __init__(self, *args, **kwargs):
+        """
+        :params item_field: Field, validate each item with it
+        :params item_class: ParamSet class, validate each item as raw data of it
+        :params item_instances: bool, work on item_class, use the ParamSet
+            instances of items as the value, instead of the raw items
+        """
         self.item_field = kwargs.pop('item_field', None)
         if self.item_field and not isinstance(self.item_field, Field):
             raise TypeError('item_field must be instance of Field')
@@ -217,46 +332,88 @@ class ListField(Field):
 
         if self.item_field and self.item_class:
             raise ValueError('item_field and item_class are mutual excluded')
+        self.item_instances = kwargs.pop('item_instances', False)
         super(ListField, self).__init__(*args, **kwargs)
 
-    def _convert_type(self, value):
-        if not isinstance(value, list):
+    def _validate_value(self, value, convert=False):
+        """Validate the list and its items in one pass, the value is the
+        list of validated items
+        """
+        if self.is_null(value):
+            return super(ListField, self)._validate_value(value, convert)
+
+        convert = convert or self.force_convert
+        if convert and not isinstance(value, list):
             value = [value]
+        if not isinstance(value, list):
+            raise self.format_exc(ErrorMessage('type', 'Not a list'))
 
-        # only convert item when item_field exists
+        instances = None
         if self.item_field:
-            formatted_value = []
-            for i in value:
-                try:
-                    item_value = self.item_field.validate(i, convert=True)
-                except ValueError as e:
-                    raise self.format_exc(
-                        '{} in list could not be convert to type {}: {}'.format(i, self.item_field, e))
-                else:
-                    formatted_value.append(item_value)
+            value = self._validate_items(value, convert)
+        elif self.item_class:
+            instances = self._validate_instances(value)
 
-            value = formatted_value
+        if self.choices:
+            self._validate_choices(value)
 
-        return value
+        for method_name in self.extra_validation_methods:
+            getattr(self, method_name)(value)
 
-    def _validate_type(self, value):
-        if not isinstance(value, list):
-            raise self.format_exc('Not a list')
+        if self.item_instances and instances is not None:
+            return instances
+        return value
 
-        if self.item_field:
-            for i in value:
-                try:
-                    self.item_field.validate(i)
-                except ValueError as e:
-                    raise self.format_exc(
-                        '{} in list is not of type {}: {}'.format(i, self.item_field, e))
-        elif self.item_class:
-            for i in value:
+    def _item_error(self, index, item, item_type, error, convert=False):
+        if convert:
+            template = '{item} at index {index} in list could not be convert to type {type}: {error}'
+        else:
+            template = '{item} at index {index} in list is not of type {type}: {error}'
+        error_class = TypeError if isinstance(error, TypeError) else ValueError
+        error = error_message(error)
+        # the code of the item's error
+        code = error.code if isinstance(error, ErrorMessage) else 'item'
+        message = ErrorMessage(code, template, item=item, index=index, type=item_type, error=error)
+        return self.format_exc(message, error_class)
+
+    def _validate_items(self, items, convert):
+        validate = self.item_field.validate
+        values = []
+        # {(type, item): value}, repeated hashable items are validated once
+        # if the value is immutable, so that it's never shared by two items
+        validated = {}
+        for index, item in enumerate(items):
+            key = None
+            if not isinstance(item, _uncacheable_types):
+                key = (type(item), item)
                 try:
-                    self.item_class(i, raise_if_invalid=True)
-                except InvalidParams as e:
-                    raise self.format_exc(
-                        '{} in list is not of type {}: {}'.format(i, self.item_class, e))
+                    values.append(validated[key])
+                    continue
+                except KeyError:
+                    pass
+                except TypeError:
+                    # unhashable
+                    key = None
+
+            try:
+                value = validate(item, convert=convert)
+            except NestedErrors as e:
+                raise NestedErrors(field_errors(_index_path(index), e))
+            except (TypeError, ValueError) as e:
+                raise self._item_error(index, item, self.item_field, e, convert)
+            if key is not None and isinstance(value, _immutable_types):
+                validated[key] = value
+            values.append(value)
+        return values
+
+    def _validate_instances(self, items):
+        instances = []
+        for index, item in enumerate(items):
+            try:
+                instances.append(validate_nested(self.item_class, item))
+            except NestedErrors as e:
+                raise NestedErrors(field_errors(_index_path(index), e))
+        return instances
 
     def _validate_choices(self, value):
         bad_values = []
@@ -265,7 +422,104 @@ class ListField(Field):
                 if i not in self.choices:
                     bad_values.append(i)
         if bad_values:
-            raise self.format_exc('%s is/are not allowed' % bad_values)
+            raise self.format_exc(ErrorMessage('choices', '{values} is/are not allowed', values=bad_values))
+
+
+def _index_path(index):
+    return '[{}]'.format(index)
+
+
+def validate_nested(params_cls, raw_data, convert=False):
+    """Validate raw data nested in the raw data of another ParamSet, return
+    the ParamSet instance, errors are raised as NestedErrors.
+
+    The plan (or generated validator) of `params_cls` is used as is, raw
+    data is not copied again, for the outermost ParamSet has copied it
+    if needed.
+    """
+    params = params_cls.__new__(params_cls)
+    params._prepare(raw_data, convert_fields=convert, copy_raw=False, lazy=False)
+    try:
+        params.validate(raise_if_invalid=False)
+    except InvalidParams as e:
+        # raw data is not a dict
+        raise NestedErrors(e.errors)
+    if params.errors:
+        raise NestedErrors(params.errors)
+    return params
+
+
+class NestedField(Field):
+    """A nested object validated by a ParamSet class, the value is the
+    ParamSet instance, errors have paths like `user.address.zip`.
+    """
+
+    def __init__(self, params_class, *args, **kwargs):
+        if not (isinstance(params_class, type) and issubclass(params_class, ParamSet)):
+            raise TypeError('params_class must be subclass of ParamSet')
+        if params_class._plan.has_async_hooks:
+            raise TypeError('{} has async validate_* methods, which could not be nested'.format(
+                params_class.__name__))
+        self.params_class = params_class
+        super(NestedField, self).__init__(*args, **kwargs)
+
+    def _validate_value(self, value, convert=False):
+        if self.is_null(value):
+            return super(NestedField, self)._validate_value(value, convert)
+
+        if not isinstance(value, dict):
+            raise self.format_exc(ErrorMessage('type', 'Not a dict'))
+        params = validate_nested(self.params_class, value, convert or self.force_convert)
+
+        for method_name in self.extra_validation_methods:
+            getattr(self, method_name)(params)
+
+        return params
+
+
+class DictField(Field):
+    """A dict of which keys and values are validated by `key_field` and
+    `value_field`, errors have paths like `tags.name`.
+    """
+    value_type = dict
+
+    def __init__(self, key_field=None, value_field=None, *args, **kwargs):
+        for name, field in (('key_field', key_field), ('value_field', value_field)):
+            if field is not None and not isinstance(field, Field):
+                raise TypeError('{} must be instance of Field'.format(name))
+        self.key_field = key_field
+        self.value_field = value_field
+        super(DictField, self).__init__(*args, **kwargs)
+
+    def _validate_value(self, value, convert=False):
+        if self.is_null(value):
+            return super(DictField, self)._validate_value(value, convert)
+
+        if not isinstance(value, dict):
+            raise self.format_exc(ErrorMessage('type', 'Not a dict'))
+
+        convert = convert or self.force_convert
+        key_field = self.key_field
+        value_field = self.value_field
+        result = {}
+        errors = []
+        for k, v in six.iteritems(value):
+            try:
+                if key_field is not None:
+                    k = key_field.validate(k, convert=convert)
+                if value_field is not None:
+                    v = value_field.validate(v, convert=convert)
+            except (TypeError, ValueError) as e:
+                errors.extend(field_errors(u_('{}').format(k), e))
+            else:
+                result[k] = v
+        if errors:
+            raise NestedErrors(errors)
+
+        for method_name in self.extra_validation_methods:
+            getattr(self, method_name)(result)
+
+        return result
 
 
 ###############################################################################
@@ -274,16 +528,133 @@ class ListField(Field):
 
 class UUIDStringField(StringField):
     def _validate_type(self, value):
+        error = self._check_type(value)
+        if error is not None:
+            raise error
+
+    def _check_type(self, value):
         try:
             uuid.UUID(value)
         except ValueError as e:
-            raise self.format_exc('Invalid uuid string: %s' % e)
+            return self.format_exc(ErrorMessage('uuid', 'Invalid uuid string: {error}', error=e))
+        return None
+
+
+# strptime directives that the fast parsers handle, they only accept the
+# zero padded form, other strings are left to strptime
+_datetime_directives = {
+    'Y': ('([0-9]{4})', 0),
+    'm': ('([0-9]{2})', 1),
+    'd': ('([0-9]{2})', 2),
+    'H': ('([0-9]{2})', 3),
+    'M': ('([0-9]{2})', 4),
+    'S': ('([0-9]{2})', 5),
+    'f': ('([0-9]{1,6})', 6),
+}
+
+# {format: parser or None}
+_datetime_parsers = {}
+
+# datetime.fromisoformat is only available since Python 3.7
+_fromisoformat = getattr(datetime.datetime, 'fromisoformat', None)
+
+# {format: (length, positions of separators, separators)}, strings in these
+# formats with the exact length and separators are parsed by fromisoformat
+# in the same way as strptime, fromisoformat accepts more than that
+_isoformat_layouts = {
+    '%Y-%m-%d': (10, (4, 7), ('-', '-')),
+    '%Y-%m-%d %H:%M:%S': (19, (4, 7, 10, 13, 16), ('-', '-', ' ', ':', ':')),
+    '%Y-%m-%dT%H:%M:%S': (19, (4, 7, 10, 13, 16), ('-', '-', 'T', ':', ':')),
+}
+
+_epoch = datetime.datetime(1970, 1, 1)
+
+# formats of unix timestamps
+_epoch_formats = frozenset(['epoch', 'epoch_ms'])
+
+
+def _compile_isoformat(format):
+    """Like `_compile_datetime_format`, but with fromisoformat, which is
+    much faster than a regex.
+    """
+    layout = _isoformat_layouts.get(format)
+    if layout is None or _fromisoformat is None:
+        return None
+    length, positions, separators = layout
+    get_separators = operator.itemgetter(*positions)
+
+    def parse(value):
+        # newer versions of fromisoformat take hour 24 as the next day
+        if len(value) != length or get_separators(value) != separators or value[11:13] == '24':
+            return None
+        try:
+            return _fromisoformat(value)
+        except ValueError:
+            return None
+
+    return parse
+
+
+def _compile_datetime_format(format):
+    """Return a function that parses strings in `format` like strptime but
+    much faster, or None if `format` has directives other than the ones in
+    `_datetime_directives`.
+
+    The function returns None for the strings it could not parse, they may
+    still be accepted by strptime, which is more lenient.
+    """
+    patterns = []
+    indexes = []
+    i = 0
+    while i < len(format):
+        if format[i] == '%':
+            directive = _datetime_directives.get(format[i + 1:i + 2])
+            if directive is None or directive[1] in indexes:
+                return None
+            patterns.append(directive[0])
+            indexes.append(directive[1])
+            i += 2
+        else:
+            patterns.append(re.escape(format[i]))
+            i += 1
+    match = re.compile(''.join(patterns) + r'\Z').match
+    # defaults of strptime
+    defaults = [1900, 1, 1, 0, 0, 0, 0]
+
+    def parse(value):
+        m = match(value)
+        if m is None:
+            return None
+        args = list(defaults)
+        for index, s in zip(indexes, m.groups()):
+            # %f is the fraction of a second
+            args[index] = int(s.ljust(6, '0') if index == 6 else s)
+        try:
+            return datetime.datetime(*args)
+        except ValueError:
+            return None
+
+    return parse
+
+
+def get_datetime_parser(format):
+    try:
+        return _datetime_parsers[format]
+    except KeyError:
+        parser = _compile_isoformat(format) or _compile_datetime_format(format)
+        _datetime_parsers[format] = parser
+        return parser
 
 
 class DatetimeField(Field):
     value_type = datetime.datetime
 
     def __init__(self, *args, **kwargs):
+        """
+        :params format: format of strptime, or `epoch`, `epoch_ms` for unix
+            timestamps in seconds or milliseconds, which are converted to naive
+            datetime objects in UTC
+        """
         format = kwargs.pop('format', None)
         if not format:
             raise KeyError('`format` argument is required for DatetimeField')
@@ -291,15 +662,41 @@ class DatetimeField(Field):
         super(DatetimeField, self).__init__(*args, **kwargs)
 
     def _convert_type(self, value):
+        if self.format in _epoch_formats:
+            return self._convert_epoch(value)
+
+        # common formats are parsed without strptime, which is slow
+        parse = get_datetime_parser(self.format)
+        if parse is not None and isinstance(value, basestring_type):
+            dt = parse(value)
+            if dt is not None:
+                return dt
+
         try:
             value = datetime.datetime.strptime(value, self.format)
         except ValueError:
-            raise self.format_exc(
-                'Could not convert {} to datetime object by format {}'.format(
-                    value, self.format)
-            )
+            raise self.format_exc(ErrorMessage(
+                'convert', 'Could not convert {value} to datetime object by format {format}',
+                value=value, format=self.format))
         return value
 
+    def _convert_epoch(self, value):
+        try:
+            if isinstance(value, bool):
+                raise TypeError()
+            if isinstance(value, basestring_type):
+                try:
+                    value = int(value)
+                except ValueError:
+                    value = float(value)
+            if self.format == 'epoch':
+                return _epoch + datetime.timedelta(seconds=value)
+            return _epoch + datetime.timedelta(milliseconds=value)
+        except (TypeError, ValueError, OverflowError):
+            raise self.format_exc(ErrorMessage(
+                'convert', 'Could not convert {value} to datetime object by format {format}',
+                value=value, format=self.format))
+
 
 class BooleanField(Field):
     value_type = bool
@@ -316,5 +713,5 @@ class BooleanField(Field):
             elif value in self.false_strs:
                 return False
             else:
-                self.format_exc('could not convert {} to bool'.format(value))
+                self.format_exc(ErrorMessage('convert', 'could not convert {value} to bool', value=value))
         return value
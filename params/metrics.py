@@ -0,0 +1,518 @@
+# coding: utf-8
+
+"""
+Opt-in validation metrics.
+
+After `enable()`, each `ParamSet.validate` is recorded in a registry, per
+ParamSet class and per field key: the number of validations, the number
+of invalid ones, errors by code (see `ErrorMessage`, errors without code
+are counted as 'other'), and latency histograms with fixed buckets. When
+metrics are disabled, the only cost is a check of a global in `validate`.
+
+Metrics are labeled by the view or handler name in the `use_params`
+decorators of `params.contrib`, or by `label(name)` elsewhere, the label is
+kept in a thread local. Lazy ParamSets, `avalidate`, `try_validate` and
+validation offloaded to other processes are not recorded.
+
+The registry could be exported in the Prometheus text format, by
+`to_prometheus`, `write_prometheus` or the WSGI app `prometheus_app`, and
+each validation could be sent to statsd by adding a `StatsdSink`.
+
+The registry is an observer of validations, other observers (like the
+sampler of `params.sampler`) are added by `add_observer`, validations are
+timed only when there are observers. Per-field metrics are collected by
+running the plan of the ParamSet with a `Tracer`, so compiled ParamSets
+(`compiled = True`) don't use their generated validators while metrics
+are enabled, use `MetricsRegistry(fields=False)` to keep them.
+"""
+
+import os
+import re
+import socket
+import bisect
+import tempfile
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import partial
+from . import core
+from .core import InvalidParams, field_errors, _timer
+
+__all__ = [
+    'MetricsRegistry',
+    'StatsdSink',
+    'registry',
+    'enable',
+    'disable',
+    'is_enabled',
+    'add_observer',
+    'remove_observer',
+    'label',
+    'call_labeled',
+    'to_prometheus',
+    'write_prometheus',
+    'prometheus_app',
+]
+
+# upper bounds of latency buckets in seconds, validations take microseconds
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+)
+
+
+class Histogram(object):
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # the last one is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self):
+        return {
+            'buckets': list(self.buckets),
+            'counts': list(self.counts),
+            'sum': self.sum,
+            'count': self.count,
+        }
+
+
+class Stats(object):
+    """Metrics of a ParamSet class or a field"""
+    __slots__ = ('calls', 'invalid', 'errors', 'latency')
+
+    def __init__(self, buckets):
+        self.calls = 0
+        self.invalid = 0
+        # {code: count}
+        self.errors = {}
+        self.latency = Histogram(buckets)
+
+    def add_errors(self, codes):
+        errors = self.errors
+        for code in codes:
+            errors[code] = errors.get(code, 0) + 1
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'invalid': self.invalid,
+            'errors': dict(self.errors),
+            'latency': self.latency.to_dict(),
+        }
+
+
+def _error_codes(errors):
+    return [e.code or 'other' for e in errors]
+
+
+class MetricsRegistry(object):
+    """Thread-safe store of validation metrics.
+
+    With `fields=False`, only the metrics of ParamSet classes are recorded,
+    validations are not traced, so that compiled ParamSets keep using their
+    generated validators.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, fields=True):
+        self.buckets = tuple(buckets)
+        self.fields = fields
+        self.sinks = []
+        self._lock = threading.Lock()
+        # {(label, paramset): Stats}
+        self._paramsets = {}
+        # {(label, paramset, key): Stats}
+        self._fields = {}
+
+    def add_sink(self, sink):
+        """Add a sink with a `record` method like StatsdSink, which is called
+        after each validation is recorded.
+        """
+        self.sinks.append(sink)
+
+    def _get(self, stats, key):
+        s = stats.get(key)
+        if s is None:
+            s = stats[key] = Stats(self.buckets)
+        return s
+
+    def trace_level(self, params_cls):
+        return TRACE_FIELDS if self.fields else TRACE_NONE
+
+    def observe(self, trace):
+        self.record(trace.label, paramset_name(trace.params.__class__), trace.elapsed, trace.codes, trace.fields)
+
+    def record(self, label, paramset, elapsed, codes, fields):
+        """Record a validation, `codes` are the codes of all the errors,
+        `fields` is a list of FieldTrace, or None if the validation is not
+        traced.
+        """
+        with self._lock:
+            s = self._get(self._paramsets, (label, paramset))
+            s.calls += 1
+            s.latency.observe(elapsed)
+            if codes:
+                s.invalid += 1
+                s.add_errors(codes)
+
+            for key, field_elapsed, field_codes, _ in fields or ():
+                s = self._get(self._fields, (label, paramset, key))
+                if field_elapsed is not None:
+                    s.calls += 1
+                    s.latency.observe(field_elapsed)
+                if field_codes:
+                    s.invalid += 1
+                    s.add_errors(field_codes)
+
+        for sink in self.sinks:
+            sink.record(label, paramset, elapsed, codes, fields)
+
+    def snapshot(self):
+        """Return a copy of the metrics as a dict of lists of dicts"""
+        with self._lock:
+            paramsets = [
+                dict(s.to_dict(), label=label, paramset=paramset)
+                for (label, paramset), s in self._paramsets.items()]
+            fields = [
+                dict(s.to_dict(), label=label, paramset=paramset, field=key)
+                for (label, paramset, key), s in self._fields.items()]
+        sort_key = lambda d: (d['label'] or '', d['paramset'], d.get('field') or '')  # NOQA
+        return {
+            'paramsets': sorted(paramsets, key=sort_key),
+            'fields': sorted(fields, key=sort_key),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._paramsets = {}
+            self._fields = {}
+
+
+registry = MetricsRegistry()
+
+_local = threading.local()
+
+
+# Levels of tracing requested by observers, see `add_observer`:
+# only the time of the whole validation, the generated validator of a
+# compiled ParamSet is kept
+TRACE_NONE = 0
+# the time and errors of each field, and the time of each hook
+TRACE_FIELDS = 1
+# and the time of each step of field validation, see `Field._traced_validate`
+TRACE_STEPS = 2
+
+# Observed validation, `fields` and `hooks` are None if it's not traced,
+# else lists of FieldTrace and `(name, elapsed)` of `validate_*` methods
+ValidationTrace = namedtuple('ValidationTrace', [
+    'params', 'label', 'elapsed', 'codes', 'fields', 'hooks',
+])
+
+# elapsed is None if the field is missing, `codes` is None if it's valid,
+# `steps` is a list of `(step, elapsed)` with TRACE_STEPS, else None
+FieldTrace = namedtuple('FieldTrace', ['key', 'elapsed', 'codes', 'steps'])
+
+
+def paramset_name(cls):
+    return '{}.{}'.format(cls.__module__, cls.__name__)
+
+
+class Tracer(object):
+    """Called by the plan of `ParamSet._validate_plan` for each field
+    and hook, collects their traces.
+    """
+    __slots__ = ('steps', 'fields', 'hooks')
+
+    def __init__(self, steps=False):
+        self.steps = steps
+        self.fields = []
+        self.hooks = []
+
+    def validate_field(self, key, field, value, convert):
+        steps = [] if self.steps else None
+        start = _timer()
+        try:
+            if steps is None:
+                value = field.validate(value, convert=convert)
+            else:
+                value = field._traced_validate(value, convert, steps.append)
+        except (TypeError, ValueError) as e:
+            self.fields.append(FieldTrace(key, _timer() - start, _error_codes(field_errors(key, e)), steps))
+            raise
+        self.fields.append(FieldTrace(key, _timer() - start, None, steps))
+        return value
+
+    def missing_field(self, key):
+        self.fields.append(FieldTrace(key, None, ['required'], None))
+
+    def run_hook(self, hook, *args):
+        start = _timer()
+        try:
+            return hook(*args)
+        finally:
+            self.hooks.append((hook.__name__, _timer() - start))
+
+
+def _validate(observers, params, raise_if_invalid=True):
+    """`ParamSet.validate` with observers, each of them is called with a
+    ValidationTrace.
+    """
+    cls = params.__class__
+    level = TRACE_NONE
+    for observer in observers:
+        level = max(level, observer.trace_level(cls))
+    tracer = Tracer(steps=level >= TRACE_STEPS) if level else None
+    fields = hooks = None
+    if tracer is not None:
+        fields, hooks = tracer.fields, tracer.hooks
+    metrics_label = getattr(_local, 'label', None)
+
+    start = _timer()
+    try:
+        params._validate_plan(False, tracer)
+    except InvalidParams as e:
+        # raw data is not a dict
+        trace = ValidationTrace(params, metrics_label, _timer() - start, _error_codes(e.errors), fields, hooks)
+        for observer in observers:
+            observer.observe(trace)
+        raise
+
+    trace = ValidationTrace(
+        params, metrics_label, _timer() - start, _error_codes(params.errors), fields, hooks)
+    for observer in observers:
+        observer.observe(trace)
+
+    if raise_if_invalid:
+        if params.errors:
+            raise InvalidParams(params.errors)
+
+
+# objects with an `observe(trace)` method, see `add_observer`
+_observers = []
+_observers_lock = threading.Lock()
+
+
+def _install():
+    if _observers:
+        core._metrics_hook = partial(_validate, tuple(_observers))
+    else:
+        core._metrics_hook = None
+
+
+def add_observer(observer):
+    """Call `observer.observe(trace)` after each `ParamSet.validate`, with a
+    ValidationTrace, observers are called in the validating thread.
+
+    `observer.trace_level(params_cls)` returns the TRACE_* level needed for
+    a class, the highest one of all the observers is used. Fields of traced
+    validations are validated one by one through the plan, so that compiled
+    ParamSets don't use their generated validators then.
+    """
+    with _observers_lock:
+        if observer not in _observers:
+            _observers.append(observer)
+        _install()
+
+
+def remove_observer(observer):
+    with _observers_lock:
+        if observer in _observers:
+            _observers.remove(observer)
+        _install()
+
+
+def enable(registry=None):
+    """Record metrics of validations in `registry`, the default one if None,
+    replacing the registry enabled before.
+    """
+    disable()
+    add_observer(registry or globals()['registry'])
+
+
+def disable():
+    for observer in list(_observers):
+        if isinstance(observer, MetricsRegistry):
+            remove_observer(observer)
+
+
+def is_enabled():
+    return any(isinstance(observer, MetricsRegistry) for observer in _observers)
+
+
+@contextmanager
+def label(name):
+    """Label the metrics of validations in the block by `name`"""
+    previous = getattr(_local, 'label', None)
+    _local.label = name
+    try:
+        yield
+    finally:
+        _local.label = previous
+
+
+def call_labeled(name, func, *args, **kwargs):
+    """Call `func` in `label(name)` if metrics are enabled"""
+    if core._metrics_hook is None:
+        return func(*args, **kwargs)
+    with label(name):
+        return func(*args, **kwargs)
+
+
+###############################################################################
+# Prometheus                                                                  #
+###############################################################################
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(
+        '{}="{}"'.format(k, _escape(v or '')) for k, v in sorted(labels.items())) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _write_stats(lines, prefix, help_name, items, label_keys):
+    """Write the metrics of snapshot items, `label_keys` are the keys of
+    each item used as labels.
+    """
+    lines.append('# HELP {}_validations_total Number of validations of {}.'.format(prefix, help_name))
+    lines.append('# TYPE {}_validations_total counter'.format(prefix))
+    for item in items:
+        labels = dict((k, item[k]) for k in label_keys)
+        lines.append('{}_validations_total{} {}'.format(prefix, _labels(**labels), item['calls']))
+
+    lines.append('# HELP {}_invalid_total Number of invalid validations of {}.'.format(prefix, help_name))
+    lines.append('# TYPE {}_invalid_total counter'.format(prefix))
+    for item in items:
+        labels = dict((k, item[k]) for k in label_keys)
+        lines.append('{}_invalid_total{} {}'.format(prefix, _labels(**labels), item['invalid']))
+
+    lines.append('# HELP {}_errors_total Number of errors of {} by code.'.format(prefix, help_name))
+    lines.append('# TYPE {}_errors_total counter'.format(prefix))
+    for item in items:
+        for code, count in sorted(item['errors'].items()):
+            labels = dict((k, item[k]) for k in label_keys)
+            labels['code'] = code
+            lines.append('{}_errors_total{} {}'.format(prefix, _labels(**labels), count))
+
+    lines.append('# HELP {}_seconds Latency of validations of {}.'.format(prefix, help_name))
+    lines.append('# TYPE {}_seconds histogram'.format(prefix))
+    for item in items:
+        labels = dict((k, item[k]) for k in label_keys)
+        latency = item['latency']
+        cumulative = 0
+        for bound, count in zip(latency['buckets'] + ['+Inf'], latency['counts']):
+            cumulative += count
+            bucket_labels = dict(labels, le=_format_number(bound))
+            lines.append('{}_seconds_bucket{} {}'.format(prefix, _labels(**bucket_labels), cumulative))
+        lines.append('{}_seconds_sum{} {}'.format(prefix, _labels(**labels), _format_number(latency['sum'])))
+        lines.append('{}_seconds_count{} {}'.format(prefix, _labels(**labels), latency['count']))
+
+
+def to_prometheus(registry=None):
+    """Return the metrics in the Prometheus text exposition format"""
+    snapshot = (registry or globals()['registry']).snapshot()
+    lines = []
+    _write_stats(lines, 'params_paramset', 'ParamSet classes', snapshot['paramsets'],
+                 ('label', 'paramset'))
+    _write_stats(lines, 'params_field', 'fields', snapshot['fields'],
+                 ('label', 'paramset', 'field'))
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path, registry=None):
+    """Write the metrics to a file for the textfile collector of node
+    exporter, the file is replaced atomically.
+    """
+    text = to_prometheus(registry)
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=dirname, prefix='.params-metrics-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        getattr(os, 'replace', os.rename)(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+def prometheus_app(environ, start_response, registry=None):
+    """WSGI app that serves the metrics of the default registry"""
+    body = to_prometheus(registry).encode('utf8')
+    start_response('200 OK', [
+        ('Content-Type', 'text/plain; version=0.0.4; charset=utf-8'),
+        ('Content-Length', str(len(body))),
+    ])
+    return [body]
+
+
+###############################################################################
+# statsd                                                                      #
+###############################################################################
+
+_unsafe_chars = re.compile(r'[^\w\-]')
+
+
+def _statsd_name(value):
+    return _unsafe_chars.sub('_', value)
+
+
+class StatsdSink(object):
+    """Send the metrics of each validation to statsd in one UDP packet.
+
+    Names are `<prefix>[.<label>].<paramset>[.<field>].<metric>`, with
+    unsafe chars (including the dots of the ParamSet module) replaced by `_`,
+    metrics are `calls` and `invalid` counters, `errors.<code>` counters and
+    the `latency` timer in milliseconds.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='params', fields=True):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.fields = fields
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _lines(self, name, elapsed, codes):
+        lines = []
+        if elapsed is not None:
+            lines.append('{}.calls:1|c'.format(name))
+            lines.append('{}.latency:{:.6f}|ms'.format(name, elapsed * 1000))
+        if codes:
+            lines.append('{}.invalid:1|c'.format(name))
+            for code in codes:
+                lines.append('{}.errors.{}:1|c'.format(name, _statsd_name(code)))
+        return lines
+
+    def record(self, label, paramset, elapsed, codes, fields):
+        name = self.prefix
+        if label:
+            name += '.' + _statsd_name(label)
+        name += '.' + _statsd_name(paramset)
+
+        lines = self._lines(name, elapsed, codes)
+        if self.fields and fields:
+            for key, field_elapsed, field_codes, _ in fields:
+                lines.extend(self._lines(
+                    '{}.{}'.format(name, _statsd_name(key)), field_elapsed, field_codes))
+        try:
+            self._sock.sendto('\n'.join(lines).encode('utf8'), self.address)
+        except (socket.error, OSError):
+            # metrics never break validation
+            pass
+
+    def close(self):
+        self._sock.close()
@@ -0,0 +1,140 @@
+# coding: utf-8
+
+"""
+Validate large datasets against a ParamSet class with a process pool.
+
+The ParamSet class must be importable by the worker processes, which means
+it should be defined at module level, `define_params` results could not
+be used.
+"""
+
+import six
+import itertools
+from collections import deque
+from multiprocessing import Pool, cpu_count
+from .core import FieldErrorInfo, InvalidParams
+from .utils import iter_json_lines
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+__all__ = [
+    'validate_parallel',
+]
+
+
+def _validate_item(params_cls, item, convert_fields):
+    """Validate one item in worker, return record values or error tuples"""
+    try:
+        params = params_cls(item, raise_if_invalid=False, convert_fields=convert_fields, copy_raw=False)
+    except InvalidParams as e:
+        return None, [(i.key, six.text_type(i.message)) for i in e.errors]
+    if params.errors:
+        return None, [(i.key, six.text_type(i.message)) for i in params.errors]
+    return params.to_record().values(), None
+
+
+def _validate_chunk(args):
+    params_cls, convert_fields, items = args
+    return [_validate_item(params_cls, i, convert_fields) for i in items]
+
+
+def _validate_lines_chunk(args):
+    params_cls, convert_fields, source, start, end = args
+    if isinstance(source, bytes):
+        data = source
+    else:
+        shm = shared_memory.SharedMemory(name=source)
+        try:
+            data = bytes(shm.buf[start:end])
+        finally:
+            shm.close()
+
+    results = []
+    for item, error in iter_json_lines(data.splitlines()):
+        if error is not None:
+            results.append((None, [(None, error)]))
+        else:
+            results.append(_validate_item(params_cls, item, convert_fields))
+    return results
+
+
+def _chunk_items(iterable, chunksize):
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _chunk_bounds(data, chunk_bytes):
+    """Split bytes into (start, end) ranges ending at newlines"""
+    start = 0
+    size = len(data)
+    while start < size:
+        end = data.find(b'\n', min(start + chunk_bytes, size))
+        end = size if end == -1 else end + 1
+        yield start, end
+        start = end
+
+
+def validate_parallel(params_cls, iterable, workers=None, chunksize=1000, convert_fields=False,
+                      chunk_bytes=1 << 20):
+    """Validate items with a process pool, yield `(index, record, errors)`
+    in input order, `record` is None if the item is invalid, `errors` is
+    a list of FieldErrorInfo.
+
+    `iterable` could be an iterable of dicts, which is sent to workers in
+    chunks of `chunksize`, or NDJSON bytes, which workers read from shared
+    memory in chunks of about `chunk_bytes`. Blank lines are skipped.
+    """
+    record_cls = params_cls.record_class()
+    shm = None
+    if isinstance(iterable, bytes):
+        data = iterable
+        if shared_memory is not None and data:
+            shm = shared_memory.SharedMemory(create=True, size=len(data))
+            shm.buf[:len(data)] = data
+            tasks = (
+                (params_cls, convert_fields, shm.name, start, end)
+                for start, end in _chunk_bounds(data, chunk_bytes))
+        else:
+            tasks = (
+                (params_cls, convert_fields, data[start:end], 0, 0)
+                for start, end in _chunk_bounds(data, chunk_bytes))
+        func = _validate_lines_chunk
+    else:
+        tasks = (
+            (params_cls, convert_fields, chunk)
+            for chunk in _chunk_items(iterable, chunksize))
+        func = _validate_chunk
+
+    workers = workers or cpu_count()
+    pool = Pool(workers)
+    # keep a bounded number of chunks in flight so that input is consumed
+    # as results are consumed
+    max_pending = workers * 2
+    pending = deque()
+    index = 0
+    try:
+        for task in itertools.chain(tasks, [None]):
+            if task is not None:
+                pending.append(pool.apply_async(func, (task, )))
+                if len(pending) < max_pending:
+                    continue
+            while pending and (task is None or len(pending) >= max_pending):
+                for values, errors in pending.popleft().get():
+                    if errors is None:
+                        yield index, record_cls(*values), []
+                    else:
+                        yield index, None, [FieldErrorInfo(k, m) for k, m in errors]
+                    index += 1
+    finally:
+        pool.terminate()
+        pool.join()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,162 @@
+# coding: utf-8
+
+"""
+Sampler of slow validations.
+
+`SlowSampler` records each `ParamSet.validate` that takes longer than
+`threshold` seconds, with the time of each field, each step of field
+validation (null, convert, type, choices and the checks of each field
+class, see `Field._traced_validate`) and each `validate_*` hook, and the
+shape of raw data: key names, types, and lengths of lists and strings,
+never the values. Records are kept in a ring buffer of `capacity` records,
+which could be dumped as JSON.
+
+Usage:
+
+    sampler = SlowSampler(threshold=0.1)
+    sampler.start()
+    ...
+    sampler.dump('/tmp/slow.json')
+
+The sampler is an observer of `params.metrics`. Usually only the whole
+validation is timed, compiled ParamSets keep their generated validators,
+so the cost is fixed. After a slow validation of a class, the next
+`trace_count` validations of the class are traced step by step during
+validation (never validated again), so that slow ones among them are
+recorded with the breakdown, the first one only has the shape. Then the
+class is timed as a whole again until the next slow validation. At most
+one slow validation is captured in `min_interval` seconds, the others are
+only counted. Validations not recorded by `params.metrics` are not
+sampled either.
+"""
+
+import json
+import time
+import threading
+from collections import deque
+from . import metrics
+from .utils import basestring_type
+
+__all__ = [
+    'SlowSampler',
+    'payload_shape',
+]
+
+
+def payload_shape(value, max_depth=4, max_keys=50):
+    """Return the shape of a value without the values, dicts show at most
+    `max_keys` keys, lists show the shape of their first item.
+    """
+    if isinstance(value, dict):
+        shape = {'type': 'dict', 'length': len(value)}
+        if max_depth > 0:
+            keys = {}
+            for k in value:
+                if len(keys) == max_keys:
+                    shape['truncated'] = True
+                    break
+                keys[u'{}'.format(k)[:100]] = payload_shape(value[k], max_depth - 1, max_keys)
+            shape['keys'] = keys
+        return shape
+    if isinstance(value, (list, tuple)):
+        shape = {'type': 'list', 'length': len(value)}
+        if value and max_depth > 0:
+            shape['item'] = payload_shape(value[0], max_depth - 1, max_keys)
+        return shape
+    if isinstance(value, (basestring_type, bytes)):
+        return {'type': 'str', 'length': len(value)}
+    return {'type': type(value).__name__}
+
+
+class SlowSampler(object):
+    """Ring buffer of slow validations, see the module docstring"""
+
+    def __init__(self, threshold=0.1, capacity=100, min_interval=1.0, max_depth=4, max_keys=50, trace_count=10):
+        self.threshold = threshold
+        self.min_interval = min_interval
+        self.trace_count = trace_count
+        self.max_depth = max_depth
+        self.max_keys = max_keys
+        # number of slow validations not captured because of min_interval
+        self.dropped = 0
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._next_capture = 0
+        # {ParamSet class: number of validations left to trace}, classes
+        # with 0 left are dropped at their next validation
+        self._traced = {}
+
+    def start(self):
+        metrics.add_observer(self)
+
+    def stop(self):
+        metrics.remove_observer(self)
+
+    def trace_level(self, params_cls):
+        """Called once for each validation of `params_cls`"""
+        if params_cls not in self._traced:
+            return metrics.TRACE_NONE
+        with self._lock:
+            left = self._traced.get(params_cls)
+            if not left:
+                self._traced.pop(params_cls, None)
+                return metrics.TRACE_NONE
+            self._traced[params_cls] = left - 1
+        return metrics.TRACE_STEPS
+
+    def observe(self, trace):
+        if trace.elapsed < self.threshold:
+            return
+        now = time.time()
+        with self._lock:
+            # slow ones being traced don't extend the tracing
+            if self.trace_count and trace.params.__class__ not in self._traced:
+                self._traced[trace.params.__class__] = self.trace_count
+            if now < self._next_capture:
+                self.dropped += 1
+                return
+            self._next_capture = now + self.min_interval
+
+        record = self._capture(trace)
+        record['time'] = now
+        with self._lock:
+            self._records.append(record)
+
+    def _capture(self, trace):
+        params = trace.params
+        fields = hooks = None
+        if trace.fields is not None:
+            fields = [
+                {'key': f.key, 'elapsed': f.elapsed, 'errors': f.codes or [], 'steps': f.steps}
+                for f in trace.fields]
+            hooks = [{'name': name, 'elapsed': elapsed} for name, elapsed in trace.hooks]
+
+        return {
+            'paramset': metrics.paramset_name(params.__class__),
+            'label': trace.label,
+            'elapsed': trace.elapsed,
+            'errors': trace.codes,
+            # None if the class was not traced yet
+            'fields': fields,
+            'hooks': hooks,
+            'shape': payload_shape(params._raw_data, self.max_depth, self.max_keys),
+        }
+
+    def records(self):
+        """Return the records from the oldest to the newest"""
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        """Clear the records and stop tracing classes"""
+        with self._lock:
+            self._records.clear()
+            self._traced.clear()
+            self.dropped = 0
+
+    def dumps(self):
+        return json.dumps({'dropped': self.dropped, 'records': self.records()}, sort_keys=True)
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            f.write(self.dumps())
@@ -1,9 +1,14 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import re
 import sys
 import json
 import copy
+import codecs
+import inspect
+import threading
+from collections import OrderedDict, namedtuple
 from .compat import PY3, unicode_ as u_
 
 
@@ -80,6 +85,180 @@ def json_decode(value):
     return json.loads(value)
 
 
+def iter_json_lines(lines):
+    """Decode NDJSON lines (bytes or str), blank lines are skipped.
+
+    Yield `(value, None)` for each line, or `(None, error_message)` if the
+    line could not be decoded.
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf8')
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError as e:
+            yield None, 'Could not parse line as json: {}'.format(e)
+
+
+class JSONArrayReader(object):
+    """Incrementally decode a JSON array from a file-like object, each
+    element is decoded only when it's iterated, so that the whole array
+    never needs to be in memory.
+
+    The opening bracket is read when the reader is created, ValueError
+    is raised if the data is not a JSON array.
+    """
+    _whitespace = ' \t\n\r'
+    # a truncated literal or number ('-Infinit') is shorter than this
+    _max_token = 9
+
+    def __init__(self, fp, chunk_size=65536):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf8')()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+        if self._next_char() != '[':
+            raise ValueError('Expecting a JSON array')
+        self._pos += 1
+
+    def _read(self, size=None):
+        """Read more data into buffer, return False on EOF"""
+        if self._eof:
+            return False
+        chunk = self.fp.read(size or self.chunk_size)
+        if not chunk:
+            self._eof = True
+            self._buf += self._text_decoder.decode(b'', final=True)
+            return False
+        if isinstance(chunk, bytes):
+            chunk = self._text_decoder.decode(chunk)
+        # drop the consumed data
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _next_char(self):
+        """Skip whitespaces, return the next char or '' on EOF"""
+        while True:
+            buf = self._buf
+            pos = self._pos
+            while pos < len(buf) and buf[pos] in self._whitespace:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._read():
+                return ''
+
+    def _decode_value(self):
+        self._next_char()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except ValueError as e:
+                # malformed data is never read to the end
+                if self._is_truncated(e) and self._read(max(self.chunk_size, len(self._buf))):
+                    continue
+                raise
+            # a number at the end of buffer may be incomplete ('1.' of '1.5')
+            if len(self._buf) - end < self._max_token and self._read():
+                continue
+            self._pos = end
+            return value
+
+    def _is_truncated(self, error):
+        """Return True if the decode error could be caused by the end of
+        buffer, rather than malformed data.
+        """
+        message = str(error)
+        if message.startswith('Unterminated string'):
+            return True
+        pos = getattr(error, 'pos', None)
+        if pos is None:
+            # Python 2 only has the position in the message
+            match = re.search(r'\(char (\d+)', message)
+            if match is None:
+                return True
+            pos = int(match.group(1))
+        return len(self._buf) - pos < self._max_token
+
+    def __iter__(self):
+        if self._next_char() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            c = self._next_char()
+            self._pos += 1
+            if c == ']':
+                return
+            if c != ',':
+                raise ValueError('Expecting \',\' delimiter or \']\' in JSON array')
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache(object):
+    """A bounded mapping that evicts the least recently used key, with
+    hit/miss counters like `functools.lru_cache`.
+    """
+    def __init__(self, maxsize=1024):
+        if maxsize <= 0:
+            raise ValueError('maxsize must be > 0, got {}'.format(maxsize))
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            # move to the end as the most recently used
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            data = self._data
+            data.pop(key, None)
+            data[key] = value
+            if len(data) > self.maxsize:
+                data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return '<LRUCache: {}>'.format(self.info())
+
+
+def is_coroutine_function(func):
+    # inspect.iscoroutinefunction is only available since Python 3.5
+    iscoroutinefunction = getattr(inspect, 'iscoroutinefunction', None)
+    return bool(iscoroutinefunction and iscoroutinefunction(func))
+
+
 def is_empty_string(v):
     if v == '' or v == u_(''):
         return True
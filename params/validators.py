@@ -0,0 +1,246 @@
+# coding: utf-8
+
+"""
+Linear time validators and regex pattern checking.
+
+`is_email` and `is_url` accept exactly the same strings as `EMAIL_REGEX`
+and `URL_REGEX` in `params.fields` (with `search`), without backtracking.
+The value is split by the delimiters of the grammar (`@`, `.`, `:`, `/`),
+then each part is checked by a regex of a single repeated character
+class, which is copied from the original regexes, so that case-insensitive
+matching of non-ASCII characters (e.g. u'\\u212a' for 'k') is the same.
+
+`find_unsafe_repeat` finds the quantifiers of a pattern that may cause
+catastrophic backtracking, it's used by `RegexField(check_pattern=True)`.
+"""
+
+import re
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+__all__ = [
+    'is_email',
+    'is_url',
+    'find_unsafe_repeat',
+]
+
+
+def _chars(char_class):
+    """Return a function that tests if all chars of a string are in the class"""
+    return re.compile(char_class + r'*\Z', re.IGNORECASE).match
+
+
+_atext_dot = _chars(r"[-!#$%&'*+/=?^_`{}|~0-9A-Z.]")
+_qtext = _chars(r'[\001-\010\013\014\016-\037!#-\[\]-\177]')
+_quoted_pair = _chars(r'[\001-011\013\014\016-\177]')
+_alpha = _chars(r'[A-Z]')
+_alnum_hyphen = _chars(r'[A-Z0-9-]')
+_alnum_hyphen_dot = _chars(r'[A-Z0-9-.]')
+_digits = _chars(r'\d')
+_search_whitespace = re.compile(r'\s').search
+_search_host_end = re.compile(r'[:/?]').search
+_search_path_start = re.compile(r'[/?]').search
+_match_scheme = re.compile(r'(?:http|ftp)s?://', re.IGNORECASE).match
+_match_localhost = re.compile(r'localhost\Z', re.IGNORECASE).match
+
+
+def _strip_newline(value):
+    # `$` also matches before a newline at the end
+    if value.endswith('\n'):
+        return value[:-1]
+    return value
+
+
+def _is_dot_atom(value):
+    return (
+        bool(value) and value[0] != '.' and value[-1] != '.' and
+        '..' not in value and bool(_atext_dot(value)))
+
+
+def _is_quoted_string(value):
+    if len(value) < 2 or value[0] != '"' or value[-1] != '"':
+        return False
+    value = value[1:-1]
+    pos = 0
+    while True:
+        # backslash is not in qtext, it always starts a quoted pair
+        i = value.find('\\', pos)
+        if i == -1:
+            return bool(_qtext(value, pos))
+        if not _qtext(value, pos, i) or i + 1 == len(value) or not _quoted_pair(value[i + 1]):
+            return False
+        pos = i + 2
+
+
+def _is_domain(value, is_tld):
+    """`(?:label\\.)+tld\\.?`, label is `[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?`"""
+    if value.endswith('.'):
+        value = value[:-1]
+    labels, dot, tld = value.rpartition('.')
+    if not dot or not is_tld(tld) or not _alnum_hyphen_dot(labels):
+        return False
+    # all chars are in the class, only hyphens at both ends are not allowed
+    return all(
+        0 < len(label) <= 63 and label[0] != '-' and label[-1] != '-'
+        for label in labels.split('.'))
+
+
+def _is_email_tld(value):
+    return 2 <= len(value) <= 6 and bool(_alpha(value))
+
+
+def _is_url_tld(value):
+    # `[A-Z]{2,6}` is a subset of `[A-Z0-9-]{2,}`
+    return len(value) >= 2 and bool(_alnum_hyphen(value))
+
+
+def _is_ip(value):
+    parts = value.split('.')
+    return len(parts) == 4 and all(0 < len(part) <= 3 and _digits(part) for part in parts)
+
+
+def is_email(value):
+    """Same as `EMAIL_REGEX.search(value)`, in linear time"""
+    value = _strip_newline(value)
+    # `@` is only allowed in quoted local part, never in domain
+    local, at, domain = value.rpartition('@')
+    if not at:
+        return False
+    if not (_is_dot_atom(local) or _is_quoted_string(local)):
+        return False
+    return _is_domain(domain, _is_email_tld)
+
+
+def is_url(value):
+    """Same as `URL_REGEX.search(value)`, in linear time"""
+    value = _strip_newline(value)
+    m = _match_scheme(value)
+    if m is None:
+        return False
+    pos = m.end()
+
+    # none of `:/?` is allowed in host
+    m = _search_host_end(value, pos)
+    end = m.start() if m else len(value)
+    host = value[pos:end]
+    if not (_match_localhost(host) or _is_ip(host) or _is_domain(host, _is_url_tld)):
+        return False
+    pos = end
+
+    if value.startswith(':', pos):
+        m = _search_path_start(value, pos)
+        end = m.start() if m else len(value)
+        port = value[pos + 1:end]
+        if not port or not _digits(port):
+            return False
+        pos = end
+
+    # `(?:/?|[/?]\S+)$`
+    path = value[pos:]
+    if path in ('', '/'):
+        return True
+    return len(path) > 1 and _search_whitespace(path, 1) is None
+
+
+_repeat_ops = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+_unbounded = sre_parse.MAXREPEAT
+
+
+def _iter_subpatterns(op, av):
+    """Yield the sub patterns of an item of a parsed pattern"""
+    if op in _repeat_ops:
+        yield av[2]
+    elif op == sre_parse.SUBPATTERN:
+        yield av[-1]
+    elif op == sre_parse.BRANCH:
+        for p in av[1]:
+            yield p
+    elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+        yield av[1]
+    elif op == sre_parse.GROUPREF_EXISTS:
+        yield av[1]
+        if av[2] is not None:
+            yield av[2]
+    elif op == getattr(sre_parse, 'ATOMIC_GROUP', None):
+        yield av
+    elif op == getattr(sre_parse, 'POSSESSIVE_REPEAT', None):
+        yield av[2]
+
+
+def _has_variable_repeat(p):
+    for op, av in p:
+        if op in _repeat_ops and av[0] != av[1]:
+            return True
+        if any(_has_variable_repeat(sub) for sub in _iter_subpatterns(op, av)):
+            return True
+    return False
+
+
+def _has_unbounded_repeat(p):
+    for op, av in p:
+        if op in _repeat_ops and av[1] == _unbounded:
+            return True
+        if any(_has_unbounded_repeat(sub) for sub in _iter_subpatterns(op, av)):
+            return True
+    return False
+
+
+def _first_literal(p):
+    """Return the first char of a sub pattern if it's a literal, else None"""
+    items = list(p)
+    while items:
+        op, av = items[0]
+        if op == sre_parse.LITERAL:
+            return av
+        if op != sre_parse.SUBPATTERN:
+            return None
+        items = list(av[-1])
+    return None
+
+
+def _has_overlapping_branches(p):
+    """Return True if p has an alternation whose branches may start with
+    the same char, which is only known for sure when they start with
+    literals, an empty branch overlaps with all the others.
+    """
+    for op, av in p:
+        if op == sre_parse.BRANCH:
+            firsts = [_first_literal(branch) for branch in av[1]]
+            if None in firsts or len(set(firsts)) != len(firsts):
+                return True
+        if any(_has_overlapping_branches(sub) for sub in _iter_subpatterns(op, av)):
+            return True
+    return False
+
+
+def _find_unsafe_repeat(p):
+    for op, av in p:
+        if op in _repeat_ops:
+            min_, max_, sub = av
+            if max_ > 1 and _has_variable_repeat(sub) and (max_ == _unbounded or _has_unbounded_repeat(sub)):
+                return 'nested quantifiers'
+            if max_ == _unbounded and _has_overlapping_branches(sub):
+                return 'quantified alternation of overlapping branches'
+        for sub in _iter_subpatterns(op, av):
+            reason = _find_unsafe_repeat(sub)
+            if reason:
+                return reason
+    return None
+
+
+def find_unsafe_repeat(pattern, flags=0):
+    """Return the reason if the pattern has quantifiers that may cause
+    catastrophic backtracking, else None.
+
+    Two kinds of quantifiers are found: a variable quantifier inside another
+    one, when either of them is unbounded, like `(a+)+` or `(a{1,2})*`, and
+    an unbounded quantifier of alternation whose branches may match the same
+    text, like `(a|ab)*`. Possessive quantifiers never backtrack, but their
+    sub patterns are checked as well.
+    """
+    if hasattr(pattern, 'pattern'):
+        pattern, flags = pattern.pattern, pattern.flags
+    return _find_unsafe_repeat(sre_parse.parse(pattern, flags))
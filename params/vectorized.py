@@ -0,0 +1,217 @@
+# coding: utf-8
+
+"""
+Validate a column of values against a field with NumPy array operations.
+
+NumPy is an optional dependency, install it with `pip install params[numpy]`.
+
+Kernels exist for `IntegerField`, `FloatField` and `StringField`, they check
+type, null values, min/max, length and choices for the whole column at once.
+Columns the kernels could not handle (mixed types, conversion, other field
+classes) are validated value by value with `Field.validate`. Either way error
+messages are produced by `Field.validate` on the invalid values, so they are
+the same as the scalar path.
+"""
+
+import six
+from .fields import StringField, IntegerField, FloatField
+from .choices import ChoiceSet
+from .utils import basestring_type
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = [
+    'ColumnResult',
+    'validate_column',
+]
+
+
+class _Unsupported(Exception):
+    """Raised by kernels for columns that could only be validated by value"""
+
+
+class ColumnResult(object):
+    """Result of `validate_column`.
+
+    `mask` is a boolean array, True for valid values, error messages of
+    invalid values are rendered only when `errors` or `error` is accessed.
+    """
+    def __init__(self, field, values, mask, convert=False):
+        self.field = field
+        self.values = values
+        self.mask = mask
+        self.convert = convert
+
+    @property
+    def valid(self):
+        return bool(self.mask.all())
+
+    @property
+    def invalid_indices(self):
+        return np.flatnonzero(~self.mask)
+
+    def error(self, index):
+        """Error message of the value at `index`, None if it's valid"""
+        value = self.values[index]
+        if isinstance(value, np.generic):
+            value = value.item()
+        try:
+            self.field.validate(value, convert=self.convert)
+        except (TypeError, ValueError) as e:
+            return str(e)
+        return None
+
+    @property
+    def errors(self):
+        return dict((int(i), self.error(i)) for i in self.invalid_indices)
+
+    def __repr__(self):
+        return '<ColumnResult: total={} invalid={}>'.format(
+            len(self.mask), int(len(self.mask) - self.mask.sum()))
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('numpy is required by params.vectorized, install it by `pip install params[numpy]`')
+
+
+def _fromiter(iterable, n, dtype=bool):
+    return np.fromiter(iterable, dtype=dtype, count=n)
+
+
+def _contains_func(values):
+    """Return a `__contains__` function of `values` with the same result
+    as `in`, use a set if all the values are hashable.
+    """
+    if isinstance(values, ChoiceSet):
+        return values.__contains__
+    try:
+        return frozenset(values).__contains__
+    except TypeError:
+        return values.__contains__
+
+
+def _scalar_mask(field, values, convert):
+    def is_valid(value):
+        try:
+            field.validate(value, convert=convert)
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    if isinstance(values, np.ndarray):
+        values = values.tolist()
+    return _fromiter(map(is_valid, values), len(values))
+
+
+def _number_kernel(field, values):
+    n = len(values)
+    if isinstance(field, IntegerField):
+        kinds = 'biu'
+        types = set([int, bool] + list(six.integer_types))
+    else:
+        kinds = 'biuf'
+        types = set([int, bool, float] + list(six.integer_types))
+
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind not in 'biuf':
+            raise _Unsupported()
+        arr = values
+        type_ok = values.dtype.kind in kinds
+    else:
+        if not set(map(type, values)) <= types:
+            raise _Unsupported()
+        try:
+            arr = np.asarray(values)
+        except OverflowError:
+            raise _Unsupported()
+        if arr.dtype.kind not in 'biuf':
+            raise _Unsupported()
+        type_ok = True
+
+    number_types = (float, ) + six.integer_types
+    null = np.zeros(n, dtype=bool)
+    for v in field.null_values:
+        if isinstance(v, number_types):
+            null |= arr == v
+
+    ok = np.full(n, type_ok, dtype=bool)
+    if field.choices:
+        choices = [c for c in field.choices if isinstance(c, number_types)]
+        ok &= np.isin(arr, choices)
+    # same as the scalar path for nan, which is never < or > a number
+    if field.min is not None:
+        ok &= ~(arr < field.min)
+    if field.max is not None:
+        ok &= ~(arr > field.max)
+    return np.where(null, bool(field.null), ok)
+
+
+def _string_kernel(field, values):
+    n = len(values)
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind != 'U':
+            raise _Unsupported()
+        lens = np.char.str_len(values)
+        null = np.zeros(n, dtype=bool)
+        for v in field.null_values:
+            if isinstance(v, basestring_type):
+                null |= values == v
+        if field.choices:
+            choices = [c for c in field.choices if isinstance(c, basestring_type)]
+            choices_ok = np.isin(values, choices)
+    else:
+        if not set(map(type, values)) <= set([str, six.text_type]):
+            raise _Unsupported()
+        lens = _fromiter(map(len, values), n, dtype=np.intp)
+        null = _fromiter(map(_contains_func(field.null_values), values), n)
+        if field.choices:
+            choices_ok = _fromiter(map(_contains_func(field.choices), values), n)
+
+    ok = np.ones(n, dtype=bool)
+    length = field.length
+    if isinstance(length, int):
+        ok &= lens == length
+    elif length is not None:
+        ok &= (lens >= length[0]) & (lens <= length[1])
+    if field.choices:
+        ok &= choices_ok
+    return np.where(null, bool(field.null), ok)
+
+
+# only exact classes, subclasses may have other validations
+_kernels = {
+    IntegerField: _number_kernel,
+    FloatField: _number_kernel,
+    StringField: _string_kernel,
+}
+
+
+def validate_column(field, column, convert=False):
+    """Validate a column (list or ndarray) of values against `field`,
+    return a `ColumnResult`.
+    """
+    _require_numpy()
+    if isinstance(column, np.ndarray):
+        values = column
+        if values.dtype.kind == 'O':
+            values = values.tolist()
+    else:
+        values = list(column)
+
+    kernel = None
+    if not (convert or field.force_convert):
+        kernel = _kernels.get(type(field))
+
+    mask = None
+    if kernel is not None:
+        try:
+            mask = kernel(field, values)
+        except _Unsupported:
+            pass
+    if mask is None:
+        mask = _scalar_mask(field, values, convert)
+    return ColumnResult(field, values, mask, convert)
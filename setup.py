@@ -46,6 +46,10 @@ setup(
     packages=find_packages(),
     # Or if it's a single file package
     install_requires=get_requires(),
+    extras_require={
+        'numpy': ['numpy'],
+        'regex': ['regex'],
+    },
     # package_data={}
     # entry_points={'console_scripts': ['foo = package.module:main_func']}
 )
@@ -0,0 +1,123 @@
+# coding: utf-8
+
+import time
+import asyncio
+import pytest
+import params
+from params import aio
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class UserParams(params.ParamSet):
+    name = params.StringField(required=True)
+    age = params.IntegerField()
+
+    async def validate_name(self, value):
+        await asyncio.sleep(0)
+        if value == 'taken':
+            raise ValueError('name is taken')
+        return value.upper()
+
+    def validate_age(self, value):
+        return value + 1
+
+    async def validate_name_with_age(self):
+        await asyncio.sleep(0)
+        if self.data.get('age') == 2:
+            raise ValueError('too young')
+
+
+def test_avalidate():
+    p = run(UserParams.avalidate({'name': 'asuka', 'age': 13}))
+    assert p.name == 'ASUKA'
+    assert p.age == 14
+
+    with pytest.raises(params.InvalidParams):
+        run(UserParams.avalidate({'name': 'taken'}))
+
+    p = run(UserParams.avalidate({'name': 'taken', 'age': 1}, raise_if_invalid=False))
+    assert [(e.key, str(e)) for e in p.errors] == [
+        ('name', 'name: name is taken'), (None, 'too young')]
+
+    p = run(UserParams.avalidate({'age': 'x'}, raise_if_invalid=False, fail_fast=True))
+    assert len(p.errors) == 1
+
+
+def test_validate_with_async_hooks():
+    with pytest.raises(TypeError):
+        UserParams({'name': 'asuka'})
+
+
+def test_sync_hooks():
+    class P(params.ParamSet):
+        a = params.IntegerField()
+
+        def validate_a(self, value):
+            return value * 2
+
+    p = run(P.avalidate({'a': 1}))
+    assert p.a == 2
+    assert P({'a': 1}).a == 2
+
+
+def test_static_hooks():
+    class P(params.ParamSet):
+        a = params.IntegerField()
+
+        @staticmethod
+        async def validate_a(value):
+            await asyncio.sleep(0)
+            return value * 2
+
+        @classmethod
+        @aio.timeout(1)
+        async def validate_all(cls):
+            await asyncio.sleep(0)
+
+    assert P._plan.has_async_hooks
+    assert run(P.avalidate({'a': 1})).a == 2
+
+
+class SlowParams(params.ParamSet):
+    a = params.IntegerField()
+    hook_timeout = 0.5
+
+    async def validate_one(self):
+        await asyncio.sleep(0.2)
+        raise ValueError('one')
+
+    async def validate_two(self):
+        await asyncio.sleep(0.2)
+        raise ValueError('two')
+
+    @aio.timeout(0.05)
+    async def validate_a(self, value):
+        await asyncio.sleep(value)
+        return value
+
+
+def test_cross_hooks_concurrent():
+    start = time.time()
+    p = run(SlowParams.avalidate({'a': 0}, raise_if_invalid=False))
+    # cross hooks are run concurrently, errors are kept in order
+    assert time.time() - start < 0.35
+    assert [str(e) for e in p.errors] == ['one', 'two']
+
+
+def test_timeout():
+    p = run(SlowParams.avalidate({'a': 1}, raise_if_invalid=False))
+    assert [(e.key, str(e)) for e in p.errors][0] == ('a', 'a: validation timed out after 0.05 seconds')
+
+    class P(SlowParams):
+        hook_timeout = 0.1
+
+    p = run(P.avalidate({}, raise_if_invalid=False))
+    assert [str(e) for e in p.errors] == ['validation timed out after 0.1 seconds'] * 2
+
+
+def test_avalidate_list():
+    ps = run(aio.avalidate_list(UserParams, [{'name': 'a'}, {'name': 'b'}]))
+    assert [p.name for p in ps] == ['A', 'B']
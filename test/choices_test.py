@@ -0,0 +1,100 @@
+# coding: utf-8
+
+import os
+import time
+import pickle
+import pytest
+import params
+from params import ChoiceSet, Field, ListField
+
+
+def test_choice_set():
+    s = ChoiceSet(['b', 'a', 'c', 1])
+    assert 'a' in s
+    assert 1 in s
+    assert 'x' not in s
+    assert [1] not in s
+    assert len(s) == 4
+    assert s
+    assert not ChoiceSet()
+
+    # errors of mixed types are rendered without sorting
+    f = Field(choices=ChoiceSet(['b', 'a', 'c', 1]))
+    with pytest.raises(ValueError) as excinfo:
+        f.validate('z')
+    assert 'is not one of <ChoiceSet: 4 values:' in str(excinfo.value)
+
+    s = ChoiceSet(str(i) for i in range(100, 200))
+    assert s.range('150', '153') == ['150', '151', '152']
+    assert s.range(stop='102') == ['100', '101']
+    assert len(s.range('198')) == 2
+
+
+def test_repr():
+    s = ChoiceSet(str(i) for i in range(10000))
+    assert repr(s) == "<ChoiceSet: 10000 values: '0', '1', '10', '100', '1000', ...>"
+
+    f = Field(choices=s)
+    with pytest.raises(ValueError) as excinfo:
+        f.validate('x')
+    assert len(str(excinfo.value)) < 100
+
+    f = ListField(choices=s)
+    assert f.validate(['1', '2']) == ['1', '2']
+    with pytest.raises(ValueError):
+        f.validate(['1', 'x'])
+
+
+def test_file(tmpdir):
+    path = str(tmpdir.join('choices.txt'))
+    values = [u'AD', u'AE', u'中国', u'ZW', u'A', u'AD']
+    ChoiceSet.write_file(path, values)
+    with open(path, 'rb') as f:
+        assert f.read().decode('utf8') == u'A\nAD\nAE\nZW\n中国\n'
+
+    s = ChoiceSet.from_file(path)
+    for v in values:
+        assert v in s
+    for v in [u'', u'B', u'AD\n', u'AF', u'Z', u'ZZ', u'中', 1, None]:
+        assert v not in s
+    assert len(s) == 5
+    assert list(s) == sorted(set(values))
+    assert s.range(u'AD', u'ZX') == [u'AD', u'AE', u'ZW']
+    assert s.range(u'B') == [u'ZW', u'中国']
+    assert 'FileChoiceSet: 5 values' in repr(s)
+
+    s1 = pickle.loads(pickle.dumps(s))
+    assert u'AD' in s1
+
+    with pytest.raises(ValueError):
+        ChoiceSet.write_file(path, [u'a\nb'])
+
+    class P(params.ParamSet):
+        country = params.StringField(choices=s)
+
+    assert P({'country': 'AE'}).country == 'AE'
+    with pytest.raises(params.InvalidParams):
+        P({'country': 'XX'})
+
+
+def test_file_reload(tmpdir):
+    path = str(tmpdir.join('choices.txt'))
+    ChoiceSet.write_file(path, [])
+    s = ChoiceSet.from_file(path, check_interval=0.01)
+    assert not s
+    assert len(s) == 0
+    assert u'a' not in s
+
+    ChoiceSet.write_file(path, [u'a', u'b'])
+    time.sleep(0.02)
+    assert u'a' in s
+    assert len(s) == 2
+
+    s = ChoiceSet.from_file(path)
+    ChoiceSet.write_file(path, [u'c'])
+    assert u'c' not in s
+    assert s.reload()
+    assert not s.reload()
+    assert u'c' in s
+    assert u'a' not in s
+    assert os.listdir(str(tmpdir)) == ['choices.txt']
@@ -0,0 +1,157 @@
+# coding: utf-8
+
+import pytest
+import params
+from params.codegen import generate_source, compile_paramset
+
+
+class UserParams(params.ParamSet):
+    id = params.UUIDStringField(required=True)
+    name = params.WordField(
+        'name should be a 1~8 length string, and is required',
+        required=True, length=(1, 8))
+    email = params.EmailField(required=True)
+    age = params.IntegerField('age should be a 10~30 int', min=10, max=30)
+    score = params.FloatField(min=0.0)
+    role = params.StringField(choices=['admin', 'staff'], null=False)
+    code = params.StringField(length=3, key='the-code')
+    tags = params.ListField(item_field=params.IntegerField(), choices=[1, 2, 3])
+    is_staff = params.BooleanField(default=True)
+    anything = params.Field()
+
+    def validate_name(self, value):
+        if value == 'lilith':
+            raise ValueError('no angels')
+        return value
+
+    def validate_age(self, value):
+        if value is None:
+            return value
+        return value + 1
+
+    def validate_name_with_email(self):
+        name = self.data.get('name')
+        email = self.data.get('email')
+        if name and email and name not in email:
+            raise ValueError('name must be in email')
+
+
+class CompiledUserParams(UserParams):
+    compiled = True
+
+
+class StrictParams(params.ParamSet):
+    no_additional_keys = True
+    a = params.IntegerField(null=False, force_convert=True)
+
+
+class CompiledStrictParams(StrictParams):
+    compiled = True
+
+
+CASES = [
+    {'id': '216edfae-19c0-11e3-9e93-10604b8a89ab', 'name': 'asuka', 'email': 'asuka@nerv.com'},
+    {'id': 'x', 'name': 'lilith', 'email': 'lilith@nerv', 'age': 9, 'score': -1.0},
+    {'name': 'toooooolong', 'age': '12', 'score': '1.5', 'role': '', 'the-code': 'ab'},
+    {'name': 'a b', 'age': 31, 'role': 'boss', 'the-code': 'abc', 'tags': ['1', 4]},
+    {'name': '', 'age': '', 'role': 'admin', 'tags': [1, 2], 'is_staff': 'true', 'anything': [1]},
+    {'id': '1', 'name': 1, 'email': 1, 'age': 1.5, 'score': 'x', 'tags': 'x', 'is_staff': 1},
+    {},
+]
+
+
+def _result(cls, data, convert):
+    p = cls(data, raise_if_invalid=False, convert_fields=convert)
+    return p.data, [(e.key, str(e)) for e in p.errors]
+
+
+@pytest.mark.parametrize('data', CASES)
+@pytest.mark.parametrize('convert', [False, True])
+def test_compiled_same_as_interpreted(data, convert):
+    assert CompiledUserParams._validator is not None
+    assert UserParams._validator is None
+    assert _result(CompiledUserParams, data, convert) == _result(UserParams, data, convert)
+
+
+@pytest.mark.parametrize('data', [
+    {'a': '1'},
+    {'a': ''},
+    {'a': 'x', 'b': 1},
+    {'a': 1, 'b': 1, 'c': 2},
+])
+def test_compiled_strict(data):
+    assert _result(CompiledStrictParams, data, False) == _result(StrictParams, data, False)
+
+
+def test_compiled_raises():
+    with pytest.raises(params.InvalidParams) as excinfo:
+        CompiledUserParams({})
+    assert len(excinfo.value.errors) == 3
+
+    with pytest.raises(params.InvalidParams):
+        CompiledUserParams([])
+
+    class DemoParams(params.ParamSet):
+        compiled = True
+        a = params.Field(null=False)
+
+        def validate_a(self, value):
+            pass
+
+    with pytest.raises(AssertionError):
+        DemoParams({'a': 1})
+
+
+def test_compile_paramset():
+    class P(params.ParamSet):
+        a = params.IntegerField(max=3)
+
+    assert P._validator is None
+    compile_paramset(P)
+    assert P._validator is not None
+    assert P({'a': 1}).a == 1
+    with pytest.raises(params.InvalidParams):
+        P({'a': 4})
+
+    class SubP(P):
+        b = params.Field()
+
+    # generated validator is not inherited
+    assert SubP._validator is None
+    assert SubP({'a': 1, 'b': 2}).b == 2
+
+
+def test_generate_source():
+    source = generate_source(UserParams)
+    assert source.startswith('def build_validator(cls):')
+    assert 'match_1 = f_1._match' in source
+    compile(source, '<test>', 'exec')
+
+
+def test_cached_field():
+    class P(params.ParamSet):
+        compiled = True
+        a = params.IntegerField(max=3, cache=True)
+
+    assert 'value = f_0.validate(value, convert=convert)' in generate_source(P)
+    assert P({'a': 1}).a == 1
+    assert P({'a': 1}).a == 1
+    with pytest.raises(params.InvalidParams):
+        P({'a': 4})
+    assert P._fields['a'].cache.info().hits == 1
+
+
+def test_nested_field():
+    class Item(params.ParamSet):
+        compiled = True
+        n = params.IntegerField(required=True)
+
+    class P(params.ParamSet):
+        compiled = True
+        items = params.ListField(item_class=Item)
+        item = params.NestedField(Item)
+
+    assert P._validator is not None
+    with pytest.raises(params.InvalidParams) as excinfo:
+        P({'items': [{'n': 1}, {}], 'item': {'n': 'x'}})
+    assert sorted(i.key for i in excinfo.value.errors) == ['item.n', 'items[1].n']
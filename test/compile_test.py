@@ -0,0 +1,76 @@
+# coding: utf-8
+
+import sys
+import textwrap
+import importlib
+import pytest
+from params.compile import main, find_paramsets
+
+
+SCHEMAS = textwrap.dedent('''
+    import params
+
+    class UserParams(params.ParamSet):
+        name = params.WordField(required=True, length=(1, 8))
+        age = params.IntegerField(min=10, max=30)
+
+        def validate_name(self, value):
+            return value.lower()
+
+    PageParams = params.define_params({
+        'page': params.IntegerField(min=1),
+    })
+
+    Alias = UserParams
+    ZAlias = PageParams
+''')
+
+
+@pytest.fixture
+def schemas_dir(tmpdir):
+    tmpdir.join('aot_schemas.py').write(SCHEMAS)
+    sys.path.insert(0, str(tmpdir))
+    yield tmpdir
+    sys.path.remove(str(tmpdir))
+    for name in ('aot_schemas', 'aot_schemas_validators'):
+        sys.modules.pop(name, None)
+
+
+def test_find_paramsets(schemas_dir):
+    schemas = importlib.import_module('aot_schemas')
+    assert [name for name, _ in find_paramsets(schemas)] == ['PageParams', 'UserParams']
+
+
+def test_compile(schemas_dir):
+    main(['aot_schemas'])
+    assert schemas_dir.join('aot_schemas_validators.py').check()
+
+    schemas = importlib.import_module('aot_schemas')
+    assert schemas.UserParams._validator is None
+    importlib.import_module('aot_schemas_validators')
+    assert schemas.UserParams._validator is not None
+    assert schemas.PageParams._validator is not None
+
+    p = schemas.UserParams({'name': 'Asuka', 'age': 12})
+    assert p.name == 'asuka'
+    with pytest.raises(schemas.params.InvalidParams) as excinfo:
+        schemas.UserParams({'age': 40})
+    assert len(excinfo.value.errors) == 2
+    with pytest.raises(schemas.params.InvalidParams):
+        schemas.PageParams({'page': 0})
+
+
+def test_compile_schema_changed(schemas_dir):
+    main(['aot_schemas', '-o', str(schemas_dir.join('aot_schemas_validators.py'))])
+    # the generated code depends on length being a tuple
+    schemas_dir.join('aot_schemas.py').write(SCHEMAS.replace('length=(1, 8)', 'length=3'))
+    sys.modules.pop('aot_schemas')
+
+    schemas = importlib.import_module('aot_schemas')
+    with pytest.warns(UserWarning):
+        importlib.import_module('aot_schemas_validators')
+    assert schemas.UserParams._validator is None
+    assert schemas.PageParams._validator is not None
+
+    with pytest.raises(schemas.params.InvalidParams):
+        schemas.UserParams({'name': 'asuka'})
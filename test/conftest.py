@@ -0,0 +1,8 @@
+# coding: utf-8
+
+import sys
+
+# coroutine functions are syntax errors before Python 3.5
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append('aio_test.py')
@@ -1,9 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import pickle
 import pytest
-from params.core import ParamSet, Field, InvalidParams, FieldErrorInfo
+from params.core import ParamSet, Field, InvalidParams, FieldErrorInfo, ErrorMessage
+from params.fields import IntegerField
 from params.utils import u_
+from params.compat import PY2
 
 
 def test_field_null():
@@ -182,6 +185,64 @@ def test_spawn():
     assert f.key == 'key0'
 
 
+def test_field_cache():
+    calls = []
+
+    class CountField(Field):
+        value_type = int
+
+        def _convert_type(self, value):
+            calls.append(value)
+            return int(value)
+
+    f = CountField(cache=2)
+    assert f.validate('1', convert=True) == 1
+    assert f.validate('1', convert=True) == 1
+    assert calls == ['1']
+    assert f.cache.info() == (1, 1, 2, 1)
+
+    # convert and type of value are part of the key
+    with pytest.raises(TypeError):
+        f.validate('1')
+    assert f.validate(1) == 1
+    assert f.validate(True) is True
+    assert f.validate(1) is not True
+
+    # errors are cached as well
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            f.validate('x', convert=True)
+    assert calls == ['1', 'x']
+
+    # least recently used is evicted
+    f.validate('1', convert=True)
+    f.validate('2', convert=True)
+    assert len(f.cache) == 2
+    with pytest.raises(ValueError):
+        f.validate('x', convert=True)
+    assert calls == ['1', 'x', '1', '2', 'x']
+
+    # unhashable values and containers are not cached
+    f = Field(cache=True)
+    assert f.validate([1]) == [1]
+    assert f.validate((1, )) == (1, )
+    assert len(f.cache) == 0
+
+    with pytest.raises(TypeError):
+        Field(cache='x')
+    assert Field().cache is None
+
+
+def test_field_cache_spawn():
+    f = Field(choices=['a'], cache=True)
+    with pytest.raises(ValueError):
+        f.validate('b')
+    f1 = f.spawn(choices=['a', 'b'])
+    assert f1.cache is not f.cache
+    assert f1.validate('b') == 'b'
+    assert f.spawn(cache=None).cache is None
+
+
 def test_invalid_params():
     e = InvalidParams(u'an error')
     print('InvalidParams 1: {}'.format(e))
@@ -197,3 +258,460 @@ def test_invalid_params():
         InvalidParams(['an error', 'two error'])
     with pytest.raises(TypeError):
         InvalidParams(1)
+
+
+def test_invalid_params_pickle():
+    e = pickle.loads(pickle.dumps(InvalidParams([FieldErrorInfo('a', 'foo')]), 2))
+    assert [(i.key, i.message) for i in e.errors] == [('a', 'foo')]
+
+
+def test_plan():
+    class P(ParamSet):
+        f0 = Field(key='0f')
+        f1 = Field()
+
+        def validate_f1(self, value):
+            return value + 1
+
+        def validate_all(self):
+            if self.data.get('f1') == 3:
+                raise ValueError('f1 should not be 3')
+
+    plan = P._plan
+    assert plan.keys == ('0f', 'f1')
+    assert plan.key_set == frozenset(['0f', 'f1'])
+    assert [(k, f) for k, f in plan.fields] == [('0f', P._fields['f0']), ('f1', P._fields['f1'])]
+    assert [k for k, _, _ in plan.field_hooks] == ['f1']
+    assert len(plan.cross_hooks) == 1
+    assert P.keys() == ['0f', 'f1']
+
+    # subclass gets its own plan with inherited fields and hooks
+    class SubP(P):
+        f2 = Field()
+
+        def validate_f2(self, value):
+            return value * 2
+
+    assert SubP._plan is not P._plan
+    assert SubP.keys() == ['0f', 'f1', 'f2']
+    assert [k for k, _, _ in SubP._plan.field_hooks] == ['f1', 'f2']
+    assert P.keys() == ['0f', 'f1']
+
+    p = SubP({'f1': 1, 'f2': 2})
+    assert p.f1 == 2
+    assert p.f2 == 4
+
+    with pytest.raises(InvalidParams) as excinfo:
+        SubP({'f1': 2})
+    assert excinfo.value.errors[0].message == 'f1 should not be 3'
+
+
+def test_plan_hook_descriptors():
+    class P(ParamSet):
+        f0 = IntegerField()
+        f1 = IntegerField()
+
+        @staticmethod
+        def validate_f0(value):
+            return value + 1
+
+        @classmethod
+        def validate_f1(cls, value):
+            return value + cls.step
+
+        @classmethod
+        def validate_all(cls):
+            if cls.step == 0:
+                raise ValueError('step should not be 0')
+
+    P.step = 10
+
+    class CompiledP(P):
+        compiled = True
+
+    for cls in (P, CompiledP):
+        p = cls({'f0': 1, 'f1': 1})
+        assert (p.f0, p.f1) == (2, 11)
+        assert cls.try_validate({'f0': 1, 'f1': 1}).params.data == {'f0': 2, 'f1': 11}
+
+    p = P({'f0': 1, 'f1': 1}, lazy=True)
+    assert (p.f0, p.f1) == (2, 11)
+    p.finalize()
+
+    P.step = 0
+    with pytest.raises(InvalidParams):
+        P({'f0': 1})
+
+
+def test_option_field_names():
+    class P(ParamSet):
+        compiled = Field()
+        lazy = IntegerField()
+        copy_raw = Field()
+        fail_fast = Field()
+        max_errors = Field()
+        hook_timeout = Field()
+
+    assert P._compiled is False
+    assert P._lazy is False
+    p = P({'compiled': 'a', 'lazy': 1, 'copy_raw': 'b', 'fail_fast': 'c', 'max_errors': 'd', 'hook_timeout': 'e'})
+    assert (p.compiled, p.lazy, p.copy_raw, p.fail_fast, p.max_errors, p.hook_timeout) == ('a', 1, 'b', 'c', 'd', 'e')
+
+    # options of the base class are kept
+    class SubP(P):
+        lazy = True
+
+    class SubSubP(SubP):
+        lazy = IntegerField()
+
+    assert SubSubP._lazy is True
+    p = SubSubP({'lazy': 2}, lazy=False)
+    assert p.lazy == 2
+
+    for name in ('data', 'errors', 'validate', 'keys', 'convert_fields'):
+        with pytest.raises(TypeError):
+            type('Reserved', (ParamSet,), {name: Field()})
+
+
+def test_copy_raw():
+    class P(ParamSet):
+        f0 = Field()
+
+    d = {'f0': [1, 2]}
+    p = P(d)
+    assert p.get_raw('f0') == d['f0']
+    assert p.get_raw('f0') is not d['f0']
+
+    p = P(d, copy_raw=False)
+    if not PY2:
+        assert p._raw_data is d
+        assert p.f0 is d['f0']
+
+    class NoCopyP(P):
+        copy_raw = False
+
+    p = NoCopyP(d)
+    if not PY2:
+        assert p._raw_data is d
+    p = NoCopyP(d, copy_raw=True)
+    assert p._raw_data is not d
+
+
+class RecordParams(ParamSet):
+    a = Field()
+    b = Field(default=2)
+
+
+def test_record():
+    class P(ParamSet):
+        f0 = Field(key='0f')
+        f1 = Field(default=1)
+        f2 = Field()
+
+    p = P({'0f': 0, 'f2': [2]})
+    r = p.to_record()
+    assert r.f0 == 0
+    assert r.f1 == 1
+    assert r.f2 == [2]
+    assert r.to_dict() == p.to_dict()
+    assert r.to_dict(include_none=True) == p.to_dict(include_none=True)
+    assert not hasattr(r, '__dict__')
+    with pytest.raises(AttributeError):
+        r.whatever = 1
+
+    record_cls = P.record_class()
+    assert record_cls is P.record_class()
+    assert record_cls.__name__ == 'PRecord'
+    assert r == record_cls(0, 1, [2])
+    assert r != record_cls(0, 1, [3])
+    assert 'f0=0' in repr(r)
+    with pytest.raises(TypeError):
+        record_cls(0)
+
+    r = RecordParams({'a': [1]}).to_record()
+    assert pickle.loads(pickle.dumps(r)) == r
+    assert pickle.loads(pickle.dumps(r, protocol=2)).values() == ([1], 2)
+
+    class Reserved(ParamSet):
+        values = Field()
+
+    with pytest.raises(TypeError):
+        Reserved.record_class()
+
+    class SubP(P):
+        f3 = Field()
+
+    assert SubP.record_class() is not record_cls
+    assert SubP({}).to_record().values() == (None, 1, None, None)
+
+
+def test_release_raw():
+    class P(ParamSet):
+        f0 = Field()
+
+    p = P({'f0': 1})
+    p.release_raw()
+    assert p.f0 == 1
+    with pytest.raises(ValueError):
+        p.get_raw('f0')
+
+
+def test_field_error_info_slots():
+    e = FieldErrorInfo('a', 'foo')
+    assert not hasattr(e, '__dict__')
+    assert str(e) == 'a: foo'
+
+
+def test_error_message():
+    class P(ParamSet):
+        f0 = Field(required=True)
+        f1 = Field('f1 is bad {}', null=False)
+        f2 = Field(choices=['a'])
+        no_additional_keys = True
+
+    with pytest.raises(InvalidParams) as excinfo:
+        P({'f1': '', 'f2': 'x' * 1000, 'f3': 1})
+    e = excinfo.value
+    assert [i.code for i in e.errors] == ['required', 'null', 'choices', 'additional_key']
+    # description replaces the text, the code and params are kept
+    assert e.errors[1].message == 'f1 is bad {}'
+    # long values are truncated when rendered
+    assert e.errors[2].message == 'value "{}..." is not one of [\'a\']'.format('x' * 200)
+
+    payload = e.to_payload()
+    assert payload[0] == {'key': 'f0', 'code': 'required', 'params': {'key': 'f0'}}
+    assert payload[1] == {'key': 'f1', 'code': 'null', 'params': {'value': ''}}
+    assert payload[2]['params']['choices'] == "['a']"
+    assert e.to_payload(messages=True)[0]['message'] == 'f0 is required'
+    # errors without code always have messages
+    assert InvalidParams('foo').to_payload() == [{'key': None, 'code': None, 'params': {}, 'message': 'foo'}]
+
+    e = pickle.loads(pickle.dumps(e, 2))
+    assert e.errors[0].code == 'required'
+    assert str(e).startswith('f0: f0 is required\n')
+
+
+def test_error_message_lazy():
+    class Value(object):
+        rendered = 0
+
+        def __str__(self):
+            Value.rendered += 1
+            return 'value'
+
+    f = Field(choices=[1])
+    with pytest.raises(ValueError) as excinfo:
+        f.validate(Value())
+    error = FieldErrorInfo('a', excinfo.value)
+    assert (error.code, Value.rendered) == ('choices', 0)
+    assert error.message == 'value "value" is not one of [1]'
+    assert Value.rendered == 1
+
+    assert str(ErrorMessage('max', 'max {values}', values=list(range(100)))) == \
+        'max [{}, ...]'.format(', '.join(str(i) for i in range(20)))
+
+
+def test_try_validate():
+    class P(ParamSet):
+        f0 = Field(required=True)
+        f1 = Field(choices=[1])
+
+        def validate_f1(self, value):
+            if value == 1:
+                raise ValueError('f1 should not be 1')
+            return value
+
+    result = P.try_validate({'f0': 0})
+    assert result and result.ok and result.errors == []
+    assert result.params.f0 == 0
+
+    result = P.try_validate({'f1': 2})
+    assert not result
+    assert [(i.key, i.code) for i in result.errors] == [('f0', 'required'), ('f1', 'choices')]
+
+    result = P.try_validate({'f0': 0, 'f1': 1})
+    assert [str(i) for i in result.errors] == ['f1: f1 should not be 1']
+
+    result = P.try_validate({'f1': 2}, fail_fast=True)
+    assert len(result.errors) == 1
+
+    result = P.try_validate('x')
+    assert [i.code for i in result.errors] == ['not_dict']
+
+
+def test_lazy():
+    calls = []
+
+    class P(ParamSet):
+        lazy = True
+        f0 = Field(required=True)
+        f1 = Field(null=False)
+        f2 = Field(default=2)
+
+        def validate_f0(self, value):
+            calls.append('f0')
+            return value * 10
+
+        def validate_all(self):
+            calls.append('all')
+
+    # required and additional keys are checked up front
+    with pytest.raises(InvalidParams):
+        P({'f1': 1})
+
+    p = P({'f0': 1, 'f1': ''})
+    assert calls == []
+    assert p.data == {}
+    assert p.f0 == 10
+    assert p.f0 == 10
+    assert calls == ['f0']
+    assert p.f2 == 2
+    assert not p.has('f2')
+
+    # errors surface at access time
+    with pytest.raises(InvalidParams) as excinfo:
+        p.f1
+    assert excinfo.value.errors[0].key == 'f1'
+    assert len(p.errors) == 1
+    # and on every access, never replaced by the default
+    with pytest.raises(InvalidParams):
+        p.f1
+    assert len(p.errors) == 1
+
+    with pytest.raises(InvalidParams):
+        p.finalize()
+    assert calls == ['f0', 'all']
+    assert p.finalize() is p
+    assert len(p.errors) == 1
+    with pytest.raises(InvalidParams):
+        p.f1
+
+    class Q(ParamSet):
+        lazy = True
+        a = IntegerField(default=7)
+
+    q = Q({'a': 'x'})
+    for _ in range(2):
+        with pytest.raises(InvalidParams):
+            q.a
+
+    p = P({'f0': 1, 'f1': 1}, lazy=False)
+    assert calls == ['f0', 'all', 'f0', 'all']
+    assert p.data == {'f0': 10, 'f1': 1}
+
+    p = P({'f0': 1, 'f1': 1})
+    assert p.finalize() is p
+    assert p.to_dict() == {'f0': 10, 'f1': 1, 'f2': 2}
+
+
+def test_fail_fast():
+    calls = []
+
+    class P(ParamSet):
+        no_additional_keys = True
+        f0 = Field(null=False)
+        f1 = Field(null=False)
+        f2 = Field(required=True)
+
+        def validate_all(self):
+            calls.append('all')
+            raise ValueError('all')
+
+    d = {'f0': '', 'f1': '', 'f3': 3}
+    p = P(d, raise_if_invalid=False)
+    assert [e.key for e in p.errors] == ['f0', 'f1', 'f2', 'f3', None]
+    assert calls == ['all']
+
+    # unknown keys are rejected before fields
+    p = P(d, raise_if_invalid=False, fail_fast=True)
+    assert [e.key for e in p.errors] == ['f3']
+    assert calls == ['all']
+
+    p = P(d, raise_if_invalid=False, max_errors=3)
+    assert [e.key for e in p.errors] == ['f3', 'f0', 'f1']
+
+    with pytest.raises(InvalidParams) as excinfo:
+        P({'f0': ''}, fail_fast=True)
+    assert len(excinfo.value.errors) == 1
+
+    class FailFastP(P):
+        fail_fast = True
+
+    p = FailFastP({'f0': ''}, raise_if_invalid=False)
+    assert len(p.errors) == 1
+    p = FailFastP({'f0': ''}, raise_if_invalid=False, fail_fast=False)
+    assert len(p.errors) == 3
+
+
+def test_batch_validate():
+    class P(ParamSet):
+        f0 = Field(required=True, key='0f')
+        f1 = Field(default=1)
+
+        def validate_f1(self, value):
+            if value == 'x':
+                raise ValueError('f1 should not be x')
+            return value
+
+    # batch_validate is not a hook
+    assert len(P._plan.cross_hooks) == 0
+
+    # validate_many is an ordinary hook
+    class H(ParamSet):
+        many = Field()
+
+        def validate_many(self, value):
+            raise ValueError('no')
+
+    assert len(H({'many': 1}, raise_if_invalid=False).errors) == 1
+
+    items = [{'0f': 0}, {'f1': 1}, 'not a dict', {'0f': 3, 'f1': 'x'}, {'0f': 4, 'f1': 4}]
+    result = P.batch_validate(items)
+    assert result.total == 5
+    assert result.valid_count == len(result) == 2
+    assert result.invalid_count == 3
+    assert result.indexes == [0, 4]
+    assert sorted(result.errors.keys()) == [1, 2, 3]
+    assert result.errors[3][0].message == 'f1 should not be x'
+    assert [p.f0 for p in result] == [0, 4]
+    assert result.columns() == {'0f': [0, 4], 'f1': [1, 4]}
+
+    result = P.batch_validate(items, as_records=True)
+    assert result.rows[1] == P.record_class()(4, 4)
+    assert result.columns() == {'0f': [0, 4], 'f1': [1, 4]}
+
+    result = P.batch_validate(iter([{'0f': 0}]), copy_raw=False)
+    assert result.valid_count == 1
+
+    result = P.batch_validate([{'f1': 'x'}], fail_fast=True)
+    assert len(result.errors[0]) == 1
+    assert result.errors[0][0].code == 'required'
+
+
+def test_iter_validate():
+    import io
+
+    class P(ParamSet):
+        f0 = Field(required=True)
+
+    def items():
+        yield {'f0': 0}
+        yield {}
+        yield 'not a dict'
+
+    results = P.iter_validate(items())
+    index, p, errors = next(results)
+    assert (index, p.f0, errors) == (0, 0, [])
+    index, p, errors = next(results)
+    assert (index, p, errors[0].key) == (1, None, 'f0')
+    index, p, errors = next(results)
+    assert (index, p, errors[0].message) == (2, None, 'params data is not a dict')
+    with pytest.raises(StopIteration):
+        next(results)
+
+    f = io.BytesIO(b'{"f0": 1}\n\n{"f0": 2}\nnot json\n{}\n')
+    results = list(P.iter_validate(f))
+    assert [i for i, _, _ in results] == [0, 1, 2, 3]
+    assert [p.f0 for _, p, _ in results[:2]] == [1, 2]
+    assert results[2][2][0].message.startswith('Could not parse line as json')
+    assert results[3][2][0].key == 'f0'
@@ -1,6 +1,7 @@
 # coding: utf-8
 
 import os
+import sys
 os.environ['DJANGO_SETTINGS_MODULE'] = 'djapp.settings'
 import django
 django.setup()
@@ -28,6 +29,16 @@ def test_funcview():
     print(resp.content)
 
 
+def test_get_raw_copies_lists():
+    from django.test import RequestFactory
+    from params.contrib.django import get_raw
+
+    request = RequestFactory().get('/func?a=1&b=x&b=y')
+    raw = get_raw(request)
+    raw['b'].append('z')
+    assert request.GET.getlist('b') == ['x', 'y']
+
+
 def test_classview():
     c = Client()
 
@@ -79,3 +90,37 @@ def test_jsonlistview():
     d = [{'a': 1}]
     resp = c.post('/jsonlist', json.dumps(d), content_type=content_type)
     print(resp.content)
+
+
+def test_jsonstreamview():
+    c = Client()
+    content_type = 'application/json'
+
+    # InvalidParams: request body must be a list
+    with pytest.raises(InvalidParams):
+        c.post('/jsonstream', json.dumps({'a': 1}), content_type=content_type)
+
+    resp = c.post('/jsonstream', json.dumps([{'a': 1}, {'a': 2}]), content_type=content_type)
+    assert str_(resp.content) == '1,2'
+
+    with pytest.raises(InvalidParams):
+        c.post('/jsonstream', json.dumps([{'a': 1}, {'a': 'x'}]), content_type=content_type)
+    with pytest.raises(InvalidParams):
+        c.post('/jsonstream', '[{"a": 1}, {"a"', content_type=content_type)
+
+    resp = c.post('/jsonstreamcap', json.dumps([{'a': 1}, {}]), content_type=content_type)
+    assert str_(resp.content) == '0,1'
+    with pytest.raises(InvalidParams):
+        c.post('/jsonstreamcap', json.dumps([{}, {'a': 1}, {}, {'a': 1}]), content_type=content_type)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 5), reason='requires asyncio')
+def test_asyncview():
+    c = Client()
+    content_type = 'application/json'
+
+    resp = c.post('/async', json.dumps({'a': 1}), content_type=content_type)
+    assert str_(resp.content) == '1'
+
+    with pytest.raises(InvalidParams):
+        c.post('/async', json.dumps({'a': 0}), content_type=content_type)
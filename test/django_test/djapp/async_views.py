@@ -0,0 +1,21 @@
+# coding: utf-8
+
+import asyncio
+from django.http import HttpResponse
+import params
+from params.contrib.django import use_params
+
+
+class AsyncParams(params.ParamSet):
+    a = params.IntegerField(required=True)
+
+    async def validate_a(self, value):
+        await asyncio.sleep(0)
+        if value == 0:
+            raise ValueError('a could not be 0')
+        return value
+
+
+@use_params(AsyncParams, is_json=True)
+async def asyncview(request):
+    return HttpResponse(str(request.params.a))
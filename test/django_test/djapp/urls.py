@@ -13,6 +13,7 @@ Including another URLconf
     1. Import the include() function: from django.conf.urls import url, include
     2. Add a URL to urlpatterns:  url(r'^blog/', include('blog.urls'))
 """
+import sys
 from django.conf.urls import url
 from . import views
 
@@ -22,4 +23,10 @@ urlpatterns = [
     url(r'^class$', views.ClassView.as_view()),
     url(r'^json$', views.jsonview),
     url(r'^jsonlist$', views.jsonlistview),
+    url(r'^jsonstream$', views.jsonstreamview),
+    url(r'^jsonstreamcap$', views.jsonstreamcapview),
 ]
+
+if sys.version_info >= (3, 5):
+    from . import async_views
+    urlpatterns.append(url(r'^async$', async_views.asyncview))
@@ -44,3 +44,17 @@ def jsonview(request):
 def jsonlistview(request):
     assert request.params[0].a == 1
     return HttpResponse(str(request.params))
+
+
+@use_params({
+    'a': params.IntegerField(required=True),
+}, is_json=True, is_list=True, stream=True)
+def jsonstreamview(request):
+    return HttpResponse(','.join(str(p.a) for p in request.params))
+
+
+@use_params({
+    'a': params.IntegerField(required=True),
+}, is_json=True, is_list=True, stream=True, raise_if_invalid=False, max_invalid=2)
+def jsonstreamcapview(request):
+    return HttpResponse(','.join(str(len(p.errors)) for p in request.params))
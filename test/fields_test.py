@@ -2,7 +2,7 @@
 
 import pytest
 import datetime
-from params.core import ParamSet, Field
+from params.core import ParamSet, Field, InvalidParams
 from params.fields import (
     StringField,
     RegexField,
@@ -12,6 +12,8 @@ from params.fields import (
     IntegerField,
     FloatField,
     ListField,
+    NestedField,
+    DictField,
     UUIDStringField,
     DatetimeField,
     BooleanField,
@@ -95,6 +97,26 @@ def test_regex(pattern, match, result):
             field.validate(match)
 
 
+def test_regex_options():
+    f = RegexField(pattern=r'^a+$', max_length=3)
+    assert f.validate('aaa') == 'aaa'
+    with value_error_ctx:
+        f.validate('aaaa')
+
+    with value_error_ctx:
+        RegexField(pattern=r'^(a+)+$', check_pattern=True)
+    assert RegexField(pattern=r'^a+$', check_pattern=True)
+
+
+def test_regex_timeout():
+    pytest.importorskip('regex')
+    f = RegexField(pattern=r'^(a|aa)+$', timeout=0.1)
+    assert f.validate('aaa') == 'aaa'
+    with pytest.raises(ValueError) as excinfo:
+        f.validate('a' * 40 + '!')
+    assert 'timed out' in str(excinfo.value)
+
+
 def test_words():
     f0 = WordField(null_values=(None, ))
     s = ''
@@ -270,6 +292,161 @@ def test_type_list_convert():
         list_field.validate(['a', '2', '3'], convert=True)
 
 
+def test_list_single_pass():
+    calls = []
+
+    class CountField(IntegerField):
+        def validate(self, value, convert=False):
+            calls.append(value)
+            return super(CountField, self).validate(value, convert)
+
+    list_field = ListField(item_field=CountField())
+    assert list_field.validate(['1', '2', '1', '1'], convert=True) == [1, 2, 1, 1]
+    # repeated items are validated once
+    assert calls == ['1', '2']
+
+    with pytest.raises(ValueError) as excinfo:
+        ListField(item_field=IntegerField(max=5)).validate([1, 2, 6])
+    assert '6 at index 2' in str(excinfo.value)
+    with pytest.raises(TypeError) as excinfo:
+        list_field.validate(['1', 'x'], convert=True)
+    assert 'x at index 1' in str(excinfo.value)
+
+    # mutable values are never shared by repeated items
+    class SplitField(Field):
+        def validate(self, value, convert=False):
+            return value.split(',')
+
+    values = ListField(item_field=SplitField()).validate(['a,b', 'a,b'])
+    assert values == [['a', 'b'], ['a', 'b']]
+    assert values[0] is not values[1]
+
+
+def test_list_item_instances():
+    class ItemParams(ParamSet):
+        a = IntegerField(required=True)
+
+    raw = [{'a': 1}, {'a': 2}]
+    assert ListField(item_class=ItemParams).validate(raw) == raw
+
+    items = ListField(item_class=ItemParams, item_instances=True).validate(raw)
+    assert [type(i) for i in items] == [ItemParams, ItemParams]
+    assert [i.a for i in items] == [1, 2]
+
+    with pytest.raises(ValueError) as excinfo:
+        ListField(item_class=ItemParams).validate([{'a': 1}, {}])
+    assert str(excinfo.value) == '[1].a: a is required'
+
+
+def test_nested_field():
+    class AddressParams(ParamSet):
+        zip = StringField(length=5, required=True)
+        city = StringField()
+
+    class UserParams(ParamSet):
+        name = StringField(required=True)
+        addresses = ListField(item_class=AddressParams, item_instances=True)
+        tags = DictField(StringField(), IntegerField(min=0))
+
+    class P(ParamSet):
+        user = NestedField(UserParams, required=True)
+        backup = ListField(item_field=NestedField(AddressParams))
+
+    raw = {
+        'user': {
+            'name': 'a',
+            'addresses': [{'zip': '12345', 'city': 'x'}],
+            'tags': {'b': 1},
+        },
+        'backup': [{'zip': '54321'}],
+    }
+    p = P(raw)
+    assert isinstance(p.user, UserParams)
+    assert p.user.addresses[0].zip == '12345'
+    assert p.backup[0].zip == '54321'
+    assert p.to_dict() == raw
+
+    raw = {
+        'user': {
+            'addresses': [{'zip': '12345'}, {'zip': '12345'}, {'zip': '1'}],
+            'tags': {'a': 1, 'b': -1},
+        },
+        'backup': [{'zip': '54321'}, 'x'],
+    }
+    with pytest.raises(InvalidParams) as excinfo:
+        P(raw)
+    errors = dict((i.key, i.message) for i in excinfo.value.errors)
+    assert sorted(errors) == ['backup', 'user.addresses[2].zip', 'user.name', 'user.tags.b']
+    assert 'x at index 1' in errors['backup']
+    assert sorted(i.key for i in P.try_validate(raw).errors) == sorted(errors)
+
+    with pytest.raises(InvalidParams) as excinfo:
+        P({'user': 1})
+    assert str(excinfo.value) == 'user: Not a dict'
+
+    with pytest.raises(TypeError):
+        NestedField(dict)
+
+
+def test_dict_field():
+    f = DictField(IntegerField(), FloatField(), force_convert=True)
+    assert f.validate({'1': '1.5'}) == {1: 1.5}
+    assert DictField().validate({'a': [1]}) == {'a': [1]}
+    assert DictField().validate(None) is None
+
+    with pytest.raises(ValueError) as excinfo:
+        DictField(value_field=IntegerField(max=1)).validate({'a': 2})
+    assert str(excinfo.value).startswith('a: ')
+    with value_error_ctx:
+        DictField().validate([])
+
+
+class CustomField(IntegerField):
+    def _validate_type(self, value):
+        super(CustomField, self)._validate_type(value)
+        if value == 5:
+            raise ValueError('no 5')
+
+
+@pytest.mark.parametrize('field, value, convert', [
+    (StringField(length=(1, 3)), 'abcd', False),
+    (StringField(length=2, null=False), '', False),
+    (StringField('desc', length=2), 'a', False),
+    (StringField(), 1, True),
+    (StringField(), 1, False),
+    (WordField(), 'a b', False),
+    (EmailField(max_length=5), 'a@b.com', False),
+    (EmailField(), 'a@b.com', False),
+    (IntegerField(min=1, max=3, choices=[1, 2]), '3', True),
+    (IntegerField(min=1), 0, False),
+    (IntegerField(), 'x', True),
+    (FloatField(max=1.0), 1, False),
+    (UUIDStringField(), 'x', False),
+    (DatetimeField(format='%Y-%m-%d'), '2020-1-x', True),
+    (BooleanField(), 'true', True),
+    (ListField(item_field=IntegerField()), [1, 'a'], False),
+    (CustomField(), 5, False),
+    (CustomField(), 6, False),
+    (IntegerField(cache=True, max=1), 2, False),
+])
+def test_check(field, value, convert):
+    try:
+        expected = True, field.validate(value, convert=convert)
+    except (TypeError, ValueError) as e:
+        expected = False, str(e)
+    ok, result = field.check(value, convert=convert)
+    assert (ok, result if ok else str(result)) == expected
+
+
+def test_check_plan():
+    assert IntegerField()._check_plan == ('_check_min_max', )
+    CustomField().check(1)
+    # _validate_type is overridden without _check_type
+    assert CustomField._check_plan is None
+    ListField().check([])
+    assert ListField._check_plan is None
+
+
 @pytest.mark.parametrize('v, valid', [
     ('asdf', False),
     ('1234', False),
@@ -311,6 +488,42 @@ def test_datetime_convert():
     f1.validate('2011-11-11')
 
 
+@pytest.mark.parametrize('format, value', [
+    ('%Y-%m-%d %H:%M:%S', '2011-11-11 10:10:10'),
+    ('%Y-%m-%dT%H:%M:%S.%f', '2011-11-11T10:10:10.12'),
+    ('%Y-%m-%d', '2011-1-1'),
+    ('%Y-%m-%d %H:%M:%S', '2011-11-11  10:10:10'),
+    ('%d/%m/%y', '11/11/11'),
+    ('%Y-%m-%d', '2011-02-29'),
+    ('%Y-%m-%d', '2011-11-11x'),
+    ('%H:%M:%S', '10:10:60'),
+])
+def test_datetime_fast_path(format, value):
+    f = DatetimeField(format=format)
+    try:
+        expected = datetime.datetime.strptime(value, format)
+    except ValueError:
+        with value_error_ctx:
+            f.validate(value, convert=True)
+    else:
+        assert f.validate(value, convert=True) == expected
+
+
+def test_datetime_epoch():
+    f = DatetimeField(format='epoch')
+    dt = datetime.datetime(2011, 11, 11, 10, 10, 10)
+    assert f.validate(1321006210, convert=True) == dt
+    assert f.validate('1321006210', convert=True) == dt
+    assert f.validate('1321006210.5', convert=True) == dt.replace(microsecond=500000)
+    for v in ['x', True, 1e20, float('nan')]:
+        with value_error_ctx:
+            f.validate(v, convert=True)
+
+    f = DatetimeField(format='epoch_ms')
+    assert f.validate(1321006210123, convert=True) == dt.replace(microsecond=123000)
+    assert f.validate('-1000', convert=True) == datetime.datetime(1969, 12, 31, 23, 59, 59)
+
+
 def test_boollean():
     with pytest.raises(TypeError):
         f = BooleanField(default='a')
@@ -0,0 +1,187 @@
+# coding: utf-8
+
+import socket
+import threading
+import pytest
+from params import ParamSet, Field, IntegerField, StringField, InvalidParams
+from params import metrics
+
+
+class UserParams(ParamSet):
+    name = StringField(required=True, length=(0, 5))
+    age = IntegerField(min=0)
+
+    def validate_age(self, value):
+        if value == 42:
+            raise ValueError('no 42')
+        return value
+
+
+class CompiledParams(ParamSet):
+    compiled = True
+    id = IntegerField(required=True)
+    kind = Field(choices=['a', 'b'])
+
+
+@pytest.fixture
+def registry():
+    r = metrics.MetricsRegistry()
+    metrics.enable(r)
+    yield r
+    metrics.disable()
+
+
+def by_name(items, **kwargs):
+    return [i for i in items if all(i[k] == v for k, v in kwargs.items())]
+
+
+def test_snapshot(registry):
+    UserParams({'name': 'a', 'age': 1})
+    UserParams({'name': 'abcdefg', 'age': -1}, raise_if_invalid=False)
+    with pytest.raises(InvalidParams):
+        UserParams({'age': 42})
+
+    snapshot = registry.snapshot()
+    paramset, = snapshot['paramsets']
+    assert paramset['paramset'] == 'metrics_test.UserParams'
+    assert paramset['label'] is None
+    assert paramset['calls'] == 3
+    assert paramset['invalid'] == 2
+    assert paramset['errors'] == {'length': 1, 'min': 1, 'required': 1, 'other': 1}
+    assert paramset['latency']['count'] == 3
+    assert sum(paramset['latency']['counts']) == 3
+    assert len(paramset['latency']['counts']) == len(metrics.DEFAULT_BUCKETS) + 1
+
+    name, = by_name(snapshot['fields'], field='name')
+    # missing fields are not validated
+    assert name['calls'] == 2
+    assert name['invalid'] == 2
+    assert name['errors'] == {'length': 1, 'required': 1}
+    age, = by_name(snapshot['fields'], field='age')
+    assert age['calls'] == 3
+    assert age['errors'] == {'min': 1}
+
+    registry.reset()
+    assert registry.snapshot() == {'paramsets': [], 'fields': []}
+
+
+def test_same_results(registry):
+    p = CompiledParams({'id': '1', 'kind': 'c', 'x': 1}, raise_if_invalid=False, convert_fields=True)
+    metrics.disable()
+    q = CompiledParams({'id': '1', 'kind': 'c', 'x': 1}, raise_if_invalid=False, convert_fields=True)
+    assert p.data == q.data
+    assert [(e.key, e.message) for e in p.errors] == [(e.key, e.message) for e in q.errors]
+
+    metrics.enable(registry)
+    p = UserParams({'name': 'a', 'age': 1, 'x': 2}, raise_if_invalid=False, fail_fast=True)
+    assert len(p.errors) == 0
+    p = UserParams({'name': 'abcdefg', 'age': -1}, raise_if_invalid=False, fail_fast=True)
+    assert len(p.errors) == 1
+    with pytest.raises(InvalidParams):
+        UserParams([1])
+    paramset, = by_name(registry.snapshot()['paramsets'], paramset='metrics_test.UserParams')
+    assert paramset['errors'] == {'length': 1, 'not_dict': 1}
+
+
+def test_compiled(registry, monkeypatch):
+    calls = []
+    validator = CompiledParams.__dict__['_validator']
+
+    def counting_validator(self, raise_if_invalid):
+        calls.append(1)
+        return validator(self, raise_if_invalid)
+
+    monkeypatch.setattr(CompiledParams, '_validator', counting_validator)
+    CompiledParams({'id': 1})
+    # fields are traced through the plan, without the generated validator
+    assert calls == []
+    assert by_name(registry.snapshot()['fields'], field='id')[0]['calls'] == 1
+
+    registry = metrics.MetricsRegistry(fields=False)
+    metrics.enable(registry)
+    CompiledParams({'id': 1})
+    assert calls == [1]
+    paramset, = registry.snapshot()['paramsets']
+    assert paramset['calls'] == 1
+    assert registry.snapshot()['fields'] == []
+
+
+def test_disabled(registry):
+    metrics.disable()
+    assert not metrics.is_enabled()
+    UserParams({'name': 'a'})
+    with metrics.label('x'):
+        UserParams({'name': 'a'})
+    assert registry.snapshot()['paramsets'] == []
+
+
+def test_label(registry):
+    with metrics.label('view'):
+        UserParams({'name': 'a'})
+        assert metrics.call_labeled('other', UserParams, {'name': 'a'})
+    UserParams({'name': 'a'})
+    labels = [(i['label'], i['calls']) for i in registry.snapshot()['paramsets']]
+    assert labels == [(None, 1), ('other', 1), ('view', 1)]
+
+
+def test_threads(registry):
+    def run():
+        for i in range(100):
+            UserParams({'name': 'a', 'age': i % 2 - 1}, raise_if_invalid=False)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    paramset, = registry.snapshot()['paramsets']
+    assert paramset['calls'] == 400
+    assert paramset['errors'] == {'min': 200}
+
+
+def test_prometheus(registry, tmpdir):
+    with metrics.label('a "view"'):
+        UserParams({'name': 'abcdefg'}, raise_if_invalid=False)
+    text = metrics.to_prometheus(registry)
+    assert '# TYPE params_paramset_seconds histogram' in text
+    assert 'params_paramset_validations_total{label="a \\"view\\"",paramset="metrics_test.UserParams"} 1' in text
+    assert ('params_paramset_errors_total{code="length",label="a \\"view\\"",'
+            'paramset="metrics_test.UserParams"} 1') in text
+    assert ('params_field_seconds_bucket{field="name",label="a \\"view\\"",le="+Inf",'
+            'paramset="metrics_test.UserParams"} 1') in text
+    assert 'field="age"' not in text
+
+    path = str(tmpdir.join('params.prom'))
+    metrics.write_prometheus(path, registry)
+    with open(path) as f:
+        assert f.read() == text
+
+    responses = []
+    body = metrics.prometheus_app({}, lambda status, headers: responses.append(status), registry)
+    assert responses == ['200 OK']
+    assert b''.join(body).decode('utf8') == text
+
+
+def test_statsd(registry):
+    listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.settimeout(5)
+    sink = metrics.StatsdSink(port=listener.getsockname()[1], prefix='app')
+    registry.add_sink(sink)
+    try:
+        with metrics.label('views.user'):
+            UserParams({'age': -1}, raise_if_invalid=False)
+        lines = listener.recv(65536).decode('utf8').split('\n')
+    finally:
+        sink.close()
+        listener.close()
+
+    name = 'app.views_user.metrics_test_UserParams'
+    assert name + '.calls:1|c' in lines
+    assert name + '.invalid:1|c' in lines
+    assert name + '.errors.required:1|c' in lines
+    assert name + '.errors.min:1|c' in lines
+    assert name + '.age.errors.min:1|c' in lines
+    # missing field is not timed
+    assert name + '.name.calls:1|c' not in lines
+    assert [i for i in lines if i.startswith(name + '.latency:') and i.endswith('|ms')]
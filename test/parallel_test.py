@@ -0,0 +1,61 @@
+# coding: utf-8
+
+import json
+import params
+from params.parallel import validate_parallel
+
+
+class ItemParams(params.ParamSet):
+    id = params.IntegerField(required=True, min=0)
+    name = params.StringField(length=(1, 8))
+
+
+def make_items(n):
+    items = []
+    for i in range(n):
+        if i % 7 == 3:
+            items.append({'id': -i})
+        elif i % 11 == 5:
+            items.append({'name': 'x' * 20})
+        else:
+            items.append({'id': i, 'name': 'n{}'.format(i % 100)})
+    return items
+
+
+def expected(items):
+    result = []
+    for i, item in enumerate(items):
+        p = ItemParams(item, raise_if_invalid=False)
+        result.append((i, p.to_record() if not p.errors else None, [(e.key, str(e.message)) for e in p.errors]))
+    return result
+
+
+def collect(results):
+    return [(i, record, [(e.key, e.message) for e in errors]) for i, record, errors in results]
+
+
+def test_validate_parallel():
+    items = make_items(500)
+    assert collect(validate_parallel(ItemParams, iter(items), workers=2, chunksize=30)) == expected(items)
+
+
+def test_validate_parallel_ndjson():
+    items = make_items(300)
+    lines = [json.dumps(i) for i in items]
+    data = ('\n'.join(lines[:100]) + '\n\n' + '\n'.join(lines[100:]) + '\n').encode('utf8')
+    results = collect(validate_parallel(ItemParams, data, workers=2, chunk_bytes=512))
+    assert results == expected(items)
+
+    results = collect(validate_parallel(ItemParams, b'{"id": 1}\nnot json\n[]', workers=1))
+    assert results[0][1].id == 1
+    assert results[1][1] is None
+    assert results[1][2][0][1].startswith('Could not parse line as json')
+    assert results[2][2] == [(None, 'params data is not a dict')]
+
+
+def test_validate_parallel_early_stop():
+    items = make_items(1000)
+    results = validate_parallel(ItemParams, iter(items), workers=2, chunksize=10)
+    first = [next(results) for _ in range(5)]
+    results.close()
+    assert [i for i, _, _ in first] == [0, 1, 2, 3, 4]
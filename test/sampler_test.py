@@ -0,0 +1,174 @@
+# coding: utf-8
+
+import json
+import time
+import pytest
+from params import ParamSet, Field, IntegerField, StringField, ListField, RegexField, InvalidParams
+from params import metrics
+from params.sampler import SlowSampler, payload_shape
+
+
+class SlowParams(ParamSet):
+    name = StringField(length=(0, 100))
+    tags = ListField(item_field=IntegerField())
+    age = IntegerField(required=True)
+
+    def validate_name(self, value):
+        time.sleep(0.02)
+        return value
+
+
+class CompiledParams(ParamSet):
+    compiled = True
+    a = IntegerField()
+
+
+@pytest.fixture
+def sampler():
+    s = SlowSampler(threshold=0.01, capacity=2, min_interval=0)
+    s.start()
+    yield s
+    s.stop()
+
+
+def test_payload_shape():
+    assert payload_shape({'a': 'secret', 'b': [{'c': 1}, {}], 'd': None}) == {
+        'type': 'dict', 'length': 3, 'keys': {
+            'a': {'type': 'str', 'length': 6},
+            'b': {'type': 'list', 'length': 2, 'item': {
+                'type': 'dict', 'length': 1, 'keys': {'c': {'type': 'int'}}}},
+            'd': {'type': 'NoneType'},
+        }}
+    shape = payload_shape(dict((str(i), i) for i in range(10)), max_keys=3)
+    assert len(shape['keys']) == 3
+    assert shape['truncated']
+    assert payload_shape([[[1]]], max_depth=1) == {'type': 'list', 'length': 1, 'item': {'type': 'list', 'length': 1}}
+
+
+def test_traced_validate():
+    def steps_of(field, value, convert=False):
+        steps = []
+        try:
+            field._traced_validate(value, convert, steps.append)
+        except (TypeError, ValueError):
+            pass
+        return [name for name, _ in steps]
+
+    assert steps_of(StringField(length=(0, 3), choices=['ab']), 'ab') == ['null', 'type', 'choices']
+    assert steps_of(IntegerField(min=1), 0) == ['null', 'type', 'min_max']
+    assert steps_of(IntegerField(min=1), 'x', convert=True) == ['null', 'convert']
+    assert steps_of(RegexField(pattern=r'\d+'), 1) == ['null', 'type']
+    assert steps_of(ListField(item_field=Field()), [1]) == ['validate']
+    assert steps_of(Field(null=False), '') == ['null']
+
+    field = IntegerField(min=1)
+    assert field._traced_validate('2', True, lambda step: None) == field.validate('2', convert=True)
+
+
+def test_sampler(sampler):
+    # fast ones are not recorded
+    SlowParams({'age': 1})
+    assert sampler.records() == []
+
+    # the first slow one of a class is not traced
+    p = SlowParams({'name': 'secret', 'tags': ['1', 'x'], 'age': 1}, raise_if_invalid=False)
+    assert len(p.errors) == 1
+    record, = sampler.records()
+    assert record['paramset'] == 'sampler_test.SlowParams'
+    assert record['elapsed'] >= 0.02
+    assert record['errors'] == ['type']
+    assert record['fields'] is None
+    assert record['hooks'] is None
+    assert record['shape']['keys']['name'] == {'type': 'str', 'length': 6}
+    assert record['shape']['keys']['tags']['length'] == 2
+
+    # then the class is traced step by step
+    p = SlowParams({'name': 'secret', 'tags': ['1', 'x'], 'age': '1'}, raise_if_invalid=False,
+                   convert_fields=True)
+    assert p.data == {'name': 'secret', 'age': 1}
+    record = sampler.records()[-1]
+    assert [i['name'] for i in record['hooks']] == ['validate_name']
+    assert record['hooks'][0]['elapsed'] >= 0.02
+    assert [(i['key'], i['errors']) for i in record['fields']] == [
+        ('name', []), ('tags', ['convert']), ('age', [])]
+    name, tags, age = record['fields']
+    assert [step for step, _ in name['steps']] == ['null', 'convert', 'type']
+    assert [step for step, _ in tags['steps']] == ['validate']
+    assert [step for step, _ in age['steps']] == ['null', 'convert', 'type', 'min_max']
+
+    dumped = sampler.dumps()
+    assert 'secret' not in dumped
+    assert json.loads(dumped)['records'][0]['paramset'] == 'sampler_test.SlowParams'
+
+    # ring buffer
+    SlowParams({'name': 'abc', 'age': 1})
+    assert [r['shape']['keys']['name']['length'] for r in sampler.records()] == [6, 3]
+
+    sampler.clear()
+    assert sampler.records() == []
+    assert sampler.trace_level(SlowParams) == metrics.TRACE_NONE
+
+
+def test_trace_count(sampler):
+    sampler.trace_count = 2
+    SlowParams({'name': 'a', 'age': 1})
+    SlowParams({'name': 'a', 'age': 1})
+    SlowParams({'name': 'a', 'age': 1})
+    assert [r['fields'] is not None for r in sampler.records()] == [True, True]
+    # slow ones being traced don't extend the tracing, the next slow one does
+    SlowParams({'name': 'a', 'age': 1})
+    assert sampler.records()[-1]['fields'] is None
+    assert sampler.trace_level(SlowParams) == metrics.TRACE_STEPS
+
+    sampler.trace_count = 0
+    sampler.clear()
+    SlowParams({'name': 'a', 'age': 1})
+    assert sampler.trace_level(SlowParams) == metrics.TRACE_NONE
+
+
+def test_compiled(sampler, monkeypatch):
+    calls = []
+    validator = CompiledParams.__dict__['_validator']
+
+    def counting_validator(self, raise_if_invalid):
+        calls.append(1)
+        return validator(self, raise_if_invalid)
+
+    monkeypatch.setattr(CompiledParams, '_validator', counting_validator)
+    # classes which have never been slow keep the generated validator
+    CompiledParams({'a': 1})
+    with pytest.raises(InvalidParams):
+        CompiledParams({'a': 'x'})
+    assert calls == [1, 1]
+
+
+def test_min_interval(sampler, tmpdir):
+    sampler.min_interval = 60
+    SlowParams({'name': 'a', 'age': 1})
+    SlowParams({'name': 'a', 'age': 1})
+    assert len(sampler.records()) == 1
+    assert sampler.dropped == 1
+
+    path = str(tmpdir.join('slow.json'))
+    sampler.dump(path)
+    with open(path) as f:
+        assert json.load(f)['dropped'] == 1
+
+
+def test_with_metrics(sampler):
+    registry = metrics.MetricsRegistry()
+    metrics.enable(registry)
+    try:
+        SlowParams({'name': 'a', 'age': 1})
+        SlowParams({'name': 'a', 'age': 1})
+    finally:
+        metrics.disable()
+    assert metrics.is_enabled() is False
+    records = sampler.records()
+    assert records[0]['fields'] is not None
+    assert records[1]['fields'][0]['steps'] is not None
+    assert registry.snapshot()['paramsets'][0]['calls'] == 2
+
+    sampler.stop()
+    SlowParams({'name': 'a', 'age': 1})
+    assert len(sampler.records()) == 2
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import tornado.httpserver
 import tornado.ioloop
 import tornado.options
@@ -98,6 +100,37 @@ class PostJsonHandler(BaseHandler):
         return self.write(str(self.params))
 
 
+executor = ThreadPoolExecutor(2)
+process_executor = ProcessPoolExecutor(1)
+
+
+class OffloadParams(params.ParamSet):
+    a = params.IntegerField(required=True)
+    b = params.ListField(item_field=params.IntegerField())
+
+    def validate_a(self, value):
+        self.thread = threading.current_thread().name
+        return value
+
+
+class OffloadHandler(BaseHandler):
+    @use_params(OffloadParams, is_json=True, executor=executor, offload_size=16)
+    def post(self):
+        self.write({'a': self.params.a, 'thread': self.params.thread})
+
+
+class OffloadProcessHandler(BaseHandler):
+    @use_params(OffloadParams, is_json=True, executor=process_executor, offload_size=16)
+    def post(self):
+        try:
+            self.params.get_raw('a')
+        except ValueError:
+            released = True
+        else:
+            released = False
+        self.write({'a': self.params.a, 'b': self.params.b, 'released': released})
+
+
 class RawHandler(BaseHandler):
     @use_raw()
     def post(self):
@@ -118,14 +151,20 @@ class RawJsonHandler(BaseHandler):
 
 def get_app():
     enable_pretty_logging()
-    application = Application([
+    handlers = [
         (r'/', HomeHandler),
         (r'/get', GetHandler),
         (r'/post', PostHandler),
         (r'/post/json', PostJsonHandler),
+        (r'/post/offload', OffloadHandler),
+        (r'/post/offload/process', OffloadProcessHandler),
         (r'/raw', RawHandler),
         (r'/raw/json', RawJsonHandler),
-    ])
+    ]
+    if sys.version_info >= (3, 5):
+        from tornado_async_app import AsyncOffloadProcessHandler
+        handlers.append((r'/post/offload/process/async', AsyncOffloadProcessHandler))
+    application = Application(handlers)
     return application
 
 
@@ -0,0 +1,10 @@
+# coding: utf-8
+
+from tornado_app import BaseHandler, OffloadParams, process_executor
+from params.contrib.tornado import use_params
+
+
+class AsyncOffloadProcessHandler(BaseHandler):
+    @use_params(OffloadParams, is_json=True, executor=process_executor, offload_size=16)
+    async def post(self):
+        self.write({'type': type(self.params).__name__, 'a': self.params.a, 'b': self.params.b})
@@ -1,5 +1,7 @@
 # coding: utf-8
 
+import sys
+import json
 import pytest
 try:
     import tornado
@@ -71,6 +73,53 @@ class ParamsTest(AsyncHTTPTestCase):
         print('resp 4', resp.body)
         self.assertEqual(resp.code, 200)
 
+    def test_post_offload(self):
+        url = '/post/offload'
+        resp = self.fetch(url, method='POST', body='{"a":1}')
+        self.assertEqual(resp.code, 200)
+        self.assertEqual(json.loads(str_(resp.body))['thread'], 'MainThread')
+
+        resp = self.fetch(url, method='POST', body='{"a": 1, "b": [1, 2, 3]}')
+        self.assertEqual(resp.code, 200)
+        self.assertNotEqual(json.loads(str_(resp.body))['thread'], 'MainThread')
+
+        resp = self.fetch(url, method='POST', body='{"a": 1, "b": [1, "x"]}')
+        self.assertEqual(resp.code, param_error_code)
+        resp = self.fetch(url, method='POST', body='{"a": 1, "b": [1, 2, 3]')
+        self.assertEqual(resp.code, param_error_code)
+
+    def test_post_offload_process(self):
+        url = '/post/offload/process'
+        resp = self.fetch(url, method='POST', body='{"a": 1, "b": [1, 2, 3]}')
+        self.assertEqual(resp.code, 200)
+        self.assertEqual(json.loads(str_(resp.body)), {'a': 1, 'b': [1, 2, 3], 'released': True})
+
+        resp = self.fetch(url, method='POST', body='{"a": 1, "b": [1, "x"]}')
+        self.assertEqual(resp.code, param_error_code)
+        self.assertIn('b', json.loads(str_(resp.body))['error'])
+
+    @pytest.mark.skipif(sys.version_info < (3, 5), reason='requires async def')
+    def test_post_offload_process_async(self):
+        url = '/post/offload/process/async'
+        resp = self.fetch(url, method='POST', body='{"a": 1, "b": [1, 2, 3]}')
+        self.assertEqual(resp.code, 200)
+        self.assertEqual(json.loads(str_(resp.body)), {'type': 'OffloadParams', 'a': 1, 'b': [1, 2, 3]})
+
+        resp = self.fetch(url, method='POST', body='{"a": 1, "b": [1, "x"]}')
+        self.assertEqual(resp.code, param_error_code)
+
+    def test_metrics_label(self):
+        from params import metrics
+        registry = metrics.MetricsRegistry()
+        metrics.enable(registry)
+        try:
+            self.fetch('/post', method='POST', body='a=1')
+        finally:
+            metrics.disable()
+        paramset, = registry.snapshot()['paramsets']
+        self.assertEqual(paramset['label'], 'tornado_app.PostHandler.post')
+        self.assertEqual(paramset['calls'], 1)
+
     def test_raw(self):
         url = '/raw'
         resp = self.fetch(url, method='POST', body='')
@@ -26,3 +26,49 @@ def test_unicode_copy():
     if PY2:
         assert isinstance(b[0], unicode)
     assert a[0] == str(b[0])
+
+
+def test_iter_json_lines():
+    from params.utils import iter_json_lines
+
+    results = list(iter_json_lines([b'{"a": 1}', '', ' \n', '[1]', '{']))
+    assert results[:2] == [({'a': 1}, None), ([1], None)]
+    assert results[2][0] is None
+    assert results[2][1].startswith('Could not parse line as json')
+
+
+def test_json_array_reader():
+    import io
+    import json
+    import pytest
+    from params.utils import JSONArrayReader
+
+    items = [{'a': i, 'b': u'中' * (i % 5), 'c': [1.5, None, True]} for i in range(200)] + [12345, 'x']
+    data = json.dumps(items, ensure_ascii=False).encode('utf8')
+    for chunk_size in (1, 7, 64, 65536):
+        assert list(JSONArrayReader(io.BytesIO(data), chunk_size=chunk_size)) == items
+
+    assert list(JSONArrayReader(io.BytesIO(b' [ ] '))) == []
+    assert list(JSONArrayReader(io.StringIO(u'[1, 22,333]'), chunk_size=2)) == [1, 22, 333]
+
+    with pytest.raises(ValueError):
+        JSONArrayReader(io.BytesIO(b'{"a": 1}'))
+    with pytest.raises(ValueError):
+        JSONArrayReader(io.BytesIO(b''))
+    with pytest.raises(ValueError):
+        list(JSONArrayReader(io.BytesIO(b'[1, 2')))
+    with pytest.raises(ValueError):
+        list(JSONArrayReader(io.BytesIO(b'[1 2]')))
+    with pytest.raises(ValueError):
+        list(JSONArrayReader(io.BytesIO(b'[1, {]')))
+
+    # numbers split by chunks
+    for chunk_size in range(1, 12):
+        assert list(JSONArrayReader(io.BytesIO(b'[-1.5e+10, 2.25, "\\u00e9"]'), chunk_size=chunk_size)) == [
+            -1.5e+10, 2.25, u'\xe9']
+
+    # malformed data is not read to the end
+    fp = io.BytesIO(b'[{"a": 1}, {"a": x}, ' + b','.join([b'{"a": 1}'] * 100000) + b']')
+    with pytest.raises(ValueError):
+        list(JSONArrayReader(fp, chunk_size=1024))
+    assert fp.tell() == 1024
@@ -0,0 +1,99 @@
+# coding: utf-8
+
+import time
+import random
+import pytest
+from params.fields import EMAIL_REGEX, URL_REGEX
+from params.validators import is_email, is_url, find_unsafe_repeat
+
+
+EMAILS = [
+    'a@b.co', 'a.b+c@a-b.c-d.museum', 'a@b.co.', 'a@b.co\n', 'a@b.co\n\n', 'a@b.c', 'a@b.abcdefg',
+    'a@-b.co', 'a@b-.co', 'a@b..co', '.a@b.co', 'a.@b.co', 'a..b@b.co', '@b.co', 'a@', 'a@co',
+    'x@' + 'a' * 63 + '.com', 'x@' + 'a' * 64 + '.com', 'a b@c.co', 'a@b.c0',
+    '"a@b"@x.com', '"a\\"b"@x.io', '"a"b"@x.io', '"\\"@x.io', '"a\\\x7f"@x.io', '"a b"@x.io', '""@x.io',
+    u'\u017f@\u212a.\u0131\u0130', u'\u00e9@a.co', u'a@\u0663.co',
+]
+
+URLS = [
+    'http://a.com', 'https://localhost:8000/x?y', 'ftp://1.2.3.4', 'ftps://a.b-c.d1/', 'http://a.co.?x',
+    'http://a.bc/?', 'http://a.bc?', 'http://a.bc/', 'http://a.bc//', 'http://a.b/c d', 'http://a.b--c',
+    'http://a.bc:/', 'http://a.bc:80:90', 'http://a.bc:80?x', 'http://localhost', 'http://LOCALHOST.',
+    'http://1.2.3', 'http://1234.1.1.1', 'http://a.bc\n', 'http://a.bc/x\n', 'http://a', 'ssh://a.bc',
+    'http://-a.bc', 'http://a.-bc', u'HTTP\u017f://a.bc', u'http://\u0663.1.1.1:\u0663/', u'http://a.b\u212a',
+    'http://t.cn/@#$#$(*&', 'http://have.punc*tu*rat@ions.com',
+]
+
+
+@pytest.mark.parametrize('value', EMAILS)
+def test_is_email(value):
+    assert is_email(value) == bool(EMAIL_REGEX.search(value))
+
+
+@pytest.mark.parametrize('value', URLS)
+def test_is_url(value):
+    assert is_url(value) == bool(URL_REGEX.search(value))
+
+
+def _mutate(s, alphabet):
+    s = list(s)
+    for _ in range(random.randint(0, 3)):
+        i = random.randrange(len(s) + 1)
+        op = random.random()
+        if op < 0.4 and s:
+            s[min(i, len(s) - 1)] = random.choice(alphabet)
+        elif op < 0.8:
+            s.insert(i, random.choice(alphabet))
+        elif s:
+            del s[min(i, len(s) - 1)]
+    return ''.join(s)
+
+
+def test_same_as_regex():
+    random.seed(0)
+    alphabet = u'aZ09-._@"\\ \n:/?!#\x01\x7f\u0130\u0131\u017f\u212a\u0663'
+    for _ in range(5000):
+        v = _mutate(random.choice(EMAILS), alphabet)
+        assert is_email(v) == bool(EMAIL_REGEX.search(v)), repr(v)
+        v = _mutate(random.choice(URLS), alphabet)
+        assert is_url(v) == bool(URL_REGEX.search(v)), repr(v)
+
+
+# inputs that cause heavy backtracking on regexes of the same grammar
+REDOS_CORPUS = [
+    (is_email, lambda n: 'a@' + 'a' * n + '!'),
+    (is_email, lambda n: 'a@' + 'a.' * n + '!'),
+    (is_email, lambda n: 'a.' * n + '!@a.co'),
+    (is_email, lambda n: '"' + '\\a' * n + '@a.co'),
+    (is_email, lambda n: '@' * n),
+    (is_url, lambda n: 'http://' + 'a.' * n + '!'),
+    (is_url, lambda n: 'http://' + 'a-' * n + ' '),
+    (is_url, lambda n: 'http://' + '1.' * n),
+    (is_url, lambda n: 'http://a.co/' + 'a' * n + ' '),
+    (is_url, lambda n: 'http://a.co:' + '1' * n + '!'),
+]
+
+
+@pytest.mark.parametrize('validate, make', REDOS_CORPUS)
+def test_redos_corpus(validate, make):
+    value = make(200000)
+    start = time.time()
+    validate(value)
+    # linear time, about milliseconds, a backtracking regex takes forever
+    assert time.time() - start < 1
+
+
+@pytest.mark.parametrize('pattern, unsafe', [
+    (r'(a+)+$', True),
+    (r'(a*)*', True),
+    (r'(a{1,2})+', True),
+    (r'(a|ab)*c', True),
+    (r'x(?=(a+)+)', True),
+    (r'(?:foo|bar)+', False),
+    (r'(\w|\d)+', False),
+    (r'^[\w]*$', False),
+    (r'^\d{3}-\d{4}$', False),
+    (r'(a{1,2}){1,3}', False),
+])
+def test_find_unsafe_repeat(pattern, unsafe):
+    assert bool(find_unsafe_repeat(pattern)) is unsafe
@@ -0,0 +1,57 @@
+# coding: utf-8
+
+import pytest
+from params.fields import StringField, IntegerField, FloatField, WordField
+
+np = pytest.importorskip('numpy')
+
+from params.vectorized import validate_column  # NOQA
+
+
+def scalar_result(field, values, convert=False):
+    mask = []
+    errors = {}
+    for i, v in enumerate(values):
+        try:
+            field.validate(v, convert=convert)
+        except (TypeError, ValueError) as e:
+            mask.append(False)
+            errors[i] = str(e)
+        else:
+            mask.append(True)
+    return mask, errors
+
+
+@pytest.mark.parametrize('field, column', [
+    (IntegerField(min=1, max=9), [0, 1, 5, 9, 10, True]),
+    (IntegerField(min=1, max=9), np.array([0, 1, 5, 9, 10])),
+    (IntegerField(), np.array([1.0, 2.5])),
+    (IntegerField(choices=[1, 2, 3]), [1, 2, 4]),
+    (IntegerField(null_values=(0, ), null=False), [0, 1]),
+    (IntegerField(), [1, '2', None, 1.5]),
+    (FloatField(min=0.0, max=2.0), [0, 0.5, 2, 2.5, -1.0, float('nan')]),
+    (FloatField(min=0.0), np.array([-1.5, 0.0, 1.5])),
+    (StringField(length=(1, 3)), ['', 'a', 'abc', 'abcd']),
+    (StringField(length=2, null=False), ['', 'ab', 'abc']),
+    (StringField(choices=['a', 'b']), ['a', 'b', 'c', '']),
+    (StringField(choices=['a', 'b']), np.array(['a', 'b', 'c', ''])),
+    (StringField(length=(2, 4)), np.array(['a', 'abc', 'abcde'])),
+    (StringField(), ['a', 1, None]),
+    (WordField(), ['ab', 'a b']),
+])
+def test_same_as_scalar(field, column):
+    result = validate_column(field, column)
+    values = column.tolist() if isinstance(column, np.ndarray) else column
+    mask, errors = scalar_result(field, values)
+    assert result.mask.tolist() == mask
+    assert result.errors == errors
+    assert result.invalid_indices.tolist() == sorted(errors.keys())
+    assert result.valid is all(mask)
+
+
+def test_convert():
+    field = IntegerField(max=5)
+    result = validate_column(field, ['1', '6', 'x'], convert=True)
+    assert result.mask.tolist() == [True, False, False]
+    assert result.error(0) is None
+    assert result.error(1) == 'vaule 6 is too big, max 5'